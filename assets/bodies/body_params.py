@@ -10,6 +10,8 @@ class BodyParameters(pyg.BodyParametrizationBase):
         super().__init__(param_file)
 
     def eval_dependencies(self, key=None):
+        # NOTE: Also evaluated on the measurement columns of pyg.BodyParametersTable,
+        # hence only element-wise operations on the parameters
         super().eval_dependencies(key)
 
         if key in ['height', 'head_l', 'waist_line', 'hips_line', None]:
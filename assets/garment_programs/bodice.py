@@ -1,4 +1,3 @@
-from copy import deepcopy
 import numpy as np
 
 import pygarment as pyg
@@ -175,7 +174,7 @@ class BodiceHalf(pyg.Component):
     def __init__(self, name, body, design, fitted=True) -> None:
         super().__init__(name)
 
-        design = deepcopy(design)   # Recalculate freely!
+        design = pyg.copy_design(design, copy_on_write=True)   # Recalculate freely!
 
         # Torso
         if fitted:
@@ -461,7 +460,7 @@ class Shirt(pyg.Component):
         # TODOLOW enable this one to work
         if design['left']['enable_asym']['v']:
             # Force no collars since they are not compatible with each other
-            design = deepcopy(design)
+            design = pyg.copy_design(design, copy_on_write=True)
             design['collar']['component']['style']['v'] = None
             design['left']['collar']['component'] = dict(style=dict(v=None))
             
@@ -1,4 +1,3 @@
-from copy import deepcopy
 import numpy as np
 
 import pygarment as pyg
@@ -242,7 +241,7 @@ class PantsHalf(BaseBottoms):
                 self.back.interfaces['bottom'])
 
             # Copy to avoid editing original design dict
-            cdesign = deepcopy(design)
+            cdesign = pyg.copy_design(design, copy_on_write=True)
             cdesign['cuff']['b_width'] = {}
             cdesign['cuff']['b_width']['v'] = pant_bottom.edges.length() / design['cuff']['top_ruffle']['v']
             cdesign['cuff']['cuff_len']['v'] = cuff_len
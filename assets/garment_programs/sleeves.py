@@ -300,7 +300,7 @@ class Sleeve(pyg.Component):
         if design['cuff']['type']['v']:
             # Class
             # Copy to avoid editing original design dict
-            cdesign = deepcopy(design)
+            cdesign = pyg.copy_design(design, copy_on_write=True)
             cuff_circ = self.interfaces['out'].edges.length() / design['cuff']['top_ruffle']['v']
             # Ensure it fits regardless of parameters
             cuff_circ = max(cuff_circ, body['wrist'])
@@ -0,0 +1,350 @@
+"""Performance benchmark of the garment generation pipeline
+
+    Runs the pipeline on fixed designs and fixed bodies and measures wall time
+    and peak memory of each stage:
+        * program -- evaluation of the garment program (MetaGarment construction)
+        * assembly -- assembly of the sewing pattern
+        * serialize -- saving the pattern specification & visualization
+        * boxmesh_* -- stages of the box mesh generation, and its serialization with textures
+        * sim_init, sim_steps, sim_save -- fixed number of simulation steps (on CPU by default)
+        * render -- rendering of the simulated garment
+
+    The results are stored in a JSON report (and, optionally, CSV table) for comparison
+    between versions and machines.
+
+    Example:
+        python benchmark.py --last_stage boxmesh --repeats 3
+"""
+
+import argparse
+import csv
+import gc
+import json
+import platform
+import threading
+import time
+import traceback
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import psutil
+import yaml
+
+from assets.garment_programs.meta_garment import MetaGarment
+from assets.bodies.body_params import BodyParameters
+from pygarment.data_config import Properties
+from pygarment.meshgen.boxmeshgen import BoxMesh
+from pygarment.meshgen.sim_config import PathCofig
+
+STAGE_GROUPS = ['program', 'assembly', 'serialize', 'boxmesh', 'sim', 'render']
+
+# Fixed designs: design parameters file and values of the garment type (meta) parameters
+BENCHMARK_DESIGNS = {
+    't-shirt': ('./assets/design_params/t-shirt.yaml', {}),
+    'fitted_shirt_many_panels_skirt': (
+        './assets/design_params/default.yaml', 
+        {'upper': 'FittedShirt', 'wb': 'StraightWB', 'bottom': 'SkirtManyPanels'}),
+    'shirt_pants': (
+        './assets/design_params/default.yaml', 
+        {'upper': 'Shirt', 'wb': 'FittedWB', 'bottom': 'Pants'}),
+    'godet_skirt': (
+        './assets/design_params/default.yaml', 
+        {'upper': None, 'wb': 'StraightWB', 'bottom': 'GodetSkirt'}),
+}
+
+
+class PeakMemory:
+    """Peak resident memory of the process (in MB) while executing the block
+
+        The memory is polled from a background thread with a given interval,
+        hence very short-living peaks might be missed
+    """
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.start_mb = self.peak_mb = 0
+
+    def _rss_mb(self):
+        return self.process.memory_info().rss / 2**20
+
+    def _poll(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, self._rss_mb())
+
+    def __enter__(self):
+        self.start_mb = self.peak_mb = self._rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, self._rss_mb())
+
+
+class StageTimer:
+    """Collects the measurements of the pipeline stages"""
+    def __init__(self, case_info):
+        self.case_info = case_info
+        self.records = []
+
+    def __call__(self, stage, func, **extra_info):
+        """Run and measure a stage.
+            Returns the output of the stage function
+        """
+        gc.collect()   # Don't attribute garbage of the previous stages
+        record = dict(self.case_info, stage=stage, **extra_info)
+        with PeakMemory() as memory:
+            start = time.perf_counter()
+            try:
+                return func()
+            except BaseException as e:
+                record['error'] = repr(e)
+                raise
+            finally:
+                record['wall_time'] = time.perf_counter() - start
+                record['peak_rss_mb'] = memory.peak_mb
+                record['rss_increase_mb'] = memory.peak_mb - memory.start_mb
+                self.records.append(record)
+
+
+def get_command_args():
+    """command line arguments to control the run"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--designs', '-d', nargs='+',
+        help='Design parameter files. Defaults to the fixed set of benchmark designs',
+        type=str,
+        default=None)
+    parser.add_argument(
+        '--bodies', '-b', nargs='+',
+        help='Names of the bodies in the default bodies folder (system.json["bodies_default_path"])',
+        type=str,
+        default=['mean_all', 'mean_female', 'mean_male'])
+    parser.add_argument(
+        '--sim_config', '-s',
+        help='Path to simulation config',
+        type=str,
+        default='./assets/Sim_props/default_sim_props.yaml')
+    parser.add_argument(
+        '--last_stage',
+        help='Run the pipeline up to (and including) this stage',
+        type=str, choices=STAGE_GROUPS, default='render')
+    parser.add_argument(
+        '--sim_steps',
+        help='Number of simulation frames',
+        type=int, default=20)
+    parser.add_argument(
+        '--device',
+        help='Warp device for the simulation',
+        type=str, default='cpu')
+    parser.add_argument(
+        '--meshgen_workers',
+        help='Number of processes for the panel triangulation. Defaults to the sim config value (or 1)',
+        type=int, default=None)
+    parser.add_argument(
+        '--repeats', '-r',
+        help='Number of runs for every design-body pair',
+        type=int, default=1)
+    parser.add_argument(
+        '--output', '-o',
+        help='Output folder. Defaults to the timestamped folder in system.json["output"]',
+        type=str, default=None)
+    parser.add_argument(
+        '--csv',
+        help='Store the measurements as CSV table in addition to JSON report',
+        action='store_true')
+
+    args = parser.parse_args()
+    print('Commandline arguments: ', args)
+
+    return args
+
+
+def run_pipeline(timer: StageTimer, name, design, body_name, bodies_path, props, out_path, args):
+    """Run the pipeline stages on a single design-body pair"""
+    stages = STAGE_GROUPS[:STAGE_GROUPS.index(args.last_stage) + 1]
+
+    body = BodyParameters(bodies_path / f'{body_name}.yaml')
+    piece = timer('program', lambda: MetaGarment(name, body, design))
+    pattern = timer('assembly', piece.assembly)
+    if 'serialize' not in stages:
+        return
+
+    def save_sample():
+        folder = pattern.serialize(
+            out_path, to_subfolder=True,
+            with_3d=False, with_text=False, view_ids=False)
+        body.save(folder)
+        with open(Path(folder) / 'design_params.yaml', 'w') as f:
+            yaml.dump({'design': design}, f, default_flow_style=False, sort_keys=False)
+        return folder
+
+    folder = timer('serialize', save_sample)
+    if 'boxmesh' not in stages:
+        return
+
+    # Box mesh
+    paths = PathCofig(
+        in_element_path=folder,
+        out_path=folder,
+        in_name=pattern.name,
+        out_name='sim',
+        body_name=body_name
+    )
+    sim_props = props['sim']
+    meshgen_workers = args.meshgen_workers or sim_props['config'].get('meshgen_workers', 1)
+    box_mesh = BoxMesh(paths.in_g_spec, sim_props['config']['resolution_scale'], workers=meshgen_workers)
+    timer('boxmesh_self_intersection', box_mesh.is_self_intersecting)
+    timer('boxmesh_panels', box_mesh.load_panels)
+    timer('boxmesh_panel_meshes', box_mesh.gen_panel_meshes)
+    timer('boxmesh_stitch', box_mesh.collapse_stitch_vertices)
+    timer('boxmesh_finalise', box_mesh.finalise_mesh)
+    box_mesh.loaded = True
+    timer('boxmesh_serialize', lambda: box_mesh.serialize(
+        paths,
+        uv_config=props['render']['config']['uv_texture'],
+        binary=sim_props['config']['options'].get('store_binary_mesh', False)
+    ))
+    if 'sim' not in stages:
+        return
+
+    # Simulation
+    import warp as wp
+    from pygarment.meshgen.garment import Cloth
+    from pygarment.meshgen.sim_config import SimConfig
+
+    wp.init()
+    config = SimConfig(sim_props['config'])
+    with wp.ScopedDevice(args.device):
+        garment = timer('sim_init', lambda: Cloth(box_mesh.name, config, paths, caching=False))
+
+        def sim_steps():
+            for frame in range(args.sim_steps):
+                garment.frame = frame
+                garment.run_frame()
+            wp.synchronize()
+
+        timer('sim_steps', sim_steps, steps=args.sim_steps, vertices=len(garment.current_verts))
+        timer('sim_save', garment.save_frame)
+    if 'render' not in stages:
+        return
+
+    # Render
+    from pygarment.meshgen.render.pythonrender import render_images
+
+    render_props = props['render']['config']
+    timer('render', lambda: render_images(
+        paths, garment.v_body, garment.f_body, render_props, garm_mesh=garment.textured_mesh()))
+
+
+def stage_summary(records):
+    """Aggregated measurements per stage"""
+    summary = {}
+    for stage in dict.fromkeys(r['stage'] for r in records):  # Keeping stage order
+        stage_records = [r for r in records if r['stage'] == stage and 'error' not in r]
+        if not stage_records:
+            continue
+        times = np.array([r['wall_time'] for r in stage_records])
+        summary[stage] = {
+            'runs': len(stage_records),
+            'wall_time_mean': float(times.mean()),
+            'wall_time_median': float(np.median(times)),
+            'wall_time_min': float(times.min()),
+            'wall_time_max': float(times.max()),
+            'peak_rss_mb_max': max(r['peak_rss_mb'] for r in stage_records),
+            'rss_increase_mb_max': max(r['rss_increase_mb'] for r in stage_records),
+        }
+    return summary
+
+
+def system_info(args):
+    """Description of the machine and the benchmark setup"""
+    from importlib.metadata import version, PackageNotFoundError
+
+    packages = {}
+    for package in ['numpy', 'scipy', 'svgpathtools', 'libigl', 'cgal', 'warp-lang', 'pyrender', 'trimesh']:
+        try:
+            packages[package] = version(package)
+        except PackageNotFoundError:
+            packages[package] = None
+
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'python': platform.python_version(),
+        'cpu_count_logical': psutil.cpu_count(logical=True),
+        'cpu_count_physical': psutil.cpu_count(logical=False),
+        'total_memory_gb': psutil.virtual_memory().total / 2**30,
+        'packages': packages,
+        'args': vars(args)
+    }
+
+
+if __name__ == '__main__':
+
+    args = get_command_args()
+
+    sys_props = Properties('./system.json')
+    bodies_path = Path(sys_props['bodies_default_path'])
+    props = Properties(args.sim_config)
+
+    out_path = Path(args.output) if args.output else Path(sys_props['output']) / f'benchmark_{datetime.now().strftime("%y%m%d-%H-%M-%S")}'
+    out_path.mkdir(parents=True, exist_ok=True)
+
+    designs = {}
+    if args.designs:
+        for design_file in args.designs:
+            with open(design_file, 'r') as f:
+                designs[Path(design_file).stem] = yaml.safe_load(f)['design']
+    else:
+        for design_name, (design_file, meta) in BENCHMARK_DESIGNS.items():
+            with open(design_file, 'r') as f:
+                designs[design_name] = yaml.safe_load(f)['design']
+            for key, value in meta.items():
+                designs[design_name]['meta'][key]['v'] = value
+
+    records = []
+    for design_name, design in designs.items():
+        for body_name in args.bodies:
+            for rep in range(args.repeats):
+                name = f'{design_name}_{body_name}_{rep}'
+                print(f'\n------ {name} ------')
+                timer = StageTimer({'design': design_name, 'body': body_name, 'repeat': rep})
+                try:
+                    run_pipeline(timer, name, design, body_name, bodies_path, props, out_path, args)
+                except KeyboardInterrupt:
+                    raise
+                except BaseException:
+                    # Record the failure and continue with other cases
+                    traceback.print_exc()
+                records += timer.records
+
+    # Report
+    report = {
+        'system': system_info(args),
+        'summary': stage_summary(records),
+        'records': records
+    }
+    with open(out_path / 'benchmark.json', 'w') as f:
+        json.dump(report, f, indent=2)
+
+    if args.csv:
+        fields = list(dict.fromkeys(k for r in records for k in r))
+        with open(out_path / 'benchmark.csv', 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(records)
+
+    print('\n{:<28}{:>6}{:>14}{:>14}{:>16}'.format('Stage', 'Runs', 'Mean time, s', 'Min time, s', 'Peak RSS, MB'))
+    for stage, info in report['summary'].items():
+        print('{:<28}{:>6}{:>14.3f}{:>14.3f}{:>16.1f}'.format(
+            stage, info['runs'], info['wall_time_mean'], info['wall_time_min'], info['peak_rss_mb_max']))
+    num_errors = sum('error' in r for r in records)
+    if num_errors:
+        print(f'\nBenchmark::WARNING::{num_errors} stages failed, see the report')
+    print(f'\nBenchmark report saved to {out_path / "benchmark.json"}')
@@ -1,4 +1,5 @@
 from pathlib import Path
+import json
 import time
 import yaml
 import shutil 
@@ -19,6 +20,10 @@ from pygarment.meshgen.sim_config import PathCofig
 
 verbose = False
 
+# NOTE: Interactive editing re-evaluates garment programs with slightly different parameters:
+# re-use garment components unaffected by the parameter change
+pyg.enable_component_cache()
+
 def _id_generator(size=10, chars=string.ascii_uppercase + string.digits):
         """Generate a random string of a given size, see
         https://stackoverflow.com/questions/2257441/random-string-generation-with-upper-case-letters-and-digits
@@ -49,6 +54,12 @@ class GUIPattern:
         self.design_sampler = pyg.DesignSampler()
         self.sew_pattern = None
 
+        # Incremental updates
+        self._built_design_values = None   # Design & body values of the current sew_pattern
+        self._built_body_params = None
+        self._panel_intersections = {}   # panel geometry -> self-intersection check result
+        self._panel_svg_cache = {}    # panel name -> svg drawing
+
         self.body_file = None
         self.design_file = None
         self._load_body_file(
@@ -124,11 +135,69 @@ class GUIPattern:
         """Reload sewing pattern with current body and design parameters
         
             NOTE: loading a pattern might be lagging, execute only when needed!
+            NOTE: The update is incremental: only the garment components that
+                read the changed parameters are rebuilt (see pyg.enable_component_cache()),
+                and only the changed panels are checked and re-drawn
         """
+        design_values = self._design_values(self.design_params)
+        if self._is_up_to_date(design_values):
+            return
+
         self.sew_pattern = MetaGarment(
             'Configured_design', self.body_params, self.design_params)
-        self.is_self_intersecting = self.sew_pattern.is_self_intersecting()
-        self._view_serialize()
+        self._built_design_values = design_values
+        self._built_body_params = deepcopy(self.body_params.params)
+
+        pattern = self.sew_pattern.assembly()
+        self.is_self_intersecting = self._is_self_intersecting(pattern)
+        self._view_serialize(pattern)
+
+    @staticmethod
+    def _design_values(design, path=()):
+        """Flat {path: value} representation of design parameter values"""
+        values = {}
+        for key, param in design.items():
+            if 'v' in param:
+                values[path + (key, 'v')] = deepcopy(param['v'])
+            else:
+                values.update(GUIPattern._design_values(param, path + (key, )))
+        return values
+
+    def _is_up_to_date(self, design_values):
+        """Check if the current sewing pattern does not depend on the
+            parameters changed since it was built"""
+        if self.sew_pattern is None or self._built_design_values is None:
+            return False
+        if self.body_params.params != self._built_body_params:
+            return False
+
+        dependencies = pyg.design_dependencies(self.sew_pattern)
+        if dependencies is None:   # Unknown
+            return False
+        
+        built = self._built_design_values
+        changed = [p for p in design_values if p not in built or built[p] != design_values[p]]
+        changed += [p for p in built if p not in design_values]
+        for path in changed:
+            if any(path[:i] in dependencies for i in range(1, len(path) + 1)):
+                return False
+        return True
+
+    def _is_self_intersecting(self, pattern):
+        """Check the panels of the current sewing pattern for self-intersections,
+            re-using the results for panels that did not change"""
+        panels = {panel.name: panel for panel in self.sew_pattern._panels()}
+
+        results = {}
+        for name, panel in panels.items():
+            spec = pattern.pattern['panels'][name]
+            key = json.dumps([spec['vertices'], spec['edges']], default=str)
+            if key not in self._panel_intersections:
+                self._panel_intersections[key] = panel.is_self_intersecting()
+            results[key] = self._panel_intersections[key]
+        self._panel_intersections = results  # Keep only current panels
+
+        return any(results.values())
 
     @staticmethod
     def _nested_sync(s_from, s_to):
@@ -150,12 +219,13 @@ class GUIPattern:
                 # Use proper value assignment instead of deepcopy
                 self._nested_sync(self.design_params[k], self.design_params['left'][k])
 
-    def _view_serialize(self):
+    def _view_serialize(self, pattern=None):
         """Save a sewing pattern svg representation to tmp folder be used
         for display"""
 
         # Get the flat representation
-        pattern = self.sew_pattern.assembly()
+        if pattern is None:
+            pattern = self.sew_pattern.assembly()
 
         # Clear up the folder from previous version -- it's not needed any more
         self.clear_previous_svg()
@@ -165,7 +235,8 @@ class GUIPattern:
                                   with_text=False, 
                                   view_ids=False,
                                   flat=False,
-                                  margin=0
+                                  margin=0,
+                                  panel_cache=self._panel_svg_cache
             )
             dwg.save()
 
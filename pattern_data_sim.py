@@ -29,6 +29,10 @@ def get_command_args():
     parser.add_argument('--default_body', action='store_true', help='run dataset on default body')
     parser.add_argument('--caching', action='store_true', help='cache intermediate simulation')
     parser.add_argument('--rewrite_config', action='store_true', help='cache intermediate simulation')
+    parser.add_argument('--workers', '-w', help='number of parallel simulation processes. If > 1, uses supervised worker pool', type=int, default=1)
+    parser.add_argument('--sample_timeout', help='wall-clock limit (seconds) on processing one sample in the worker pool', type=int, default=None)
+    parser.add_argument('--retries', help='number of re-tries for samples that crashed the pool worker', type=int, default=1)
+    parser.add_argument('--journal', action='store_true', help='log per-sample progress to an append-only journal instead of re-writing dataset properties after every sample')
 
     args = parser.parse_args()
     print(args)
@@ -84,13 +88,28 @@ if __name__ == "__main__":
             re_write=command_args.rewrite_config)    # Re-write sim config only explicitly 
 
     # ----- Main loop ----------
-    finished = sim.batch_sim(
-        datapath, 
-        output_path, 
-        props,
-        run_default_body=command_args.default_body,
-        num_samples=command_args.minibatch,  # run in mini-batch if requested
-        caching=command_args.caching, force_restart=False)
+    if command_args.workers > 1:
+        # NOTE: crashes are handled by the worker pool, no need for external restarts
+        finished = sim.pool_batch_sim(
+            datapath, 
+            output_path, 
+            props,
+            run_default_body=command_args.default_body,
+            num_samples=command_args.minibatch,  # run in mini-batch if requested
+            caching=command_args.caching, force_restart=False,
+            workers=command_args.workers, 
+            max_sample_time=command_args.sample_timeout,
+            max_retries=command_args.retries,
+            journal=command_args.journal)
+    else:
+        finished = sim.batch_sim(
+            datapath, 
+            output_path, 
+            props,
+            run_default_body=command_args.default_body,
+            num_samples=command_args.minibatch,  # run in mini-batch if requested
+            caching=command_args.caching, force_restart=False,
+            journal=command_args.journal)
 
     # ----- Try and resim fails once -----
     if finished:
@@ -100,7 +119,9 @@ if __name__ == "__main__":
             output_path, 
             props,
             run_default_body=command_args.default_body,
-            caching=command_args.caching)
+            caching=command_args.caching, 
+            workers=command_args.workers,
+            journal=command_args.journal)
 
     props.add_sys_info()   # Save system information
     props.serialize(dataset_file)
@@ -7,6 +7,7 @@ dataset_name=my_dataset
 config=default_sim_props.yaml 
 sim_default_bodies=false
 batch_size=100
+workers=1  # > 1 runs a supervised pool of simulation processes that handles crashes internally
 
 # -- Main calls --
 ret_code=1
@@ -15,9 +16,9 @@ STARTTIME=$(date +%s)
 while [ $ret_code != 0 ]  # failed for any reason
 do
     if [ "$sim_default_bodies" = "true" ]; then
-        python ./pattern_data_sim.py --data $dataset_name --default_body --config $config -b $batch_size
+        python ./pattern_data_sim.py --data $dataset_name --default_body --config $config -b $batch_size -w $workers
     else
-        python ./pattern_data_sim.py --data $dataset_name --config $config -b $batch_size
+        python ./pattern_data_sim.py --data $dataset_name --config $config -b $batch_size -w $workers
     fi
 
     ret_code=$?
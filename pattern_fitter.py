@@ -14,6 +14,7 @@ import argparse
 from pygarment.data_config import Properties
 from assets.garment_programs.meta_garment import MetaGarment
 from assets.bodies.body_params import BodyParameters
+import pygarment as pyg
 
 def get_command_args():
     """command line arguments to control the run"""
@@ -78,14 +79,27 @@ def _gather_body_options(body_path: Path):
     return bodies
 
 
-def body_sample(idx, bodies: dict, path: Path, straight=True):
+def _load_body_table(body_path: Path):
+    """Measurements of all the bodies from 'measurements.csv' table, if available
+        (see pyg.BodyParametersTable)"""
+    table_path = body_path / 'measurements.csv'
+    if not table_path.exists():
+        return None
+    return pyg.BodyParametersTable.from_csv(table_path, BodyParameters)
+
+
+def body_sample(idx, bodies: dict, path: Path, straight=True, body_table=None):
 
     body_i = bodies[idx]
 
     mes_file = body_i['mes']
     obj_file = body_i['objs']['straight'] if straight else body_i['objs']['apart']
 
-    body = BodyParameters(path / mes_file)
+    b_name = Path(mes_file).stem
+    if body_table is not None and b_name in body_table:
+        body = body_table[b_name]
+    else:
+        body = BodyParameters(path / mes_file)
     body.params['body_sample'] = (path / obj_file).stem
 
     return body
@@ -126,6 +140,7 @@ def generate(path, properties, sys_paths, verbose=False):
     gen_stats = properties['generator']['stats']
     body_samples_path = Path(sys_paths['body_samples_path']) / properties['body_samples']
     body_options = _gather_body_options(body_samples_path)
+    body_table = _load_body_table(body_samples_path)
 
     # create data folder
     data_folder, default_path, body_sample_path = _create_data_folder(properties, path)
@@ -155,7 +170,8 @@ def generate(path, properties, sys_paths, verbose=False):
                 i + properties['body_sample_start_id'],
                 body_options,
                 body_samples_path,
-                straight='Pants' != design['meta']['bottom']['v'])
+                straight='Pants' != design['meta']['bottom']['v'],
+                body_table=body_table)
             name = rand_body.params['body_sample']
 
             piece_shaped = MetaGarment(name, rand_body, design) 
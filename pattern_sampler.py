@@ -12,6 +12,8 @@ import random
 import string
 import traceback
 import argparse
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 
 # Custom
 from pygarment.data_config import Properties
@@ -28,6 +30,8 @@ def get_command_args():
     parser.add_argument('--size', '-s', help='size of a sample', type=int, default=10)
     parser.add_argument('--name', '-n', help='Name of the dataset', type=str, default='data')
     parser.add_argument('--replicate', '-re', help='Name of the dataset to re-generate. If set, other arguments are ignored', type=str, default=None)
+    parser.add_argument('--workers', '-w', help='number of parallel processes for sample generation', type=int, default=1)
+    parser.add_argument('--journal', action='store_true', help='log per-sample stats to an append-only journal instead of re-writing dataset properties after every sample')
     
     args = parser.parse_args()
     print('Commandline arguments: ', args)
@@ -86,7 +90,15 @@ def _id_generator(size=10, chars=string.ascii_uppercase + string.digits):
         """
         return ''.join(random.choices(chars, k=size))
 
-def body_sample(bodies: dict, path: Path, straight=True):
+def load_body_table(body_path: Path):
+    """Measurements of all the bodies from 'measurements.csv' table, if available
+        (see pyg.BodyParametersTable)"""
+    table_path = body_path / 'measurements.csv'
+    if not table_path.exists():
+        return None
+    return pyg.BodyParametersTable.from_csv(table_path, BodyParameters)
+
+def body_sample(bodies: dict, path: Path, straight=True, body_table=None):
 
     rand_name = random.sample(list(bodies.keys()), k=1)
     body_i = bodies[rand_name[0]]
@@ -94,7 +106,10 @@ def body_sample(bodies: dict, path: Path, straight=True):
     mes_file = body_i['mes']
     obj_file = body_i['objs']['straight'] if straight else body_i['objs']['apart']
 
-    body = BodyParameters(path / mes_file)
+    if body_table is not None and rand_name[0] in body_table:
+        body = body_table[rand_name[0]]
+    else:
+        body = BodyParameters(path / mes_file)
     body.params['body_sample'] = (path / obj_file).stem
 
     return body
@@ -185,18 +200,158 @@ def assert_param_combinations(design, filter_belts=True):
 
 
 # Generation loop
-def generate(path, properties, sys_paths, verbose=False):
+def _sample_seed(global_seed, idx):
+    """Deterministic random seed of a sample in the dataset.
+        Depends only on the global seed and the sample index, s.t. 
+        the samples are the same regardless of the generation order 
+        (or the number of parallel workers)
+    """
+    # NOTE: str seeds are hashed with sha512 -- reproducible across processes
+    return f'{global_seed}_{idx}'
+
+def _new_sample_stats():
+    """Empty container for the stats of a single sample"""
+    return {
+        'generator': {
+            'stats': dict(
+                panel_count={},
+                garment_types={},
+                garment_types_summary=dict(main={}, style={})
+            )
+        }
+    }
+
+def _merge_sample_stats(properties, sample_stats):
+    """Add the stats of a single sample to the dataset generation stats"""
+    sample_stats = sample_stats['generator']['stats']
+    properties.record('update', ['generator', 'stats', 'panel_count'], sample_stats['panel_count'])
+    properties.record('update', ['generator', 'stats', 'garment_types'], sample_stats['garment_types'])
+    properties.record(
+        'increment', ['generator', 'stats', 'garment_types_summary'], 
+        sample_stats['garment_types_summary'])
+
+# Measurements table of the body samples, if available (see _set_body_table())
+_body_table = None
+
+def _set_body_table(body_table):
+    """Share the body measurements table with the sample generation.
+        NOTE: Used as initializer of the worker processes, s.t. the table is 
+        passed to every worker once rather than with every sample
+    """
+    global _body_table
+    _body_table = body_table
+
+def _generate_sample(
+        idx, seed, sampler, default_body, def_obj_base, 
+        body_options, body_samples_path, 
+        default_sample_data, body_sample_data,
+        verbose=False):
+    """Generate a single sample of the dataset: 
+        a random design fitted to the default and a random body shape
+
+        Returns the name of the saved sample and its stats (or None, None if
+            the generation did not succeed)
+    """
+    random.seed(_sample_seed(seed, idx))
+
+    # Redo sampling untill success
+    for _ in range(100):  # Putting a limit on re-tries to avoid infinite loops
+        # NOTE: Designs violating the declared constraints are rejected by the sampler
+        # before any garment is built
+        new_design = sampler.randomize()
+        name = f'rand_{_id_generator()}'
+        try:
+            if verbose:
+                print(f'{name} saving design params for debug')
+                with open(Path('./Logs') / f'{name}_design_params.yaml', 'w') as f:
+                    yaml.dump(
+                        {'design': new_design}, 
+                        f,
+                        default_flow_style=False,
+                        sort_keys=False
+                    )
+
+            # Preliminary checks 
+            assert_param_combinations(new_design)
+
+            # On default body
+            piece_default = MetaGarment(name, default_body, new_design) 
+            piece_default.assert_total_length()  # Check final length correctnesss
+
+            # Straight/apart legs pose
+            def_obj_name = def_obj_base
+            if has_pants(new_design):
+                def_obj_name += '_apart'
+            default_body.params['body_sample'] = def_obj_name
+
+            # On random body shape
+            rand_body = body_sample(
+                body_options,
+                body_samples_path,
+                straight=not has_pants(new_design),
+                body_table=_body_table)
+
+            # NOTE: Early exit on the invalid design before building the shaped version
+            if piece_default.is_self_intersecting():
+                if verbose:
+                    print(f'{piece_default.name} is self-intersecting!!') 
+                continue  # Redo the randomization
+
+            piece_shaped = MetaGarment(name, rand_body, new_design) 
+            piece_shaped.assert_total_length()   # Check final length correctness
+            
+            if piece_shaped.is_self_intersecting():
+                if verbose:
+                    print(f'{piece_default.name} is self-intersecting!!') 
+                continue  # Redo the randomization
+            
+            # Save samples
+            pattern = _save_sample(piece_default, default_body, new_design, default_sample_data, verbose=verbose)
+            _save_sample(piece_shaped, rand_body, new_design, body_sample_data, verbose=verbose)
+            
+            sample_stats = _new_sample_stats()
+            stats_utils.count_panels(pattern, sample_stats)
+            stats_utils.garment_type(name, new_design, sample_stats)
+
+            return name, sample_stats
+        except KeyboardInterrupt:  # Propagate to the generation loop
+            raise
+        except BaseException as e:
+            print(f'{name} failed')
+            if verbose:
+                traceback.print_exc()
+            print(e)
+
+            # Check empty folder
+            if (default_sample_data / name).exists():
+                print('Generate::Info::Removed empty folder after unsuccessful sampling attempt', default_sample_data / name)
+                shutil.rmtree(default_sample_data / name, ignore_errors=True)
+            
+            if (body_sample_data / name).exists():
+                print('Generate::Info::Removed empty folder after unsuccessful sampling attempt', body_sample_data / name)
+                shutil.rmtree(body_sample_data / name, ignore_errors=True)
+
+            continue
+
+    return None, None
+
+def generate(path, properties, sys_paths, workers=1, journal=False, verbose=False):
     """Generates a synthetic dataset of patterns with given properties
         Params:
             path : path to folder to put a new dataset into
             props : an instance of DatasetProperties class
                     requested properties of the dataset
+            workers : number of parallel processes to generate samples with.
+                    The resulting dataset does not depend on the number of workers
+            journal : log the stats of every sample to an append-only journal 
+                    instead of re-writing the dataset properties file (see Properties.start_journal())
     """
     path = Path(path)
     gen_config = properties['generator']['config']
     gen_stats = properties['generator']['stats']
     body_samples_path = Path(sys_paths['body_samples_path']) / properties['body_samples']
     body_options = gather_body_options(body_samples_path)
+    body_table = load_body_table(body_samples_path)
 
     # create data folder
     data_folder, default_path, body_sample_path = _create_data_folder(properties, path)
@@ -207,96 +362,62 @@ def generate(path, properties, sys_paths, verbose=False):
     if 'random_seed' not in gen_config or gen_config['random_seed'] is None:
         gen_config['random_seed'] = int(time.time())
     print(f'Random seed is {gen_config["random_seed"]}')
-    random.seed(gen_config['random_seed'])
+
+    if journal:
+        properties.start_journal(data_folder / 'dataset_properties.yaml')
+        properties.serialize(data_folder / 'dataset_properties.yaml')
 
     # generate data
     start_time = time.time()
 
     default_body = BodyParameters(Path(sys_paths['bodies_default_path']) / (properties['body_default'] + '.yaml'))
     sampler = pyg.DesignSampler(properties['design_file'])
-    for i in range(properties['size']):
-        # log properties every time
-        properties.serialize(data_folder / 'dataset_properties.yaml')
-
-        # Redo sampling untill success
-        for _ in range(100):  # Putting a limit on re-tries to avoid infinite loops
-            new_design = sampler.randomize()
-            name = f'rand_{_id_generator()}'
-            try:
-                if verbose:
-                    print(f'{name} saving design params for debug')
-                    with open(Path('./Logs') / f'{name}_design_params.yaml', 'w') as f:
-                        yaml.dump(
-                            {'design': new_design}, 
-                            f,
-                            default_flow_style=False,
-                            sort_keys=False
-                        )
-
-                # Preliminary checks 
-                assert_param_combinations(new_design)
-
-                # On default body
-                piece_default = MetaGarment(name, default_body, new_design) 
-                piece_default.assert_total_length()  # Check final length correctnesss
-
-                # Straight/apart legs pose
-                def_obj_name = properties['body_default']
-                if has_pants(new_design):
-                    def_obj_name += '_apart'
-                default_body.params['body_sample'] = def_obj_name
-
-                # On random body shape
-                rand_body = body_sample(
-                    body_options,
-                    body_samples_path,
-                    straight=not has_pants(new_design))
-                piece_shaped = MetaGarment(name, rand_body, new_design) 
-                piece_shaped.assert_total_length()   # Check final length correctness
-                
-                if piece_default.is_self_intersecting() or piece_shaped.is_self_intersecting():
-                    if verbose:
-                        print(f'{piece_default.name} is self-intersecting!!') 
-                    continue  # Redo the randomization
-                
-                # Save samples
-                pattern = _save_sample(piece_default, default_body, new_design, default_sample_data, verbose=verbose)
-                _save_sample(piece_shaped, rand_body, new_design, body_sample_data, verbose=verbose)
-                
-                stats_utils.count_panels(pattern, props)
-                stats_utils.garment_type(name, new_design, props)
-
-                break  # Stop generation
-            except KeyboardInterrupt:  # Return immediately with whatever is ready
-                return default_path, body_sample_path
-            except BaseException as e:
-                print(f'{name} failed')
-                if verbose:
-                    traceback.print_exc()
-                print(e)
-
-                # Check empty folder
-                if (default_sample_data / name).exists():
-                    print('Generate::Info::Removed empty folder after unsuccessful sampling attempt', default_sample_data / name)
-                    shutil.rmtree(default_sample_data / name, ignore_errors=True)
-                
-                if (body_sample_data / name).exists():
-                    print('Generate::Info::Removed empty folder after unsuccessful sampling attempt', body_sample_data / name)
-                    shutil.rmtree(body_sample_data / name, ignore_errors=True)
-
-                continue
+    gen_sample = partial(
+        _generate_sample,
+        seed=gen_config['random_seed'], 
+        sampler=sampler, 
+        default_body=default_body, 
+        def_obj_base=properties['body_default'],
+        body_options=body_options, 
+        body_samples_path=body_samples_path,
+        default_sample_data=default_sample_data, 
+        body_sample_data=body_sample_data,
+        verbose=verbose
+    )
+
+    _set_body_table(body_table)
+    pool = (ProcessPoolExecutor(max_workers=workers, initializer=_set_body_table, initargs=(body_table, )) 
+            if workers > 1 else None)
+    try:
+        # NOTE: results are collected in the order of sample ids, 
+        # hence the stats are merged in the same order for any number of workers
+        samples = (pool.map(gen_sample, range(properties['size'])) if pool is not None
+                   else map(gen_sample, range(properties['size'])))
+        for _, sample_stats in samples:
+            if sample_stats is not None:
+                _merge_sample_stats(properties, sample_stats)
+            # log properties every time
+            if not journal:
+                properties.serialize(data_folder / 'dataset_properties.yaml')
+    except KeyboardInterrupt:  # Return immediately with whatever is ready
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        return default_path, body_sample_path
+    finally:
+        if pool is not None:
+            pool.shutdown()
 
     elapsed = time.time() - start_time
     gen_stats['generation_time'] = f'{elapsed:.3f} s'
 
     # log properties
-    props.stats_summary()
+    properties.stats_summary()
     properties.serialize(data_folder / 'dataset_properties.yaml')
+    properties.stop_journal()
 
     return default_path, body_sample_path
 
 
-
 if __name__ == '__main__':
 
     system_props = Properties('./system.json')
@@ -327,7 +448,8 @@ if __name__ == '__main__':
 
     # Generator
     default_path, body_sample_path = generate(
-        system_props['datasets_path'], props, system_props, verbose=False)
+        system_props['datasets_path'], props, system_props, 
+        workers=args.workers, journal=args.journal, verbose=False)
 
     # Gather the pattern images separately
     gather_visuals(default_path)
@@ -18,8 +18,14 @@ from pygarment.garmentcode.edge_factory import CurveEdgeFactory
 import pygarment.garmentcode.operators as ops
 import pygarment.garmentcode.utils as utils
 
+# Memoization of components
+from pygarment.garmentcode.component_cache import enable_component_cache, disable_component_cache
+from pygarment.garmentcode.component_cache import component_cache, design_dependencies
+
 # Parameter support
-from pygarment.garmentcode.params import BodyParametrizationBase, DesignSampler
+from pygarment.garmentcode.params import BodyParametrizationBase, BodyParametersTable
+from pygarment.garmentcode.params import DesignSampler, DesignConstraint
+from pygarment.garmentcode.params import copy_design, CopyOnWriteDict
 
 # Errors
 from pygarment.pattern.core import EmptyPatternError
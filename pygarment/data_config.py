@@ -4,6 +4,7 @@
 
 from datetime import timedelta
 import json
+import os
 import yaml
 from numbers import Number
 import traceback
@@ -43,14 +44,25 @@ class Properties():
         Provides shortcuts for batch-init configurations
 
         One of the usages -- store system-dependent basic cofiguration
+
+        Journal mode (see start_journal()) allows frequent updates (e.g. per-sample stats
+        of large datasets) without re-writing the whole properties file every time
     """
     def __init__(self, filename="", clean_stats=False):
         self.properties = {}
         self.properties_on_load = {}
 
+        # Journal mode
+        self.journal_file = None
+        self._journal = None
+        self._replayed = set()   # Journals already applied to the properties
+        self._index = {}   # Membership index of lists: path -> (list, length, set of values)
+
         if filename:
             self.properties = self._from_file(filename)
             self.properties_on_load = self._from_file(filename)
+            # Updates logged after the last full save of the file
+            self._replay_journal(filename)
             if clean_stats:  # only makes sense when initialized from file =) 
                 self.clean_stats(self.properties)
 
@@ -63,22 +75,39 @@ class Properties():
         """Log current props to file. If logging failed, at least restore
         provided backup or originally loaded props
             * backup is expected to be a Properties object
+
+            The file is replaced atomically: an interrupted write does not corrupt
+            the previous version. If the file has a journal, it is compacted
+            into the file (see start_journal())
         """
         try:
             extention = Path(filename).suffix.lower()
+            self._drop_interrupted_compaction(filename)
+            tmp_filename = self._tmp_path(filename)
             if extention == '.json':
-                with open(filename, 'w') as f_json:
+                with open(tmp_filename, 'w') as f_json:
                     json.dump(self.properties, f_json, indent=2, sort_keys=True)
+                    self._sync(f_json)
             elif extention == '.yaml':
-                with open(filename, 'w') as f:
+                with open(tmp_filename, 'w') as f:
                     yaml.dump(
                         self.properties, 
                         f,
                         default_flow_style=False,
                         sort_keys=False
                     )
+                    self._sync(f)
             else:
                 raise ValueError(f'{self.__class__.__name__}::ERROR::Unsupported file type on serialization: {extention}')
+
+            # NOTE: The marker tells whether the journal records are already included in the file 
+            # in case of interruption between the file replacement and cleaning of the journal
+            journal_file = self.journal_path(filename)
+            if journal_file.exists():
+                self._write_journal_record(journal_file, {'op': 'compacted'})
+            os.replace(tmp_filename, filename)
+            if journal_file.exists():
+                self._clear_journal(journal_file)
             
         except Exception as e:
             print('Exception occured while saving properties:')
@@ -109,6 +138,73 @@ class Properties():
         # merge
         self._recursive_dict_update(self.properties, new_props, re_write, adding_tag)
 
+    # ---- Journal ----
+    # In journal mode, updates made with record() are appended to a line-oriented log 
+    # next to the properties file (one JSON record per line) instead of re-writing 
+    # the whole file. The log is replayed when the properties are loaded from the file, 
+    # and compacted into the file on serialize()
+
+    @staticmethod
+    def journal_path(filename):
+        """Path to the journal of a given properties file"""
+        return Path(str(filename) + '.journal')
+
+    def start_journal(self, filename):
+        """Start logging updates made by record() to the journal of the properties file.
+            The records of already existing journal are applied to the current properties,
+            unless the properties were loaded from the same file
+        """
+        journal_file = self.journal_path(filename)
+        if self.journal_file == journal_file:
+            return
+        self.stop_journal()
+
+        self._replay_journal(filename)
+        self._drop_incomplete_record(journal_file)
+        self._drop_interrupted_compaction(filename)
+        self.journal_file = journal_file
+        self._journal = open(journal_file, 'a')
+
+    def stop_journal(self):
+        """Stop logging updates to the journal. The journal is kept until the next serialize()"""
+        if self._journal is not None:
+            self._journal.close()
+            if self.journal_file.exists() and self.journal_file.stat().st_size == 0:
+                self.journal_file.unlink()  # Nothing to keep
+        self._journal = None
+        self.journal_file = None
+
+    def record(self, op, path, value=None):
+        """Update a nested property and log the update to the journal (if started)
+            * op -- operation:
+                * 'set' -- set the property to the value
+                * 'delete' -- delete the property
+                * 'append' -- append value to the list
+                * 'pop' -- remove the last element of the list
+                * 'remove' -- remove value from the list
+                * 'update' -- update the dictionary with the values of the value dictionary
+                * 'increment' -- add the numbers of the value dictionary to the numbers of 
+                    the property dictionary (recursively)
+            * path -- list of keys to the property. The missing containers on the way are created
+        """
+        self._apply_record(op, path, value)
+        if self._journal is not None:
+            self._journal.write(json.dumps(
+                {'op': op, 'path': list(path), 'value': value}, default=self._json_default) + '\n')
+            self._sync(self._journal)
+
+    def contains(self, path, value):
+        """Check if the list property contains the value. 
+            Constant time for repeated checks of the lists updated with record()
+        """
+        container = self._get_path(path)
+        if container is None:
+            return False
+        try:
+            return value in self._list_index(path, container)
+        except TypeError:   # Unhashable
+            return value in container
+
     # --- Specialised utils (require domain knowledge) --
 
     def is_fail(self, dataname):
@@ -183,13 +279,7 @@ class Properties():
     def add_fail(self, section_name, fail_type, info):
         """Write a failure case to a requested section's stats"""
 
-        section = self.properties[section_name]
-        if 'fails' not in section['stats']:
-            section['stats']['fails'] = {}
-        try:
-            section['stats']['fails'][fail_type].append(info)
-        except KeyError:
-            section['stats']['fails'][fail_type] = [info]
+        self.record('append', [section_name, 'stats', 'fails', fail_type], info)
             
 
     # ---------- Properties updates ---------------
@@ -338,6 +428,168 @@ class Properties():
                   'requested, but not all sections were updated')
 
     # ---- Private utils ----
+    @staticmethod
+    def _tmp_path(filename):
+        return Path(str(filename) + '.tmp')
+
+    @staticmethod
+    def _json_default(obj):
+        """Numpy values in journal records"""
+        if isinstance(obj, (np.generic, np.ndarray)):
+            return obj.tolist()
+        raise TypeError(f'Object of type {obj.__class__.__name__} is not JSON serializable')
+
+    @staticmethod
+    def _sync(file):
+        """Make sure the file content reaches the disk"""
+        file.flush()
+        os.fsync(file.fileno())
+
+    def _write_journal_record(self, journal_file, record):
+        if self.journal_file == journal_file and self._journal is not None:
+            journal = self._journal
+            journal.write(json.dumps(record) + '\n')
+            self._sync(journal)
+        else:
+            with open(journal_file, 'a') as journal:
+                journal.write(json.dumps(record) + '\n')
+                self._sync(journal)
+
+    def _drop_incomplete_record(self, journal_file):
+        """Remove the last record interrupted while writing s.t. the new records can be appended"""
+        if not journal_file.exists():
+            return
+        with open(journal_file, 'rb+') as f:
+            content = f.read()
+            if content and not content.endswith(b'\n'):
+                f.seek(content.rfind(b'\n') + 1)
+                f.truncate()
+                self._sync(f)
+
+    def _drop_interrupted_compaction(self, filename):
+        """Remove the traces of the serialization interrupted before replacing the file
+            (the marker of the journal and the tmp file), s.t. the records appended 
+            afterwards are not confused with the ones already included in the file
+        """
+        tmp_file = self._tmp_path(filename)
+        if not tmp_file.exists():
+            return
+        journal_file = self.journal_path(filename)
+        if journal_file.exists():
+            with open(journal_file, 'rb+') as f:
+                content = f.read()
+                last_start = content.rstrip(b'\n').rfind(b'\n') + 1
+                if content and json.loads(content[last_start:])['op'] == 'compacted':
+                    f.seek(last_start)
+                    f.truncate()
+                    self._sync(f)
+        tmp_file.unlink()
+
+    def _clear_journal(self, journal_file):
+        if self.journal_file == journal_file and self._journal is not None:
+            self._journal.seek(0)
+            self._journal.truncate()
+            self._sync(self._journal)
+        else:
+            journal_file.unlink()
+
+    def _replay_journal(self, filename):
+        """Apply the records of the journal of the properties file"""
+        journal_file = self.journal_path(filename)
+        if journal_file in self._replayed or not journal_file.exists():
+            return
+        self._replayed.add(journal_file)
+
+        with open(journal_file, 'r') as f:
+            lines = [line for line in f.read().split('\n') if line.strip()]
+        records = []
+        for i, line in enumerate(lines):
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                if i == len(lines) - 1:
+                    # Interrupted while writing the last record
+                    print(f'{self.__class__.__name__}::WARNING::Skipped incomplete last record of {journal_file}')
+                else:
+                    raise ValueError(f'{self.__class__.__name__}::ERROR::Corrupted journal record {i} in {journal_file}')
+
+        # The file contains the records up to the last marker of a completed compaction
+        compacted = [i for i, r in enumerate(records) if r['op'] == 'compacted']
+        if (compacted and compacted[-1] == len(records) - 1 
+                and self._tmp_path(filename).exists()):
+            # Serialization interrupted after writing the marker: 
+            # the file was not replaced (see serialize())
+            # NOTE: The tmp file is kept as an indicator until start_journal() or serialize()
+            compacted.pop()
+        if compacted:
+            records = records[compacted[-1] + 1:]
+
+        for r in records:
+            if r['op'] != 'compacted':
+                self._apply_record(r['op'], r['path'], r['value'])
+
+    def _get_path(self, path):
+        """Nested property or None if not found"""
+        value = self.properties
+        for key in path:
+            if not isinstance(value, dict) or key not in value:
+                return None
+            value = value[key]
+        return value
+
+    def _list_index(self, path, container):
+        """Set of values of the list property"""
+        key = tuple(path)
+        index = self._index.get(key)
+        if index is None or index[0] is not container or index[1] != len(container):
+            # Rebuild if the list was updated outside of record()
+            index = (container, len(container), set(container))
+            self._index[key] = index
+        return index[2]
+
+    def _apply_record(self, op, path, value):
+        *path_to, key = path
+        parent = self.properties
+        for k in path_to:
+            parent = parent.setdefault(k, {})
+
+        if op == 'set':
+            parent[key] = value
+        elif op == 'delete':
+            parent.pop(key, None)
+        elif op in ['append', 'pop', 'remove']:
+            container = parent.setdefault(key, [])
+            index = self._index.get(tuple(path))
+            if op == 'append':
+                container.append(value)
+            elif op == 'pop':
+                container.pop()
+            else:
+                container.remove(value)
+            if index is not None and index[0] is container:
+                if op == 'append' and index[1] + 1 == len(container):
+                    try:
+                        index[2].add(value)
+                        self._index[tuple(path)] = (container, len(container), index[2])
+                    except TypeError:
+                        del self._index[tuple(path)]
+                else:  # Removed value might have duplicates
+                    del self._index[tuple(path)]
+        elif op == 'update':
+            parent.setdefault(key, {}).update(value)
+        elif op == 'increment':
+            self._increment(parent.setdefault(key, {}), value)
+        else:
+            raise ValueError(f'{self.__class__.__name__}::ERROR::Unknown record operation: {op}')
+
+    def _increment(self, in_dict, new_dict):
+        """Recursively add the numbers of new_dict to in_dict"""
+        for key, value in new_dict.items():
+            if isinstance(value, dict):
+                self._increment(in_dict.setdefault(key, {}), value)
+            else:
+                in_dict[key] = in_dict.get(key, 0) + value
+
     def _from_file(self, filename):
         """ Load properties from previously created file """
         extention = Path(filename).suffix.lower()
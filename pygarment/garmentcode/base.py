@@ -1,7 +1,10 @@
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from copy import deepcopy
 import numpy as np
 
 from pygarment.garmentcode.connector import Stitches
+from pygarment.garmentcode.utils import structural_copy
 
 
 class BaseComponent(ABC):
@@ -22,6 +25,19 @@ class BaseComponent(ABC):
         # Rules for connecting subcomponents
         self.stitching_rules = Stitches()
 
+    # Copies
+    # NOTE: Subclasses list the rules for their attributes that don't need
+    # a generic deepcopy (see utils.structural_copy())
+    _copy_rules = {}
+
+    def __deepcopy__(self, memo):
+        return structural_copy(self, memo, self._copy_rules)
+
+    def copy(self):
+        """Create a copy of the component with its own edges,
+            interfaces and stitches"""
+        return deepcopy(self)
+
     # Info
     def pivot_3D(self):
         """Pivot location of a component in 3D"""
@@ -61,6 +77,30 @@ class BaseComponent(ABC):
     def assembly(self, *args, **kwargs):
         pass
 
+    def _panels(self):
+        """All panels of the component"""
+        return []
+
+    @contextmanager
+    def deferred_placement(self):
+        """Group a sequence of placement operations s.t. the right/wrong side
+            orientation of the panels (Panel.autonorm()) is updated once
+            for the final placement on exit, and not after every operation
+
+            NOTE: Panel orientation (and Panel.norm()) is not updated inside the context
+        """
+        panels = self._panels()
+        for panel in panels:
+            panel._placement_depth += 1
+        try:
+            yield self
+        finally:
+            for panel in panels:
+                panel._placement_depth -= 1
+                if not panel._placement_depth and panel._autonorm_pending:
+                    panel._autonorm_pending = False
+                    panel.autonorm()
+
     # ----- Placement routines: these are the same for panels and components
     def place_below(self, comp, gap=2):
         """Place below the provided component"""
@@ -2,25 +2,79 @@ import numpy as np
 from scipy.spatial.transform import Rotation as R
 
 from pygarment.garmentcode.base import BaseComponent
+from pygarment.garmentcode.component_cache import CachedComponentMeta
 from pygarment.pattern.wrappers import VisPattern
 
 
-class Component(BaseComponent):
+class _SubcomponentList(list):
+    """List of subcomponents (Component.subs) that reports its modifications
+        to the cache of component tree traversals"""
+
+
+def _tracked(method):
+    def modifier(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        Component._tree_version += 1
+        return result
+    return modifier
+
+
+for _name in ['append', 'extend', 'insert', 'remove', 'pop', 'clear', 'sort', 'reverse',
+              '__setitem__', '__delitem__', '__iadd__', '__imul__']:
+    setattr(_SubcomponentList, _name, _tracked(getattr(list, _name)))
+
+
+class Component(BaseComponent, metaclass=CachedComponentMeta):
     """Garment element (or whole piece) composed of simpler connected garment
     elements"""
 
-    # TODOLOW Overload copy -- respecting edge sequences -- never had any problems though
+    # Allow memoization of the component construction when the component cache
+    # is enabled (see component_cache.py). Set to False in subclasses with
+    # side effects outside of the returned component
+    cacheable = True
+
+    # Incremented on every change of the structure of any component tree
+    # (see _panels())
+    _tree_version = 0
 
     def __init__(self, name) -> None:
         super().__init__(name)
 
         self.subs = []  # list of generative subcomponents
+        self._panels_cache = None
+
+    def __setattr__(self, name, value):
+        """Keep the registry of subcomponents assigned as attributes"""
+        if name == 'subs' and not isinstance(value, _SubcomponentList):
+            value = _SubcomponentList(value)
+        super().__setattr__(name, value)
+
+        # NOTE: attributes can be assigned before Component.__init__()
+        registry = self.__dict__.setdefault('_sub_attrs', {})
+        if isinstance(value, BaseComponent):
+            registry[name] = None
+            Component._tree_version += 1
+        elif name in registry or name == 'subs':
+            registry.pop(name, None)
+            Component._tree_version += 1
+
+    def __delattr__(self, name):
+        super().__delattr__(name)
+        if name in self._sub_attrs:
+            del self._sub_attrs[name]
+            Component._tree_version += 1
 
     def set_panel_label(self, label: str, overwrite=True):
         """Propagate given label to all sub-panels (in subcomponents)"""
-        subs = self._get_subcomponents()
-        for sub in subs: 
-            sub.set_panel_label(label, overwrite)
+        for panel in self._panels(): 
+            panel.set_panel_label(label, overwrite)
+
+    def _panels(self):
+        """All panels of the component tree, in the order of traversal"""
+        if self._panels_cache is None or self._panels_cache[0] != Component._tree_version:
+            panels = [panel for sub in self._get_subcomponents() for panel in sub._panels()]
+            self._panels_cache = (Component._tree_version, panels)
+        return list(self._panels_cache[1])
 
     def pivot_3D(self):
         """Pivot of a component as a block
@@ -43,27 +97,29 @@ class Component(BaseComponent):
 
     def translate_by(self, delta_vector):
         """Translate component by a vector"""
-        for subs in self._get_subcomponents():
-            subs.translate_by(delta_vector)
+        for panel in self._panels():
+            panel.translate_by(delta_vector)
         return self
     
     def translate_to(self, new_translation):
         """Set panel translation to be exactly that vector"""
         pivot = self.pivot_3D()
-        for subs in self._get_subcomponents():
-            sub_pivot = subs.pivot_3D()
-            subs.translate_to(np.asarray(new_translation) + (sub_pivot - pivot))
+        with self.deferred_placement():
+            for subs in self._get_subcomponents():
+                sub_pivot = subs.pivot_3D()
+                subs.translate_to(np.asarray(new_translation) + (sub_pivot - pivot))
         return self
 
     def rotate_by(self, delta_rotation: R):
         """Rotate component by a given rotation"""
         pivot = self.pivot_3D()
-        for subs in self._get_subcomponents():
-            # With preserving relationships between components
-            rel = subs.pivot_3D() - pivot
-            rel_rotated = delta_rotation.apply(rel) 
-            subs.rotate_by(delta_rotation)
-            subs.translate_by(rel_rotated - rel)
+        with self.deferred_placement():
+            for subs in self._get_subcomponents():
+                # With preserving relationships between components
+                rel = subs.pivot_3D() - pivot
+                rel_rotated = delta_rotation.apply(rel) 
+                subs.rotate_by(delta_rotation)
+                subs.translate_by(rel_rotated - rel)
         return self
     
     def rotate_to(self, new_rot):
@@ -79,8 +135,9 @@ class Component(BaseComponent):
         
             Axis specifies 2D axis to swap around: Y axis by default
         """
-        for subs in self._get_subcomponents():
-            subs.mirror(axis)
+        with self.deferred_placement():
+            for subs in self._get_subcomponents():
+                subs.mirror(axis)
         return self
 
     def assembly(self):
@@ -113,10 +170,9 @@ class Component(BaseComponent):
     def bbox3D(self):
         """Evaluate 3D bounding box of the current component"""
         
-        subs = self._get_subcomponents()
-        bboxes = [s.bbox3D() for s in subs]
+        bboxes = [panel.bbox3D() for panel in self._panels()]
 
-        if not len(subs):
+        if not len(bboxes):
             # Special components without panel geometry -- no bbox defined
             return np.array([[np.inf, np.inf, np.inf], [-np.inf, -np.inf, -np.inf]])
 
@@ -128,20 +184,16 @@ class Component(BaseComponent):
     def is_self_intersecting(self):
         """Check whether the component have self-intersections on panel level"""
 
-        for s in self._get_subcomponents():
-            if s.is_self_intersecting():
+        for panel in self._panels():
+            if panel.is_self_intersecting():
                 return True
         return False
 
     # Subcomponents
     def _get_subcomponents(self):
-        """Unique set of subcomponents defined in the `self.subs` list or as
-        attributes of the object"""
-
-        all_attrs = [getattr(self, name)
-                     for name in dir(self)
-                     if name[:2] != '__' and name[-2:] != '__']
-        return list(set([att
-                         for att in all_attrs
-                         if isinstance(att, BaseComponent)] + self.subs))
+        """Unique list of subcomponents defined as attributes of the object
+        (in the order of assignment) or in the `self.subs` list"""
+
+        subs = [getattr(self, name) for name in self._sub_attrs] + self.subs
+        return list(dict.fromkeys(subs))
 
@@ -0,0 +1,345 @@
+"""Opt-in memoization of garment components
+
+    When enabled, construction of Component subclasses is cached on
+    * the component class and the simple (hashable) constructor arguments,
+    * the body parameters (the 'body' constructor argument),
+    * the values of the design parameters that the component has actually read
+        during construction (the 'design' constructor argument).
+
+    The reads are recorded by wrapping the design parameters dictionary into
+    a tracking view while the component is constructed. Cached components
+    are returned as (deep) copies.
+
+    NOTE: The components that modify the incoming design parameters in-place,
+    receive non-hashable arguments other than body and design (e.g. edges),
+    or don't have the 'design' argument are not cached, but their reads
+    are still accounted for in the cached parent components
+"""
+
+from abc import ABCMeta
+from collections import OrderedDict
+from collections.abc import Mapping, MutableMapping
+from copy import deepcopy, copy
+import inspect
+import itertools
+import weakref
+
+import numpy as np
+
+_MISSING = object()
+_NODE = object()   # Marks reads of nested dictionaries
+
+
+class _DesignRoot:
+    """Underlying design parameters dictionary (or its copy) of a tracking view"""
+    _serials = itertools.count()
+
+    def __init__(self, data, lineage=None) -> None:
+        self.data = data
+        self.serial = next(self._serials)
+        # Copies share coordinates (paths) with the dictionary they were made from
+        self.lineage = self.serial if lineage is None else lineage
+
+
+class DesignView(MutableMapping):
+    """Dictionary-like view of design parameters that records reads and writes
+        for the component cache
+    """
+    def __init__(self, root: _DesignRoot, path=(), data=None) -> None:
+        self._root = root
+        self._path = path
+        self._data = root.data if data is None else data
+
+    def __getitem__(self, key):
+        path = self._path + (key, )
+        try:
+            value = self._data[key]
+        except KeyError:
+            _track_read(self._root, path, _MISSING)
+            raise
+        if isinstance(value, dict):
+            _track_read(self._root, path, _NODE)
+            return DesignView(self._root, path, value)
+        _track_read(self._root, path, value)
+        return value
+
+    def __setitem__(self, key, value):
+        if isinstance(value, DesignView):
+            value = value._data
+        _track_write(self._root, self._path + (key, ))
+        self._data[key] = value
+
+    def __delitem__(self, key):
+        _track_write(self._root, self._path + (key, ))
+        del self._data[key]
+
+    def __iter__(self):
+        # Structure queries depend on the whole subtree
+        _track_read(self._root, self._path, self._data)
+        return iter(self._data)
+
+    def __len__(self):
+        _track_read(self._root, self._path, self._data)
+        return len(self._data)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self._data!r})'
+
+    def __deepcopy__(self, memo):
+        new_root = _DesignRoot(deepcopy(self._data, memo), lineage=self._root.lineage)
+        for recorder in _active_recorders:
+            recorder.inherit_writes(self._root, new_root, self._path)
+        return DesignView(new_root, self._path)
+
+    def __copy__(self):
+        # NOTE: Shallow copies share the nested values with the original
+        # -- cannot follow their modifications
+        for recorder in _active_recorders:
+            recorder.invalid = True
+        return copy(self._data)
+
+    def to_dict(self):
+        """Underlying design parameters dictionary (reads are not recorded)"""
+        return self._data
+
+
+class _Recorder:
+    """Reads & writes of design parameters during construction of a component"""
+    def __init__(self, design: DesignView) -> None:
+        self.lineage = design._root.lineage
+        self.prefix = design._path
+        self.start_serial = next(_DesignRoot._serials)
+        self.reads = {}  # relative path -> value
+        self.writes = {}  # root -> set of written paths
+        self.invalid = False
+
+    def _is_written(self, root, path):
+        written = self.writes.get(root)
+        if not written:
+            return False
+        return any(path[:i] in written for i in range(len(path) + 1))
+
+    def on_read(self, root, path, value):
+        if root.lineage != self.lineage or self._is_written(root, path):
+            return
+        if path[:len(self.prefix)] != self.prefix:
+            self.invalid = True  # Reading outside of the given design subtree
+            return
+        rel_path = path[len(self.prefix):]
+        if rel_path not in self.reads:
+            self.reads[rel_path] = value if value is _MISSING or value is _NODE else deepcopy(value)
+
+    def on_write(self, root, path):
+        if root.lineage != self.lineage:
+            return
+        if root.serial < self.start_serial:
+            # Modifies the input -- side effect that the cache cannot reproduce
+            self.invalid = True
+        else:
+            self.writes.setdefault(root, set()).add(path)
+
+    def inherit_writes(self, src_root, new_root, path):
+        """Copy of the design subtree at path keeps the modifications"""
+        written = self.writes.get(src_root)
+        if written:
+            self.writes[new_root] = {p for p in written if p[:len(path)] == path}
+
+
+_active_recorders = []
+
+
+def _track_read(root, path, value):
+    for recorder in _active_recorders:
+        recorder.on_read(root, path, value)
+
+
+def _track_write(root, path):
+    for recorder in _active_recorders:
+        recorder.on_write(root, path)
+
+
+def _value_at(data, path):
+    for key in path:
+        if isinstance(data, DesignView):
+            data = data.to_dict()
+        if not isinstance(data, Mapping) or key not in data:
+            return _MISSING
+        data = data[key]
+    return data
+
+
+def _simple_key(value):
+    """Hashable representation of simple argument values (or _MISSING)"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (np.integer, np.floating, np.bool_)):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        items = tuple(_simple_key(v) for v in value)
+        return _MISSING if any(v is _MISSING for v in items) else items
+    return _MISSING
+
+
+def _body_key(body):
+    if body is None:
+        return None
+    params = getattr(body, 'params', body)
+    if not isinstance(params, Mapping):
+        return _MISSING
+    return (body.__class__.__name__, repr(sorted(params.items())))
+
+
+# Design parameters read by the constructed components
+_dependencies = weakref.WeakKeyDictionary()
+
+
+def design_dependencies(component):
+    """Paths of design parameters (relative to the 'design' argument) which values
+        were read during construction of the component, or None if unknown
+        (e.g. the component was constructed while the cache was disabled)
+
+        NOTE: Paths of nested dictionaries are included only if the component
+        depends on the dictionary as a whole (e.g. iterated over its keys)
+    """
+    reads = _dependencies.get(component)
+    if reads is None:
+        return None
+    return {path for path, value in reads.items() if value is not _NODE}
+
+
+class ComponentCache:
+    """Storage of the constructed components"""
+    def __init__(self, max_entries=256, max_variants=8) -> None:
+        """
+            * max_entries -- max number of (class, arguments, body) combinations to keep
+            * max_variants -- max number of cached design variations per combination
+        """
+        self.max_entries = max_entries
+        self.max_variants = max_variants
+        self.entries = OrderedDict()
+        self.stats = dict(hits=0, misses=0, uncached=0)
+        self._signatures = {}
+
+    def clear(self):
+        self.entries.clear()
+        for key in self.stats:
+            self.stats[key] = 0
+
+    def _signature(self, cls):
+        if cls not in self._signatures:
+            self._signatures[cls] = inspect.signature(cls.__init__)
+        return self._signatures[cls]
+
+    def _call_key(self, cls, args, kwargs):
+        """Cache key of the call and the design argument (None if not cacheable)"""
+        try:
+            bound = self._signature(cls).bind(None, *args, **kwargs)
+        except TypeError:
+            return None, None
+        arguments = dict(bound.arguments)
+        arguments.pop(next(iter(arguments)))   # self
+        if 'design' not in arguments:
+            return None, None
+
+        design = arguments.pop('design')
+        body = _body_key(arguments.pop('body', None))
+        other = tuple((name, _simple_key(value)) for name, value in arguments.items())
+        if body is _MISSING or any(value is _MISSING for _, value in other):
+            return None, None
+        if not isinstance(design, (dict, DesignView)):
+            return None, None
+
+        return (cls, other, body), design
+
+    def construct(self, cls, constructor, args, kwargs):
+        """Return cached copy of the component or construct a new one"""
+        key, design = self._call_key(cls, args, kwargs)
+        if key is None:
+            self.stats['uncached'] += 1
+            return constructor(*args, **kwargs)
+
+        # Lookup
+        for reads, template in self.entries.get(key, []):
+            values = {path: _value_at(design, path) for path in reads}
+            if all(_same_value(values[path], reads[path]) for path in reads):
+                self.stats['hits'] += 1
+                self.entries.move_to_end(key)
+                if isinstance(design, DesignView):
+                    # Dependencies of the cached component are dependencies of the parents
+                    for path, value in values.items():
+                        if reads[path] is _NODE:
+                            value = _NODE
+                        _track_read(design._root, design._path + path, value)
+                component = deepcopy(template)
+                _dependencies[component] = reads
+                return component
+        self.stats['misses'] += 1
+
+        # Construct while recording design parameters reads
+        view = design if isinstance(design, DesignView) else DesignView(_DesignRoot(design))
+        bound = self._signature(cls).bind(None, *args, **kwargs)
+        bound.arguments['design'] = view
+        recorder = _Recorder(view)
+        _active_recorders.append(recorder)
+        try:
+            component = constructor(*bound.args[1:], **bound.kwargs)
+        finally:
+            _active_recorders.remove(recorder)
+
+        if not recorder.invalid:
+            _dependencies[component] = recorder.reads
+            variants = self.entries.setdefault(key, [])
+            variants.append((recorder.reads, deepcopy(component)))
+            if len(variants) > self.max_variants:
+                variants.pop(0)
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+        return component
+
+
+def _same_value(value, cached):
+    if cached is _NODE:
+        return isinstance(value, Mapping)
+    if value is _MISSING or cached is _MISSING:
+        return value is cached
+    if isinstance(value, Mapping):
+        return False
+    try:
+        return bool(value == cached)
+    except ValueError:  # e.g. numpy arrays
+        return np.array_equal(value, cached)
+
+
+# Active cache (None when disabled)
+_cache = None
+
+
+def enable_component_cache(max_entries=256, max_variants=8):
+    """Enable memoization of the Component construction.
+        Returns the cache object (e.g. to check cache stats)
+    """
+    global _cache
+    _cache = ComponentCache(max_entries, max_variants)
+    return _cache
+
+
+def disable_component_cache():
+    global _cache
+    _cache = None
+
+
+def component_cache():
+    """Currently active component cache or None"""
+    return _cache
+
+
+class CachedComponentMeta(ABCMeta):
+    """Metaclass routing the construction of components through the
+        component cache, if enabled
+    """
+    def __call__(cls, *args, **kwargs):
+        if _cache is None or not cls.cacheable:
+            return super().__call__(*args, **kwargs)
+        return _cache.construct(cls, super().__call__, args, kwargs)
@@ -2,6 +2,7 @@ import numpy as np
 
 from pygarment.garmentcode.interface import Interface
 from pygarment.garmentcode.utils import close_enough
+from pygarment.garmentcode.utils import structural_copy
 
 
 class StitchingRule:
@@ -38,6 +39,9 @@ class StitchingRule:
                 f'{self.__class__.__name__}::WARNING::Projected edges do not match in the stitch: \n'
                 f'{len1}: {int1}\n{len2}: {int2}')
 
+    def __deepcopy__(self, memo):
+        return structural_copy(self, memo, {})
+
     def isMatching(self, tol=0.05):
         # if both the breakdown and relative partitioning is similar
 
@@ -184,6 +188,9 @@ class Stitches:
 
         self.rules = [StitchingRule(int1, int2) for int1, int2 in rules]
 
+    def __deepcopy__(self, memo):
+        return structural_copy(self, memo, {})
+
     def append(self, pair):  # TODOLOW two parameters explicitely rather then "pair" object?
         self.rules.append(StitchingRule(*pair))
 
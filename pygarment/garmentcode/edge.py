@@ -8,7 +8,9 @@ from pygarment.garmentcode.utils import R2D
 from pygarment.garmentcode.utils import close_enough
 from pygarment.garmentcode.utils import c_to_list
 from pygarment.garmentcode.utils import list_to_c
+from pygarment.garmentcode.utils import structural_copy, share, copy_flat, copy_points
 from pygarment.pattern.utils import rel_to_abs_2d, abs_to_rel_2d
+import pygarment.pattern.curves as curves
 
 ILENGTH_S_TOL = 1e-10   # NOTE: tolerance value for evaluating curve parameter (t) from acr length
 
@@ -46,12 +48,16 @@ class Edge:
         # Filled out at the panel assembly time
         self.geometric_id = 0
 
+        # Cache of derived geometry (length, curve objects, linearization)
+        self._cache = {}
+        self._cache_key = None
+
     def length(self):
         """Return current length of an edge.
             Since vertices may change their locations externally, the length
-            is dynamically evaluated
+            is dynamically evaluated (and cached until the geometry changes)
         """
-        return self._straight_len()
+        return self._cached('length', self._straight_len)
 
     def _straight_len(self):
         """Length of the edge ignoring the curvature"""
@@ -100,9 +106,56 @@ class Edge:
 
         return np.array([self.start, self.end])
 
+    # ANCHOR Geometry cache
+    # NOTE: Vertex objects are shared between edges and are often updated
+    # in-place (e.g. by EdgeSequence transformations), so the cache is
+    # validated against a snapshot of the geometry-defining values on access
+    def _geometry_key(self):
+        """Snapshot of the values that define the edge geometry"""
+        return (self.start[0], self.start[1], self.end[0], self.end[1])
+
+    def _cached(self, name, evaluate):
+        """Return the cached value of a geometric quantity, 
+            re-evaluating it if the edge geometry changed since the last call
+        """
+        key = self._geometry_key()
+        if key != self._cache_key:
+            # NOTE: new dict object to not affect shallow copies of the edge
+            self._cache = {}
+            self._cache_key = key
+        if name not in self._cache:
+            self._cache[name] = evaluate()
+        return self._cache[name]
+
+    def invalidate_cache(self):
+        """Drop all cached geometry of the edge"""
+        self._cache = {}
+        self._cache_key = None
+        return self
+
+    # ANCHOR Copies
+    # NOTE: Cached geometry is shared with the copies -- the cache dictionary
+    # is replaced (not updated) when the geometry of any of them changes
+    _copy_rules = {
+        'start': copy_flat,
+        'end': copy_flat,
+        '_cache': share,
+        '_cache_key': share
+    }
+
+    def __deepcopy__(self, memo):
+        return structural_copy(self, memo, self._copy_rules)
+
+    def copy(self):
+        """Create a copy of the edge with new vertex objects"""
+        return deepcopy(self)
+
     # Representation
     def as_curve(self):
         """As svgpath curve object"""
+        return self._cached('curve', self._eval_curve)
+
+    def _eval_curve(self):
         # Get the nodes correcly
         nodes = np.vstack((self.start, self.end))
 
@@ -121,14 +174,19 @@ class Edge:
         if not n_verts_inside:
             return EdgeSequence(self)
         else:
-            n = n_verts_inside + 1
-            tvals = np.linspace(0, 1, n, endpoint=False)[1:]
-
-            curve = self.as_curve()
-            edge_verts = [c_to_list(curve.point(t)) for t in tvals]
-            seq = self.to_edge_sequence(edge_verts)
+            edge_verts = self._cached(
+                ('lin', n_verts_inside), 
+                lambda: self._eval_lin_verts(n_verts_inside))
+            # NOTE: new vertex objects for every call to avoid 
+            # modifications of the cached values
+            return self.to_edge_sequence([list(v) for v in edge_verts])
+
+    def _eval_lin_verts(self, n_verts_inside):
+        """Locations of the internal vertices of edge linearization"""
+        n = n_verts_inside + 1
+        tvals = np.linspace(0, 1, n, endpoint=False)[1:]
 
-            return seq
+        return curves.svg_curve_points(self.as_curve(), tvals).tolist()
 
     def to_edge_sequence(self, edge_verts):
         """
@@ -146,6 +204,7 @@ class Edge:
     def reverse(self):
         """Flip the direction of the edge"""
         self.start, self.end = self.end, self.start
+        self.invalidate_cache()
 
         return self
     
@@ -163,6 +222,7 @@ class Edge:
         self.end[0] = self.end[0] - self.start[0] + new_start[0]
         self.end[1] = self.end[1] - self.start[1] + new_start[1]
         self.start[:] = new_start
+        self.invalidate_cache()
         return self
 
     def rotate(self, angle):
@@ -288,9 +348,14 @@ class CircleEdge(Edge):
     def length(self):
         """Return current length of an edge.
             Since vertices may change their locations externally, the length
-            is dynamically evaluated
+            is dynamically evaluated (and cached until the geometry changes)
         """
-        return self._rel_radius() * self._straight_len() * self._arc_angle()
+        return self._cached(
+            'length', 
+            lambda: self._rel_radius() * self._straight_len() * self._arc_angle())
+
+    def _geometry_key(self):
+        return super()._geometry_key() + (self.control_y, )
 
     def __str__(self) -> str:
 
@@ -311,6 +376,7 @@ class CircleEdge(Edge):
 
         self.start, self.end = self.end, self.start
         self.control_y *= -1
+        self.invalidate_cache()
 
         return self
     
@@ -318,6 +384,7 @@ class CircleEdge(Edge):
         """Reflect edge features from one side of the edge to the other"""
 
         self.control_y *= -1
+        self.invalidate_cache()
 
         return self
 
@@ -358,7 +425,9 @@ class CircleEdge(Edge):
     # Special tools for circle representation
     def as_curve(self):
         """Represent as svgpath Arc"""
+        return self._cached('curve', self._eval_curve)
 
+    def _eval_curve(self):
         radius, la, sweep = self.as_radius_flag()
 
         return svgpath.Arc(
@@ -388,14 +457,11 @@ class CircleEdge(Edge):
            NOTE: n_verts_inside = number of vertices (excluding the start
             and end vertices) used to create a linearization of the edge
         """
-        n = n_verts_inside + 1
-        tvals = np.linspace(0, 1, n, endpoint=False)[1:]
-
-        curve = self.as_curve()
-        edge_verts = [c_to_list(curve.point(t)) for t in tvals]
-        seq = self.to_edge_sequence(edge_verts)
+        edge_verts = self._cached(
+            ('lin', n_verts_inside), 
+            lambda: self._eval_lin_verts(n_verts_inside))
 
-        return seq
+        return self.to_edge_sequence([list(v) for v in edge_verts])
 
     # NOTE: The following values are calculated at runtime to allow 
     # changes to control point after the edge definition
@@ -493,9 +559,16 @@ class CurveEdge(Edge):
 
     def length(self):
         """Length of Bezier curve edge"""
-        curve = self.as_curve()
-        
-        return curve.length()
+        # NOTE: svgpathtools evaluation is kept for the length value: 
+        # curve_match_tangents() is sensitive to tiny changes of the target lengths, 
+        # and the designs would not be reproduced exactly otherwise
+        return self._cached('length', lambda: self.as_curve().length())
+
+    _copy_rules = dict(Edge._copy_rules, control_points=copy_points)
+
+    def _geometry_key(self):
+        return super()._geometry_key() + tuple(
+            (c[0], c[1]) for c in self.control_points)
 
     def __str__(self) -> str:
 
@@ -508,10 +581,18 @@ class CurveEdge(Edge):
     
     def midpoint(self):
         """Center of the edge"""
-        curve = self.as_curve()
-
-        t_mid = curve.ilength(curve.length()/2, s_tol=ILENGTH_S_TOL)
-        return c_to_list(curve.point(t_mid))
+        return list(self._cached('midpoint', self._eval_midpoint))
+
+    def _eval_midpoint(self):
+        t_mid = self._ilength(self.length() / 2)
+        return curves.bezier_points(self.nodes(), t_mid)[0].tolist()
+
+    def _ilength(self, lengths):
+        """Curve parameter values (t) for the given arc lengths along the edge"""
+        return curves.bezier_inverse_length(
+            self.nodes(), lengths, 
+            tol=ILENGTH_S_TOL, 
+            table=self._cached('arc_table', lambda: curves.bezier_arc_table(self.nodes())))
     
     def _subdivide(self, fractions: list, by_length=False):
         """Add intermediate vertices to an edge, 
@@ -523,12 +604,12 @@ class CurveEdge(Edge):
 
         # Sub-curves
         covered_fr, prev_t = 0, 0
-        clen = curve.length()
+        clen = self.length()
         subcurves = []
         for fr in fractions:
             covered_fr += fr
             if by_length:
-                next_t = curve.ilength(clen * covered_fr, s_tol=ILENGTH_S_TOL)
+                next_t = self._ilength(clen * covered_fr)[0]
                 subcurves.append(curve.cropped(prev_t, next_t))
                 prev_t = next_t
             else:
@@ -557,6 +638,7 @@ class CurveEdge(Edge):
         # Update coordinates
         for p in self.control_points:
             p[0], p[1] = 1 - p[0], -p[1]
+        self.invalidate_cache()
 
         return self
     
@@ -565,6 +647,7 @@ class CurveEdge(Edge):
 
         for p in self.control_points:
             p[1] = -p[1]
+        self.invalidate_cache()
 
         return self
     
@@ -572,19 +655,27 @@ class CurveEdge(Edge):
         """As svgpath curve object
 
             Converting on the fly as exact vertex location might have been updated since
-            the creation of the edge
+            the creation of the edge (the result is cached until the geometry changes)
         """
+        return self._cached(('curve', absolute), lambda: self._eval_curve(absolute))
+
+    def _eval_curve(self, absolute=True):
+        nodes = self.nodes(absolute)
+        params = nodes[:, 0] + 1j*nodes[:, 1]
+
+        return svgpath.QuadraticBezier(*params) if len(nodes) < 4 else svgpath.CubicBezier(*params)
+
+    def nodes(self, absolute=True):
+        """Bezier control polygon (including start and end) as numpy array"""
+        return self._cached(('nodes', absolute), lambda: self._eval_nodes(absolute))
+
+    def _eval_nodes(self, absolute=True):
         # Get the nodes correcly
         if absolute:
             cp = [rel_to_abs_2d(self.start, self.end, c) for c in self.control_points]
-            nodes = np.vstack((self.start, cp, self.end))
-        else:
-            cp = self.control_points
-            nodes = np.vstack(([0, 0], cp, [1, 0]))
-        
-        params = nodes[:, 0] + 1j*nodes[:, 1]
+            return np.vstack((self.start, *cp, self.end)).astype(float)
 
-        return svgpath.QuadraticBezier(*params) if len(cp) < 2 else svgpath.CubicBezier(*params)
+        return np.vstack(([0, 0], *self.control_points, [1, 0])).astype(float)
 
     def linearize(self, n_verts_inside=9):
         """Return a linear approximation of an edge using the same vertex objects
@@ -592,37 +683,37 @@ class CurveEdge(Edge):
            and end vertices) used to create a linearization of the edge
 
         """        
+        edge_verts = self._cached(
+            ('lin', n_verts_inside), 
+            lambda: self._eval_lin_verts(n_verts_inside))
+
+        return self.to_edge_sequence([list(v) for v in edge_verts])
+
+    def _eval_lin_verts(self, n_verts_inside):
+        """Locations of the internal vertices of edge linearization 
+            (evenly distributed along the curve length)"""
         n = n_verts_inside + 1
         tvals_init = np.linspace(0, 1, n, endpoint=False)[1:]
 
-        curve = self.as_curve(absolute=False)
-        curve_lengths = tvals_init * curve.length()
-        tvals = [curve.ilength(c_len, s_tol=ILENGTH_S_TOL) for c_len in curve_lengths]
+        # NOTE: arc length parametrization is preserved by the transformation
+        # from relative to absolute coordinates (similarity)
+        tvals = self._ilength(tvals_init * self.length())
 
-        edge_verts = [rel_to_abs_2d(self.start, self.end, c_to_list(curve.point(t))) for t in tvals]
-        seq = self.to_edge_sequence(edge_verts)
-
-        return seq
+        return curves.bezier_points(self.nodes(), tvals).tolist()
 
     def _extreme_points(self):
         """Return extreme points (on Y) of the current edge
             NOTE: this does NOT include the border vertices of an edge
         """
+        return self._cached('extreme_points', self._eval_extreme_points).copy()
 
-        # Variation of https://github.com/mathandy/svgpathtools/blob/5c73056420386753890712170da602493aad1860/svgpathtools/bezier.py#L197
-        curve = self.as_curve(absolute=False)   # relative coords to find real extremizers
-        poly = svgpath.bezier2polynomial(curve, return_poly1d=True)
-        y = svgpath.imag(poly)
-        dy = y.deriv()
-        y_extremizers = svgpath.polyroots(
-            dy, realroots=True, condition=lambda r: 0 < r < 1)
+    def _eval_extreme_points(self):
+        # relative coords to find real extremizers
+        y_extremizers = curves.bezier_y_extremizers(self.nodes(absolute=False))
+        if not len(y_extremizers):
+            return np.array([])
 
-        extreme_points = np.array(
-            [rel_to_abs_2d(self.start, self.end, c_to_list(curve.point(t)))
-             for t in y_extremizers]
-        )
-
-        return extreme_points
+        return curves.bezier_points(self.nodes(), y_extremizers)
 
     # Assembly into serializable object
     def assembly(self):
@@ -744,7 +835,13 @@ class EdgeSequence:
         # To correctly process edges with extreme curvatures
 
         lin_edges = EdgeSequence([e.linearize() for e in self.edges])
-        verts_2d = np.asarray(lin_edges.verts())
+        return self.bbox_points(np.asarray(lin_edges.verts()))
+
+    @staticmethod
+    def bbox_points(verts_2d):
+        """2D bounding box of the vertices and the vertices located on it
+            (see bbox())
+        """
         mi = verts_2d.min(axis=0)
         ma = verts_2d.max(axis=0)
         xs = [mi[0], ma[0]]
@@ -939,6 +1036,9 @@ class EdgeSequence:
             e.label = label
 
     # ANCHOR New sequences & versions
+    def __deepcopy__(self, memo):
+        return structural_copy(self, memo, {})
+
     def copy(self):
         """Create a copy of a current edge sequence preserving the chaining
         property of edge sequences"""
@@ -5,6 +5,7 @@ import numpy as np
 
 from pygarment.garmentcode.edge import EdgeSequence, Edge
 from pygarment.garmentcode.utils import close_enough
+from pygarment.garmentcode.utils import structural_copy, copy_flat
 
 
 class Interface:
@@ -55,6 +56,15 @@ class Interface:
         else:
             self.ruffle = [dict(coeff=ruffle, sec=[0, len(self.edges)])]
 
+    # Copies
+    _copy_rules = {
+        'right_wrong': copy_flat,
+        'edges_flipping': copy_flat
+    }
+
+    def __deepcopy__(self, memo):
+        return structural_copy(self, memo, self._copy_rules)
+
     def projecting_edges(self, on_oriented=False) -> EdgeSequence:
         """Return edges shape that should be used when projecting interface
             onto another panel
@@ -181,8 +191,8 @@ class Interface:
             # Using curve linearization for more accurate approximation of bbox
             lin_edges = e.linearize()  
             verts_2d = lin_edges.verts()
-            verts_3d += [panel.point_to_3D(v) for v in verts_2d]
-        verts_3d = np.asarray(verts_3d)
+            verts_3d.append(panel.points_to_3D(verts_2d))
+        verts_3d = np.concatenate(verts_3d)
 
         return verts_3d.min(axis=0), verts_3d.max(axis=0)
         
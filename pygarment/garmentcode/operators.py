@@ -12,6 +12,7 @@ from pygarment.garmentcode.interface import Interface
 from pygarment.garmentcode.utils import vector_angle, close_enough, c_to_list, c_to_np
 from pygarment.garmentcode.utils import list_to_c
 from pygarment.garmentcode.base import BaseComponent
+from pygarment.pattern.curves import bezier_length_gradient, bezier_max_sq_curvature_gradient
 
 
 # ANCHOR ----- Edge Sequences Modifiers ----
@@ -368,8 +369,9 @@ def distribute_Y(component, n_copies, odd_copy_shift=0, name_tag='panel'):
     for i in range(n_copies - 1):
         new_component = deepcopy(copies[-1])
         new_component.name = f'{name_tag}_{i + 1}'   # Unique
-        new_component.rotate_by(delta_rotation)
-        new_component.translate_to(delta_rotation.apply(new_component.translation))
+        with new_component.deferred_placement():
+            new_component.rotate_by(delta_rotation)
+            new_component.translate_to(delta_rotation.apply(new_component.translation))
 
         copies.append(new_component)
 
@@ -522,11 +524,69 @@ def _bend_extend_2_tangent(
     return length_diff + tan_0_diff + tan_1_diff + curvature_reg + end_expantion_reg
 
 
+def _bend_extend_2_tangent_grad(
+        shift, cp, target_len, direction, 
+        target_tangent_start, target_tangent_end, 
+        point_estimates=50):
+    """Same objective as _bend_extend_2_tangent() evaluated together with its 
+        closed-form gradient w.r.t. the shift parameters
+
+        NOTE: Target tangents are expected as normalized 2D vectors
+    """
+    control = np.array([
+        cp[0], 
+        [cp[1][0] + shift[0], cp[1][1] + shift[1]], 
+        [cp[2][0] + shift[2], cp[2][1] + shift[3]],
+        cp[-1] + direction * shift[4]
+    ])
+
+    # Length preservation
+    length, length_grad = bezier_length_gradient(control)
+    value = (length - target_len)**2
+    grad = 2 * (length - target_len) * length_grad
+
+    # Tangents: |u - target|^2 for the unit tangent u = d / |d| 
+    for (i_from, i_to), target in zip([(0, 1), (2, 3)], [target_tangent_start, target_tangent_end]):
+        tan = control[i_to] - control[i_from]
+        tan_len = norm(tan)
+        unit = tan / tan_len
+        value += ((unit - target)**2).sum()
+        tan_grad = -2 * (target - unit * (unit @ target)) / tan_len
+        grad[i_to] += tan_grad
+        grad[i_from] -= tan_grad
+
+    # Curvature regularization 
+    curvature_reg, curvature_grad = bezier_max_sq_curvature_gradient(
+        control, np.linspace(0, 1, point_estimates))
+    value += curvature_reg
+    grad += curvature_grad
+
+    value += 0.001*shift[-1]**2   # end expantion regularization
+
+    shift_grad = np.array([
+        *grad[1], 
+        *grad[2], 
+        grad[3] @ direction + 0.002*shift[-1]
+    ])
+
+    return value, shift_grad
+
+
 def curve_match_tangents(curve, target_tan0, target_tan1, target_len=None,
-                         return_as_edge=False, verbose: bool = False):
+                         return_as_edge=False, verbose: bool = False,
+                         solver=None, warm_start=None):
     """Update the curve to have the desired tangent directions at endpoints 
         while preserving curve length or desired target length ('target_len') and overall direction
 
+        * solver -- 'numeric' to optimize with finite difference gradients, 
+            or 'analytic' to use closed-form gradients of the objective (faster, but
+            the results slightly differ from the 'numeric' ones).
+            If not given, the solver set by set_curve_match_solver() is used ('numeric' by default)
+        * warm_start -- control points of the solution for a nearby problem 
+            (e.g. the previous output of this function) to start the optimization from. 
+            If not given, the previously found solutions are used when 
+            enabled by enable_curve_match_warm_start()
+
         Returns 
         * control points for the final CubicBezier curves
         * Or CurveEdge instance, if return_as_edge=True
@@ -546,21 +606,48 @@ def curve_match_tangents(curve, target_tan0, target_tan1, target_len=None,
 
     target_tan0 = target_tan0 / np.linalg.norm(target_tan0)
     target_tan1 = target_tan1 / np.linalg.norm(target_tan1)
+    target_len = curve.length() if target_len is None else target_len
+
+    problem_key = None
+    if warm_start is None and _warm_start_solutions is not None:
+        problem_key = _curve_match_problem_key(curve_cps, target_tan0, target_tan1, target_len)
+        warm_start = _closest_warm_start(problem_key)
+
+    init_shift = np.zeros(5)
+    if warm_start is not None:
+        init_shift = _shift_from_solution(curve_cps, direction, warm_start)
 
     # match tangents with the requested ones while preserving length
-    out = minimize(
-        _bend_extend_2_tangent,  # with tangent matching
-        [0, 0, 0, 0, 0], 
-        args=(
-            curve_cps, 
-            curve.length() if target_len is None else target_len,
-            direction,
-            list_to_c(target_tan0),  
-            list_to_c(target_tan1), 
-            70   # NOTE: Low values cause instable resutls
-        ),
-        method='L-BFGS-B',
-    )
+    if solver is None:
+        solver = _curve_match_solver
+    if solver == 'analytic':
+        fun, jac = _bend_extend_2_tangent_grad, True
+        tangents = (target_tan0, target_tan1)
+    elif solver == 'numeric':
+        fun, jac = _bend_extend_2_tangent, None
+        tangents = (list_to_c(target_tan0), list_to_c(target_tan1))
+    else:
+        raise ValueError(f'Curve_match_tangents::ERROR::Unknown solver {solver}')
+
+    def optimize(init):
+        return minimize(
+            fun,  # with tangent matching
+            init, 
+            args=(
+                curve_cps, 
+                target_len,
+                direction,
+                *tangents, 
+                70   # NOTE: Low values cause instable resutls
+            ),
+            method='L-BFGS-B',
+            jac=jac
+        )
+
+    out = optimize(init_shift)
+    if not out.success and warm_start is not None:
+        # Warm start might be too far from the solution
+        out = optimize(np.zeros(5))
     if not out.success:
         if verbose:
             print(f'Curve_match_tangents::WARNING::optimization not successfull')
@@ -575,6 +662,9 @@ def curve_match_tangents(curve, target_tan0, target_tan1, target_len=None,
         (curve_cps[-1] + direction*shift[-1]).tolist(), 
     ]
 
+    if problem_key is not None and out.success:
+        _store_warm_start(problem_key, fin_curve_cps)
+
     if return_as_edge:
         fin_inv_edge = CurveEdge(
             start=fin_curve_cps[0], 
@@ -587,6 +677,82 @@ def curve_match_tangents(curve, target_tan0, target_tan1, target_len=None,
     return fin_curve_cps
 
 
+# Default solver of curve_match_tangents()
+_curve_match_solver = 'numeric'
+
+
+def set_curve_match_solver(solver='numeric'):
+    """Set the default solver of curve_match_tangents(): 'numeric' or 'analytic'
+
+        NOTE: 'analytic' solver is ~10x faster, but the resulting curves slightly differ
+        from the 'numeric' ones -- e.g. designs of existing datasets are not reproduced exactly
+    """
+    if solver not in ['numeric', 'analytic']:
+        raise ValueError(f'set_curve_match_solver::ERROR::Unknown solver {solver}')
+    global _curve_match_solver
+    _curve_match_solver = solver
+
+
+# Solutions of the recent curve_match_tangents() problems
+# NOTE: None when warm starts are disabled (default) 
+_warm_start_solutions = None
+WARM_START_MAX_SOLUTIONS = 64
+WARM_START_TOL = 0.05
+
+
+def enable_curve_match_warm_start(enable=True):
+    """Start curve_match_tangents() optimization from the solution of the 
+        closest recently solved problem, if any. 
+        
+        Speeds up the repeated evaluation of the garment programs with slightly 
+        changing parameters (e.g. interactive editing), but makes the results 
+        dependent on the evaluation history
+    """
+    global _warm_start_solutions
+    _warm_start_solutions = [] if enable else None
+
+
+def _curve_match_problem_key(curve_cps, target_tan0, target_tan1, target_len):
+    """Scale-independent description of the tangent matching problem"""
+    return np.concatenate([
+        ((curve_cps[1:] - curve_cps[0]) / target_len).ravel(), 
+        target_tan0, target_tan1, 
+        [np.log(target_len)]
+    ])
+
+
+def _closest_warm_start(problem_key):
+    """Solution for the closest problem within tolerance (or None)"""
+    if not _warm_start_solutions:
+        return None
+    dists = [np.abs(key - problem_key).max() for key, _ in _warm_start_solutions]
+    closest = int(np.argmin(dists))
+    if dists[closest] > WARM_START_TOL:
+        return None
+    return _warm_start_solutions[closest][1]
+
+
+def _store_warm_start(problem_key, solution_cps):
+    _warm_start_solutions.append((problem_key, solution_cps))
+    if len(_warm_start_solutions) > WARM_START_MAX_SOLUTIONS:
+        _warm_start_solutions.pop(0)
+
+
+def _shift_from_solution(curve_cps, direction, solution):
+    """Optimization parameters that transform curve_cps into the given 
+        solution curve (aligned at the start point)
+    """
+    if isinstance(solution, CurveEdge):
+        solution = c_to_np(solution.as_curve().bpoints())
+    solution = np.asarray(solution, dtype=float)
+    solution = solution - solution[0] + curve_cps[0]
+    return np.array([
+        *(solution[1] - curve_cps[1]),
+        *(solution[2] - curve_cps[2]),
+        (solution[-1] - curve_cps[-1]) @ direction
+    ])
+
+
 # ---- Utils ----
 
 def _dist(v1, v2):
@@ -4,9 +4,11 @@ from argparse import Namespace
 from scipy.spatial.transform import Rotation as R
 
 from pygarment.pattern.core import BasicPattern
+from pygarment.pattern.curves import svg_curves_intersecting
 from pygarment.garmentcode.base import BaseComponent
 from pygarment.garmentcode.edge import Edge, EdgeSequence, CircleEdge
 from pygarment.garmentcode.utils import close_enough, vector_align_3D
+from pygarment.garmentcode.utils import share, copy_flat
 from pygarment.garmentcode.operators import cut_into_edge
 from pygarment.garmentcode.interface import Interface
 
@@ -22,6 +24,12 @@ class Panel(BaseComponent):
         applications
 
     """
+    # NOTE: Rotation objects are never modified in-place,
+    # 2D geometry cache is replaced (not updated) when the edges change
+    _copy_rules = dict(BaseComponent._copy_rules,
+                       translation=copy_flat, rotation=share,
+                       _cache_2D=share, _cache_2D_key=share, _cache_2D_previous=share)
+
     def __init__(self, name, label='') -> None:
         """Base class for panel creations
             * Name: panel name. Expected to be a unique identifier of a panel object
@@ -35,7 +43,19 @@ class Panel(BaseComponent):
         # NOTE: initiating with empty sequence allows .append() to it safely
         self.edges = EdgeSequence()
 
+        # Cache of 2D geometry derived from the edges (see _cached_2D())
+        self._cache_2D = {}
+        self._cache_2D_key = None
+        self._cache_2D_previous = (None, {})
+
+        # Orientation updates postponed by deferred_placement()
+        self._placement_depth = 0
+        self._autonorm_pending = False
+
     # Info
+    def _panels(self):
+        return [self]
+
     def pivot_3D(self):
         """Pivot point of a panel in 3D"""
         return self.point_to_3D([0, 0])
@@ -67,23 +87,8 @@ class Panel(BaseComponent):
             else:
                 edge_curves.append(e.as_curve())
 
-        # NOTE: simple pairwise checks of edges
-        for i1 in range(0, len(edge_curves)):
-           for i2 in range(i1 + 1, len(edge_curves)):
-                intersect_t = edge_curves[i1].intersect(edge_curves[i2])
-                
-                # Check exceptions -- intersection at the vertex
-                for i in range(len(intersect_t)): 
-                    t1, t2 = intersect_t[i]
-                    if t2 < t1:
-                        t1, t2 = t2, t1
-                    if close_enough(t1, 0) and close_enough(t2, 1):
-                        intersect_t[i] = None
-                intersect_t = [el for el in intersect_t if el is not None]
-
-                if intersect_t:  # Any other case of intersections
-                    return True      
-        return False
+        # NOTE: pairwise checks of edges with overlapping bounding boxes
+        return svg_curves_intersecting(edge_curves)
 
     # ANCHOR - Operations -- update object in-place 
     def set_panel_label(self, label: str, overwrite=True): 
@@ -198,7 +203,13 @@ class Panel(BaseComponent):
 
             NOTE: for best results, call autonorm after translation
                 specification
+            NOTE: inside deferred_placement() the update is postponed
+                until the end of the context
         """
+        if self._placement_depth:
+            self._autonorm_pending = True
+            return
+
         norm_dr = self.norm()
         
         # NOTE: Nothing happens if self.translation is zero
@@ -216,20 +227,21 @@ class Panel(BaseComponent):
         # Case Around Y
         if close_enough(axis[0], tol=1e-4):  # reflection around Y
 
-            # Vertices
-            self.edges.reflect([0, 0], [0, 1])
-            
-            # Position
-            self.translation[0] *= -1
+            with self.deferred_placement():
+                # Vertices
+                self.edges.reflect([0, 0], [0, 1])
+                
+                # Position
+                self.translation[0] *= -1
 
-            # Rotations
-            curr_euler = self.rotation.as_euler('XYZ')
-            curr_euler[1] *= -1  
-            curr_euler[2] *= -1  
-            self.rotate_to(R.from_euler('XYZ', curr_euler))  
+                # Rotations
+                curr_euler = self.rotation.as_euler('XYZ')
+                curr_euler[1] *= -1  
+                curr_euler[2] *= -1  
+                self.rotate_to(R.from_euler('XYZ', curr_euler))  
 
-            # Fix right/wrong side
-            self.autonorm()
+                # Fix right/wrong side
+                self.autonorm()
         else:
             # TODO Any other axis
             raise NotImplementedError(f'{self.name}::ERROR::Mirrowing over arbitrary axis is not implemented')
@@ -328,13 +340,51 @@ class Panel(BaseComponent):
             n_verts_inside = number of vertices (excluding the start
             and end vertices) used to create a linearization of an edge
         """
-        # NOTE: assuming that edges are organized in a loop and share vertices
-        lin_edges = EdgeSequence([e.linearize(n_verts_inside)
-                                  for e in self.edges])
-        verts = lin_edges.verts()
+        verts = self._lin_verts_2D(n_verts_inside)
 
         return np.mean(verts, axis=0)
 
+    # ANCHOR Cached 2D geometry
+    # NOTE: 2D geometry of the panel does not depend on its placement in 3D,
+    # so it is evaluated once for any sequence of placement operations.
+    # The cache is validated against the edges (their vertex objects and
+    # geometry) on access, since edges are often modified externally
+    def _edges_key(self):
+        """Snapshot of the edges that define the 2D geometry of the panel"""
+        return tuple((e.__class__, id(e.start), id(e.end)) + e._geometry_key()
+                     for e in self.edges)
+
+    def _cached_2D(self, name, evaluate):
+        """Return the cached value of the 2D geometric quantity,
+            re-evaluating it if the edges changed since the last call
+        """
+        key = self._edges_key()
+        if key != self._cache_2D_key:
+            # NOTE: Panels are often flipped back and forth by autonorm()
+            # during placement, so the values for the previous state of the edges are kept as well
+            previous = (self._cache_2D_key, self._cache_2D)
+            if self._cache_2D_previous[0] == key:
+                self._cache_2D_key, self._cache_2D = self._cache_2D_previous
+            else:
+                # NOTE: new dict object to not affect the copies of the panel
+                self._cache_2D = {}
+                self._cache_2D_key = key
+            self._cache_2D_previous = previous
+        if name not in self._cache_2D:
+            # NOTE: Cached arrays are shared between the calls and panel copies
+            self._cache_2D[name] = _read_only(evaluate())
+        return self._cache_2D[name]
+
+    def _lin_verts_2D(self, n_verts_inside=None):
+        """(Read-only) array of the vertices of the panel edges linearization"""
+        # NOTE: assuming that edges are organized in a loop and share vertices
+        if n_verts_inside is None:   # Default linearization of every edge type
+            evaluate = lambda: np.asarray(EdgeSequence([e.linearize() for e in self.edges]).verts())
+        else:
+            evaluate = lambda: np.asarray(EdgeSequence([e.linearize(n_verts_inside)
+                                                        for e in self.edges]).verts())
+        return self._cached_2D(('lin', n_verts_inside), evaluate)
+
     def point_to_3D(self, point_2d):
         """Calculate 3D location of a point given in the local 2D plane """
         point_2d = np.asarray(point_2d)
@@ -345,6 +395,16 @@ class Panel(BaseComponent):
         point_3d += self.translation
         return point_3d
 
+    def points_to_3D(self, points_2d):
+        """Calculate 3D locations of a set of points given in the local 2D plane"""
+        points_2d = np.asarray(points_2d, dtype=float).reshape(-1, 2)
+        points_3d = np.zeros((len(points_2d), 3))
+        points_3d[:, :2] = points_2d
+
+        points_3d = self.rotation.apply(points_3d)
+        points_3d += self.translation
+        return points_3d
+
     def norm(self):
         """Normal direction for the current panel using bounding box"""
 
@@ -354,23 +414,18 @@ class Panel(BaseComponent):
         # then weight the norms.
         # The dominant norm direction should be the correct one
 
-        _, b_verts_2d = self.edges.bbox()
-        b_verts_3d = [self.point_to_3D(bv_2d) for bv_2d in b_verts_2d]
+        _, b_verts_2d = self._cached_2D(
+            'bbox_points', lambda: EdgeSequence.bbox_points(self._lin_verts_2D()))
+        b_verts_3d = self.points_to_3D(b_verts_2d)
         b_center_3d = np.mean((b_verts_3d), axis=0)
 
-        norms = []
-        num_b_verts_3d = len(b_verts_3d)
-        for i in range(num_b_verts_3d):
-            vert_0 = b_verts_3d[i]
-            vert_1 = b_verts_3d[(i + 1) % num_b_verts_3d]
-            # Pylance + NP error for unreachanble code -- see https://github.com/numpy/numpy/issues/22146
-            # Works ok for numpy 1.23.4+
-            norm = np.cross(vert_0 - b_center_3d, vert_1 - b_center_3d)
-            norm /= np.linalg.norm(norm)
-            norms.append(norm)
+        # Norms of consecutive b_verts_3d
+        rel_verts = b_verts_3d - b_center_3d
+        norms = np.cross(rel_verts, np.roll(rel_verts, -1, axis=0))
+        norms /= np.linalg.norm(norms, axis=1)[:, np.newaxis]
 
         # Current norm direction
-        avg_norm = sum(norms) / len(norms)
+        avg_norm = norms.mean(axis=0)
 
         if close_enough(np.linalg.norm(avg_norm), 0):
             # Indecisive averaging, so using just one of the norms
@@ -382,17 +437,14 @@ class Panel(BaseComponent):
         final_norm = avg_norm / np.linalg.norm(avg_norm)
 
         # solve float errors
-        for i, ni in enumerate(final_norm):
-            if np.isclose([ni], [0.0]):
-                final_norm[i] = 0.0
+        final_norm[np.isclose(final_norm, 0.0)] = 0.0
 
         return final_norm
 
     def bbox(self):
         """Evaluate 2D bounding box"""
         # Using curve linearization for more accurate approximation of bbox
-        lin_edges = EdgeSequence([e.linearize() for e in self.edges])
-        verts_2d = np.asarray(lin_edges.verts())
+        verts_2d = self._lin_verts_2D()
 
         return verts_2d.min(axis=0), verts_2d.max(axis=0)
 
@@ -401,8 +453,16 @@ class Panel(BaseComponent):
         """Evaluate 3D bounding box of the current panel"""
 
         # Using curve linearization for more accurate approximation of bbox
-        lin_edges = EdgeSequence([e.linearize() for e in self.edges])
-        verts_2d = lin_edges.verts()
-        verts_3d = np.asarray([self.point_to_3D(v) for v in verts_2d])
+        verts_3d = self.points_to_3D(self._lin_verts_2D())
+
+        return verts_3d.min(axis=0), verts_3d.max(axis=0)
+
 
-        return verts_3d.min(axis=0), verts_3d.max(axis=0)
\ No newline at end of file
+def _read_only(value):
+    """Protect the arrays in the (cached) value from in-place modifications"""
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, (tuple, list)):
+        for item in value:
+            _read_only(item)
+    return value
@@ -1,10 +1,14 @@
 """Parameter class wrappers around parameter files allowing definition of computed parameters
 """
+import csv
 import yaml
 from pathlib import Path
 from copy import deepcopy
+import operator
 import random 
 
+import numpy as np
+
 from pygarment.garmentcode.utils import nested_get, nested_set, close_enough
 
 
@@ -16,7 +20,8 @@ class BodyParametrizationBase:
     def __init__(self, param_file='') -> None:
         
         self.params = {}
-        self.load(param_file)
+        if param_file:
+            self.load(param_file)
 
     def __getitem__(self, key):
         return self.params[key]
@@ -63,34 +68,310 @@ class BodyParametrizationBase:
             )
 
 
+class BodyParametersTable:
+    """Measurements of a collection of bodies (e.g. body shape dataset)
+
+        Dependent parameters are evaluated for all the bodies at once:
+        eval_dependencies() of the body parametrization class is applied to
+        the columns of measurements (numpy arrays) instead of the single values.
+        Parametrization objects of individual bodies are created on request.
+
+        NOTE: eval_dependencies() needs to be expressed with element-wise operations
+        on the parameters to support the tables
+    """
+
+    def __init__(self, body_class, names, columns) -> None:
+        """
+            * body_class -- BodyParametrizationBase subclass defining the dependent parameters
+            * names -- names of the bodies
+            * columns -- dictionary of the measurement values of all the bodies:
+                measurement name -> sequence of values in the order of names
+        """
+        self.body_class = body_class
+        self.names = list(names)
+        self._index = {name: i for i, name in enumerate(self.names)}
+
+        self.params = {}
+        for key, values in columns.items():
+            if len(values) != len(self.names):
+                raise ValueError(
+                    f'{self.__class__.__name__}::ERROR::Column {key} has {len(values)} values '
+                    f'for {len(self.names)} bodies')
+            self.params[key] = np.asarray(values)
+        self._measurements = list(self.params.keys())
+
+        # Dependent parameters as columns
+        evaluator = body_class()
+        evaluator.params = self.params
+        evaluator.eval_dependencies()
+
+        self._rows = None   # Column values as python objects
+
+    @classmethod
+    def from_csv(cls, path, body_class):
+        """Load the table of measurements: one row per body,
+            'name' column followed by measurement columns"""
+        with open(path, 'r', newline='') as f:
+            rows = list(csv.DictReader(f))
+        names = [row.pop('name') for row in rows]
+        keys = list(rows[0].keys()) if rows else []
+        return cls(body_class, names, {
+            key: [_parse_value(row[key]) for row in rows] for key in keys})
+
+    @classmethod
+    def from_yaml_files(cls, paths, body_class, names=None):
+        """Collect the measurements from the body parameter files.
+            The bodies are named after the files by default"""
+        paths = [Path(p) for p in paths]
+        names = [p.stem for p in paths] if names is None else names
+
+        measurements = []
+        for path in paths:
+            with open(path, 'r') as f:
+                body = yaml.safe_load(f)['body']
+            measurements.append({key: value for key, value in body.items() if key[0] != '_'})
+
+        keys = list(measurements[0].keys()) if measurements else []
+        for name, body in zip(names, measurements):
+            if set(body.keys()) != set(keys):
+                raise ValueError(
+                    f'{cls.__name__}::ERROR::Measurements of {name} do not match '
+                    f'the measurements of {names[0]}')
+        return cls(body_class, names, {
+            key: [body[key] for body in measurements] for key in keys})
+
+    def save_csv(self, path):
+        """Save the measurements (without dependent parameters) as CSV table"""
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['name'] + self._measurements)
+            columns = [self.params[key].tolist() for key in self._measurements]
+            for i, name in enumerate(self.names):
+                writer.writerow([name] + [column[i] for column in columns])
+
+    # Access
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __getitem__(self, key):
+        """Parametrization object of a body given by name or index"""
+        idx = self._index[key] if isinstance(key, str) else key
+        if self._rows is None:
+            self._rows = {name: column.tolist() for name, column in self.params.items()}
+
+        body = self.body_class()
+        body.params = {name: column[idx] for name, column in self._rows.items()}
+        return body
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+def _parse_value(value: str):
+    """Number from CSV cell, if possible"""
+    for value_type in [int, float]:
+        try:
+            return value_type(value)
+        except ValueError:
+            pass
+    return value
+
+
+class DesignConstraint:
+    """Validity constraint on the combination of design parameter values.
+        Declared in the 'constraints' section of the design parameters file:
+
+        constraints:
+        - name: Skirt2 ruffles need a fitted belt
+          if:
+            meta.bottom: Skirt2
+            skirt.ruffle: {gt: 1}
+          require:
+            meta.wb: {ne: null}
+            waistband.waist: {le: 1.0}
+
+        The constraint is violated when the 'if' condition holds (or is not given)
+        and the 'require' condition does not.
+
+        Conditions map the parameter paths ('.'-separated) to the expected values:
+        * single value -- equal to the value
+        * list -- equal to one of the values
+        * {op: value} -- comparison with op in eq, ne, lt, le, gt, ge, in, not_in
+        '$<path>' in place of a value refers to the value of another parameter.
+        All the entries of a condition need to hold. 'any', 'all' and 'not' keys
+        combine nested conditions
+    """
+    operators = {
+        'eq': operator.eq, 
+        'ne': operator.ne,
+        'lt': operator.lt,
+        'le': operator.le,
+        'gt': operator.gt,
+        'ge': operator.ge,
+        'in': lambda value, options: value in options,
+        'not_in': lambda value, options: value not in options,
+    }
+
+    def __init__(self, require, condition=None, name='') -> None:
+        self.name = name
+        self.require = require
+        self.condition = condition
+        self._check(require)
+        if condition is not None:
+            self._check(condition)
+
+    @classmethod
+    def from_dict(cls, spec):
+        return cls(spec['require'], spec.get('if'), spec.get('name', ''))
+
+    def is_satisfied(self, design):
+        """Check the constraint on the design parameters"""
+        if self.condition is not None and not self._eval(self.condition, design):
+            return True
+        return self._eval(self.require, design)
+
+    def parameters(self):
+        """Paths of all the design parameters the constraint depends on"""
+        paths = []
+        self._collect_parameters(self.require, paths)
+        if self.condition is not None:
+            self._collect_parameters(self.condition, paths)
+        return paths
+
+    def _collect_parameters(self, condition, paths):
+        for key, spec in condition.items():
+            if key in ['any', 'all']:
+                for sub in spec:
+                    self._collect_parameters(sub, paths)
+            elif key == 'not':
+                self._collect_parameters(spec, paths)
+            else:
+                paths.append(key)
+                operands = spec.values() if isinstance(spec, dict) else (
+                    spec if isinstance(spec, list) else [spec])
+                paths += [operand[1:] for operand in operands 
+                          if isinstance(operand, str) and operand.startswith('$')]
+
+    def _check(self, condition):
+        """Validate the declaration of the condition"""
+        if not isinstance(condition, dict):
+            raise ValueError(
+                f'{self.__class__.__name__}::ERROR::{self.name}::Condition should be a dictionary, got {condition}')
+        for key, spec in condition.items():
+            if key in ['any', 'all']:
+                for sub in spec:
+                    self._check(sub)
+            elif key == 'not':
+                self._check(spec)
+            elif isinstance(spec, dict):
+                for op in spec:
+                    if op not in self.operators:
+                        raise ValueError(
+                            f'{self.__class__.__name__}::ERROR::{self.name}::Unknown operator {op}. '
+                            f'Supported: {list(self.operators.keys())}')
+
+    def _eval(self, condition, design):
+        for key, spec in condition.items():
+            if key == 'any':
+                result = any(self._eval(sub, design) for sub in spec)
+            elif key == 'all':
+                result = all(self._eval(sub, design) for sub in spec)
+            elif key == 'not':
+                result = not self._eval(spec, design)
+            else:
+                value = self._value(key, design)
+                if isinstance(spec, dict):
+                    result = all(self.operators[op](value, self._operand(operand, design)) 
+                                 for op, operand in spec.items())
+                elif isinstance(spec, list):
+                    result = value in [self._operand(operand, design) for operand in spec]
+                else:
+                    result = value == self._operand(spec, design)
+            if not result:
+                return False
+        return True
+
+    def _operand(self, operand, design):
+        if isinstance(operand, str) and operand.startswith('$'):
+            return self._value(operand[1:], design)
+        return operand
+
+    def _value(self, path, design):
+        try:
+            return nested_get(design, path.split('.') + ['v'])
+        except (KeyError, TypeError):
+            raise ValueError(
+                f'{self.__class__.__name__}::ERROR::{self.name}::Unknown design parameter {path}')
+
+
 class DesignSampler:
     """Base class for design parameters sampling """
 
     def __init__(self, param_file='') -> None:
         
         self.params = {}
+        self.constraints = []   # DesignConstraint objects
         if param_file:
             self.load(param_file)
 
     def load(self, param_file):
         """Load new values from file"""
         with open(param_file, 'r') as f:
-            dict = yaml.safe_load(f)['design']
-        self.params.update(dict)
+            file_data = yaml.safe_load(f)
+        self.params.update(file_data['design'])
+        constraints = [DesignConstraint.from_dict(spec) 
+                       for spec in file_data.get('constraints') or []]
+        self._check_constraints(constraints)
+        self.constraints += constraints
+
+    def _check_constraints(self, constraints):
+        """Check that the constraints refer to the existing design parameters"""
+        for constraint in constraints:
+            for path in constraint.parameters():
+                try:
+                    nested_get(self.params, path.split('.') + ['v'])
+                except (KeyError, TypeError):
+                    raise ValueError(
+                        f'{self.__class__.__name__}::ERROR::Constraint {constraint.name} '
+                        f'refers to unknown design parameter {path}')
 
     def default(self):
         return self.params
 
+    # ---- Constraints ----
+    def violated_constraints(self, design):
+        """Constraints (DesignConstraint) not satisfied by the design parameters"""
+        return [c for c in self.constraints if not c.is_satisfied(design)]
+
+    def is_valid(self, design):
+        """Check the design parameters against the declared constraints"""
+        return all(c.is_satisfied(design) for c in self.constraints)
+
     # ---- Randomization of values ----
-    def randomize(self):
-        """Generate random values for the current design parameters"""
+    def randomize(self, max_tries=100):
+        """Generate random values for the current design parameters
 
-        random_params = deepcopy(self.params)
+            The samples violating the declared constraints are re-drawn
+            * max_tries -- max number of samples to draw before giving up
 
-        # NOTE dealing with the nested dict
-        self._randomize_subset(random_params, [])
-        
-        return random_params
+            NOTE: The random draws are the same as without constraints
+                if the first sample is valid
+        """
+        for _ in range(max_tries):
+            random_params = deepcopy(self.params)
+
+            # NOTE dealing with the nested dict
+            self._randomize_subset(random_params, [])
+
+            if self.is_valid(random_params):
+                return random_params
+
+        raise ValueError(
+            f'{self.__class__.__name__}::ERROR::No design satisfying the constraints '
+            f'found in {max_tries} samples')
 
     def _randomize_subset(self, random_params, path):
 
@@ -150,4 +431,88 @@ class DesignSampler:
         if exclude is not None and close_enough(rand_v, exclude):
             return self.__uniform_exclude(range, exclude)  
         
-        return rand_v 
\ No newline at end of file
+        return rand_v 
+
+# ---- Copies of design parameters ----
+class CopyOnWriteDict(dict):
+    """Copy of a nested dictionary (e.g. design parameters) that shares the data
+        with the source dictionary until it is modified:
+        nested dictionaries are copied (shallow) on the first access,
+        leaf values are shared with the source.
+
+        NOTE: In-place modifications of the leaf values (e.g. lists) affect
+        the source dictionary. Assign new values instead
+        NOTE: Modifications of the source dictionary made after the copy are visible
+        in the parts of the copy that have not been accessed yet
+    """
+    def __init__(self, source) -> None:
+        super().__init__(source)
+        self._own = set()   # Keys of the values that belong to this copy
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        if key not in self._own:
+            if isinstance(value, dict):
+                value = CopyOnWriteDict(value)
+                super().__setitem__(key, value)
+            self._own.add(key)
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._own.add(key)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._own.discard(key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *default):
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+        return super().pop(key, *default)
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def copy(self):
+        return CopyOnWriteDict(self.to_dict())
+
+    __copy__ = copy
+
+    def to_dict(self):
+        """Plain dictionary with the current values (shallow)"""
+        return {key: value for key, value in dict.items(self)}
+
+    def __deepcopy__(self, memo):
+        return deepcopy(self.to_dict(), memo)
+
+    def __reduce__(self):
+        return dict, (self.to_dict(), )
+
+
+def copy_design(design, copy_on_write=False):
+    """Copy of the design parameters dictionary to modify within the garment program
+        * copy_on_write -- copy the nested dictionaries lazily, on the first access 
+            (see CopyOnWriteDict) instead of the full deep copy.
+            Suitable for the copies used during construction of the garment components only
+    """
+    if copy_on_write and isinstance(design, dict):
+        return CopyOnWriteDict(design)
+    return deepcopy(design)
@@ -1,3 +1,4 @@
+from copy import deepcopy
 from typing import TypeVar, Generic, Sequence, Callable
 
 import numpy as np
@@ -136,6 +137,62 @@ def nested_del(dic, keys):
     del dic[keys[-1]]
 
 
+# ---- Structural copies ----
+# Helpers for __deepcopy__() implementations that know the fields of their class.
+# Copy rules map attribute names to the functions copier(value, memo);
+# attributes without a rule are deep copied.
+# NOTE: The memo dictionary is updated the same way deepcopy() does it, s.t.
+# the objects shared in the original (e.g. vertices of the neighboring edges,
+# panels referenced in the interfaces) are shared in the copy as well
+_IMMUTABLE_TYPES = {type(None), bool, int, float, complex, str, np.float64, np.int64, np.bool_}
+
+
+def structural_copy(obj, memo, copy_rules):
+    """Copy of the object following the copy rules of its attributes"""
+    cls = obj.__class__
+    new_obj = cls.__new__(cls)
+    memo[id(obj)] = new_obj
+    new_dict = new_obj.__dict__
+    for name, value in obj.__dict__.items():
+        rule = copy_rules.get(name)
+        if rule is not None:
+            new_dict[name] = rule(value, memo)
+        elif type(value) in _IMMUTABLE_TYPES:
+            new_dict[name] = value
+        else:
+            new_dict[name] = deepcopy(value, memo)
+    return new_obj
+
+
+def share(value, memo):
+    """Copy rule for the values that are immutable or never modified in-place"""
+    return value
+
+
+def copy_flat(value, memo):
+    """Copy rule for the lists and arrays of immutable values (e.g. vertex coordinates)"""
+    copied = memo.get(id(value))
+    if copied is None:
+        if type(value) is list:
+            copied = value[:]
+        elif isinstance(value, np.ndarray) and value.dtype != object:
+            copied = value.copy()
+        else:
+            return deepcopy(value, memo)
+        memo[id(value)] = copied
+    return copied
+
+
+def copy_points(value, memo):
+    """Copy rule for the lists of points (e.g. control points of curves)"""
+    copied = memo.get(id(value))
+    if copied is None:
+        if type(value) is not list:
+            return deepcopy(value, memo)
+        copied = memo[id(value)] = [copy_flat(p, memo) for p in value]
+    return copied
+
+
 # ----- Curves ----- 
 def curve_extreme_points(curve, on_x=False, on_y=True):
     """Return extreme points of the current edge
@@ -11,6 +11,8 @@ import svgpathtools as svgpath
 import matplotlib.pyplot as plt
 import shutil
 import pickle
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path   
 import yaml
 from typing import List, Dict, Tuple
@@ -20,12 +22,18 @@ import pygarment.pattern.core as core
 import pygarment.pattern.wrappers as wrappers
 from pygarment.pattern import rotation as rotation_tools
 import pygarment.pattern.utils as pat_utils
+import pygarment.pattern.curves as curves
 import pygarment.meshgen.triangulation_utils as tri_utils
+import pygarment.meshgen.mesh_utils as mesh_utils
+from pygarment.meshgen.triangulation_cache import TriangulationCache
 from pygarment.meshgen.sim_config import PathCofig
-from pygarment.meshgen.render.texture_utils import texture_mesh_islands, save_obj
+from pygarment.meshgen.render.texture_utils import texture_mesh_islands, save_obj, save_npz
 
 # TODOLOW Some stitching errors are not getting detected
 
+# Quantization step (cm) of the vertex coordinates for the vertex hash index
+VERTEX_HASH_PRECISION = 1e-6
+
 # SECTION -- Errors
 class PatternLoadingError(BaseException):
     """To be raised when a pattern cannot be loaded correctly to 3D"""
@@ -66,6 +74,7 @@ class Panel:
         self.edges: List[Edge] = []
         self.n_stitches = 0 #needed later to decide whether vertex is stitch vertex or not
         self.glob_offset = -1
+        self._vertex_index = {}  # Quantized vertex coordinates -> ids in panel_vertices
 
         for edge in np.asarray(panel['edges']):
             edge_obj = Edge(edge, self.corner_vertices, mesh_resolution)
@@ -241,6 +250,17 @@ class Panel:
         return r_t_vertices
 
 
+    def _vertex_key(self, vertex):
+        """Hashable key of a 2D vertex: coordinates quantized with VERTEX_HASH_PRECISION"""
+        return (round(vertex[0] / VERTEX_HASH_PRECISION), round(vertex[1] / VERTEX_HASH_PRECISION))
+
+    def _add_vertex(self, vertex):
+        """Add vertex to panel.panel_vertices and register it in the vertex hash index"""
+        self.panel_vertices.append(vertex)
+        self._vertex_index.setdefault(self._vertex_key(vertex), []).append(len(self.panel_vertices) - 1)
+
+        return len(self.panel_vertices) - 1
+
     def _get_exist_idx(self, find_list):
         """
         This function returns the index of find_list (start or end vertex) in panel.panel_vertices.
@@ -251,25 +271,17 @@ class Panel:
         Output:
             * (int): Index of find_list (start or end vertex) in panel.panel_vertices
         """
-        pvertices = np.array(self.panel_vertices)
-
-        len_pvertices = len(pvertices)
-        if len_pvertices == 0:
-            self.panel_vertices.append(find_list)
-            return 0
-
-        else:
-            index = np.where(np.all(pvertices == find_list, axis=1))
-            n_found_indices = len(index[0])
+        # NOTE: hash lookup instead of the scan over all panel vertices
+        index = self._vertex_index.get(self._vertex_key(find_list), [])
+        n_found_indices = len(index)
 
-            if n_found_indices == 1:  # get index
-                return index[0][0]
-            elif n_found_indices == 0:
-                self.panel_vertices.append(find_list)
-                return len(self.panel_vertices) - 1
-            else: #n_found_indices > 1
-                raise PatternLoadingError(
-                    f'{self.__class__.__name__}::{self.name}::Corner stitch vertex has been added more than once to panel vertices!')
+        if n_found_indices == 1:  # get index
+            return index[0]
+        elif n_found_indices == 0:
+            return self._add_vertex(find_list)
+        else: #n_found_indices > 1
+            raise PatternLoadingError(
+                f'{self.__class__.__name__}::{self.panel_name}::Corner stitch vertex has been added more than once to panel vertices!')
 
 
     def store_edge_verts(self, edge, edge_in_vertices):
@@ -288,7 +300,7 @@ class Panel:
         end_in = begin_in + len(edge_in_vertices)  # exclusive
 
         for v in edge_in_vertices:
-            self.panel_vertices.append(v)
+            self._add_vertex(v)
 
         end_index = self._get_exist_idx(end)
 
@@ -329,39 +341,14 @@ class Panel:
             * keep_pts_f (list): Vertices inside the panel (without newly inserted boundary vertices)
             * f (list): Triangle faces of the panel
         """
-        points = self.panel_vertices
-        len_points = len(points)
-        edge_verts_ids = tri_utils.get_edge_vert_ids(self.edges)
-
-
-        cdt_mesh = tri_utils.Mesh_2_Constrained_Delaunay_triangulation_2()
-        cdt_points_mesh = tri_utils.create_cdt_points(cdt_mesh,points)
-        tri_utils.cdt_insert_constraints(cdt_mesh,cdt_points_mesh,edge_verts_ids)
-
-        #Meshing the triangulation with default shape criterion; i.e. sqrt(1/(4 * 0.125)) = sqrt(2)
-        tri_utils.CGAL_Mesh_2.refine_Delaunay_mesh_2(cdt_mesh,
-                                           tri_utils.Delaunay_mesh_size_criteria_2(0.125, 1.43 * mesh_resolution)) #1.475
-
-        if plot:
-            # Mark faces that are inside the domain
-            face_info = tri_utils.mark_domain(cdt_mesh)
-            tri_utils.plot_triangulation(cdt_mesh, face_info)
+        keep_pts_f, f = tri_utils.triangulate_panel(
+            self.panel_vertices, tri_utils.get_edge_vert_ids(self.edges), mesh_resolution, plot=plot, check=check)
+        self.set_panel_mesh(keep_pts_f, f)
 
-        keep_pts_f = tri_utils.get_keep_vertices(cdt_mesh, len_points)
-
-        # Triangulate mesh without newly inserted boundary points
-        cdt = tri_utils.Constrained_Delaunay_triangulation_2()
-        cdt_points = tri_utils.create_cdt_points(cdt, keep_pts_f)
-        new_points = tri_utils.cdt_insert_constraints(cdt, cdt_points, edge_verts_ids)
-
-        # Faces without accidentially inserted points -- again!
-        # NOTE: point insertion might be a sign of degenerate triangles. 
-        # But instead a separate check was added
-        f = list(tri_utils.get_face_v_ids(cdt, keep_pts_f, new_points, check=check, plot=plot))
-
-        #Store
-        self.panel_vertices = keep_pts_f
-        self.panel_faces = f
+    def set_panel_mesh(self, vertices, faces):
+        """Store the generated panel mesh"""
+        self.panel_vertices = vertices
+        self.panel_faces = list(faces)
 
     def is_manifold(self, tol=1e-2):
         return tri_utils.is_manifold(
@@ -553,15 +540,48 @@ class Seam:
 # !SECTION
 
 # SECTION Box Mesh
+# Worker processes for the panel triangulation, reused between the box meshes
+_triangulation_pool = None
+_triangulation_pool_size = 0
+
+def _get_triangulation_pool(workers):
+    global _triangulation_pool, _triangulation_pool_size
+    if _triangulation_pool is None or _triangulation_pool_size != workers:
+        if _triangulation_pool is not None:
+            _triangulation_pool.shutdown(wait=False, cancel_futures=True)
+        _triangulation_pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'))   # NOTE: CUDA context cannot be shared with forked processes
+        _triangulation_pool_size = workers
+    return _triangulation_pool
+
+def _drop_triangulation_pool():
+    """Stop the worker processes (e.g. when the triangulation was interrupted)"""
+    global _triangulation_pool, _triangulation_pool_size
+    if _triangulation_pool is not None:
+        for process in list((_triangulation_pool._processes or {}).values()):
+            process.kill()
+        _triangulation_pool.shutdown(wait=False, cancel_futures=True)
+    _triangulation_pool = None
+    _triangulation_pool_size = 0
+
+
 class BoxMesh(wrappers.VisPattern):
     """
     Extends a pattern specification in custom JSON format to generate a box mesh from the pattern
         Input:
             * pattern_file: pattern template in custom JSON format
+            * res: mesh resolution
+            * workers: number of processes to triangulate the panels with. 
+                Results do not depend on the number of workers
+            * tri_cache: TriangulationCache object to reuse the triangulations 
+                of the panels with the same outlines
     """
-    def __init__(self, path, res=1.0):
+    def __init__(self, path, res=1.0, workers=1, tri_cache: TriangulationCache = None):
         super(BoxMesh, self).__init__(path)
         self.mesh_resolution = res #Vertices are spread with distance ~mesh_resolution cm
+        self.workers = workers
+        self.tri_cache = tri_cache
         self.loaded = False
         self.panels: Dict[str, Panel] = {}
         self.stitches: List[Seam] = [] 
@@ -700,22 +720,18 @@ class BoxMesh(wrappers.VisPattern):
         """
         n = edge.n_edge_verts
 
-        edge_in_vertices = []
         t_vals = np.linspace(0, 1, n)
 
         if isinstance(edge.curve, svgpath.QuadraticBezier) or isinstance(edge.curve, svgpath.CubicBezier):
-             # to achieve equal spread along bezier curve
-            curve_lengths = np.linspace(0,1,n) * edge.curve.length()
-            t_vals = [edge.curve.ilength(c_len) for c_len in curve_lengths]
+            # to achieve equal spread along bezier curve
+            nodes = curves.svg_curve_nodes(edge.curve)
+            arc_table = curves.bezier_arc_table(nodes)
+            curve_lengths = np.linspace(0, 1, n) * arc_table[1][-1]
+            t_vals = curves.bezier_inverse_length(nodes, curve_lengths, table=arc_table)
 
         ts = t_vals[1:(n - 1)]  # remove start and end from "inside vertices"
-        if isinstance(edge.curve, svgpath.Arc):
-            for t in ts:
-                p = pat_utils.c_to_np(edge.curve.point(t))
-                edge_in_vertices.append(p)
-        else:
-            points = edge.curve.points(ts)  # faster than .point(t) but unavailable for Arc
-            edge_in_vertices = [pat_utils.c_to_np(p) for p in points]
+        # NOTE: batched evaluation for all curve types, including Arcs
+        edge_in_vertices = list(curves.svg_curve_points(edge.curve, ts))
 
 
         if plot:
@@ -743,7 +759,7 @@ class BoxMesh(wrappers.VisPattern):
 
         return edge_in_vertices
 
-    def gen_panel_meshes(self):
+    def gen_panel_meshes(self, workers=None):
         """
         For each Panel:
             * For each edge generate its edge vertices and store them in panel.panel_vertices.
@@ -752,6 +768,9 @@ class BoxMesh(wrappers.VisPattern):
               and panel.panel_triangles, respectively.
         Input:
         * self (BoxMesh object): Instance of BoxMesh class from which the function is called
+        * workers (int): number of processes to triangulate the panels with (defaults to self.workers).
+            The panels are triangulated independently from each other, and the results are
+            collected in the panel order, hence they do not depend on the number of workers
         """
         for panelname in self.panelNames:
             panel = self.panels[panelname]
@@ -771,8 +790,11 @@ class BoxMesh(wrappers.VisPattern):
 
             #Set panel norm
             panel.set_panel_norm()
-            #Generate panel mesh and store them in panel.panel_vertices and panel.panel_faces
-            panel.gen_panel_mesh(self.mesh_resolution)
+
+        #Generate panel meshes and store them in panel.panel_vertices and panel.panel_faces
+        panels = [self.panels[panelname] for panelname in self.panelNames]
+        for panel, (vertices, faces) in zip(panels, self._triangulate_panels(panels, workers)):
+            panel.set_panel_mesh(vertices, faces)
 
             # Sanity check 
             if not panel.is_manifold():
@@ -781,6 +803,36 @@ class BoxMesh(wrappers.VisPattern):
                     ':panel contains degenerate triangles'
                 )
 
+    def _triangulate_panels(self, panels, workers=None):
+        """Panel meshes (vertices, faces) in the order of panels"""
+        workers = self.workers if workers is None else workers
+        workers = min(workers or 1, len(panels))
+        if workers > 1 and multiprocessing.current_process().daemon:
+            # NOTE: Daemon processes (e.g. simulation workers) cannot have child processes
+            print(f'{self.__class__.__name__}::WARNING::{self.name}::Cannot start triangulation '
+                  'workers from a daemon process. Triangulating panels sequentially')
+            workers = 1
+
+        args = [(panel.panel_vertices, tri_utils.get_edge_vert_ids(panel.edges), self.mesh_resolution) 
+                for panel in panels]
+        if self.tri_cache is not None:
+            return self.tri_cache.triangulate_panels(
+                args, lambda args: self._run_triangulation(args, workers))
+        return self._run_triangulation(args, workers)
+
+    def _run_triangulation(self, args, workers):
+        """Triangulate the panels given by the list of tri_utils.triangulate_panel() arguments"""
+        workers = min(workers, len(args))
+        if workers <= 1:
+            return [tri_utils.triangulate_panel(*panel_args) for panel_args in args]
+
+        pool = _get_triangulation_pool(workers)
+        try:
+            return list(pool.map(tri_utils.triangulate_panel, *zip(*args)))
+        except BaseException:   # e.g. meshgen timeout -- don't leave the workers running 
+            _drop_triangulation_pool()
+            raise
+
     # !SECTION
     # SECTION -- Merge mesh vertices in stitches
     def _swap_stitch_ranges(self, stitch:Seam):
@@ -804,115 +856,13 @@ class BoxMesh(wrappers.VisPattern):
 
         return stitch_range_1, stitch_range_2
 
-    def _stitch_same_loc_vertex(self, panel1, loc_id1, glob_idx, stitch_id):
-        """
-        This function stitches two vertices together which are exactly the same local vertex and
-        have not participated in a stitch so far.
-        To this end, self.verts_loc_glob, self.verts_glob_loc, self.vertices, and
-        self.stitch_segmentation are changed accordingly.
-        Input:
-        * self (BoxMesh object): Instance of BoxMesh class from which the function is called
-        * panel1 (Panel object): Panel object participating in stitch
-        * loc_id1 (int): Local identifier of a vertex into panel1.panel_vertices that is stitched together with itself
-        * glob_idx (int): Global index of vertex that is stitched together with itself
-        * stitch_id (int): Stitch identifier indicating which stitch is currently performed
-        """
-        p1_name = panel1.panel_name
-        self.verts_loc_glob[(p1_name, loc_id1)] = glob_idx
-        self.verts_glob_loc.append([(p1_name, loc_id1)])
-        v_2D = panel1.panel_vertices[loc_id1]
-        self.vertices.append(panel1.rot_trans_vertex(v_2D))
-        self.stitch_segmentation.append(["stitch_" + str(stitch_id)])
-
-    def _stitch_two_diff_existent_glob_verts(self, glob1, glob2, glob_idx, stitch_id):
-        """
-        This function stitches two vertices together where both have already participated in a stitch.
-        To this end, self.verts_loc_glob, self.verts_glob_loc, self.vertices, and
-        self.stitch_segmentation are changed accordingly.
-        Input:
-        * self (BoxMesh object): Instance of BoxMesh class from which the function is called
-        * glob1 (int): Global identifier of first stitch vertex into self.vertices
-        * glob2 (int): Global identifier of second stitch vertex into self.vertices
-        * glob_idx (int): Current number of vertices stored in self.vertices
-        * stitch_id (int): Stitch identifier indicating which stitch is currently performed
-        """
-        glob_min = glob1 if glob1 < glob2 else glob2
-        glob_max = glob1 if glob1 > glob2 else glob2
-
-        panels_locids = self.verts_glob_loc[glob_max]
-        for p_name, loc_id in panels_locids:
-            self.verts_loc_glob[(p_name, loc_id)] = glob_min
-
-        repl_glob_ids = list(range(glob_max + 1, glob_idx))
-        panel_locids_above = np.array(self.verts_glob_loc, dtype=object)[repl_glob_ids]
-        for p_id in panel_locids_above:
-            for p_name, loc_id in p_id:
-                self.verts_loc_glob[(p_name, loc_id)] -= 1
-
-        curr_glob_v1 = self.vertices[glob_min]
-        curr_glob_v2 = self.vertices[glob_max]
-        self.vertices[glob_min] = np.mean([curr_glob_v1, curr_glob_v2], axis=0)
-
-        set_verts_glob_loc = set(self.verts_glob_loc[glob_min] + self.verts_glob_loc[glob_max])
-        self.verts_glob_loc[glob_min] = list(set_verts_glob_loc)
-        del self.verts_glob_loc[glob_max]
-        del self.vertices[glob_max]
-
-        copy_stitch_ids = self.stitch_segmentation[glob_max]
-        self.stitch_segmentation[glob_min] += copy_stitch_ids + ["stitch_" + str(stitch_id)]
-        del self.stitch_segmentation[glob_max]
-
-    def _stitch_one_existent_glob_vert(self, panel_glob, panel_not_glob, loc_id_glob, loc_id_not_glob, stitch_id):
-        """
-        This function stitches two vertices together where only one of them has already participated in a stitch.
-        To this end, self.verts_loc_glob, self.verts_glob_loc, self.vertices, and
-        self.stitch_segmentation are changed accordingly.
-        Input:
-        * self (BoxMesh object): Instance of BoxMesh class from which the function is called
-        * panel_glob (Panel object): Panel object referenced by vertex that has already participated in a stitch
-        * panel_not glob (Panel object): Panel object referenced by vertex that has not yet participated in a stitch
-        * loc_id_glob (int): Local identifier of a stitch vertex into panel_glob.panel_vertices. This vertex has 
-        already participated in a stitch.
-        loc_id_not_glob (int): Local identifier of a stitch vertex into panel_not_glob.panel_vertices. This vertex 
-        has not participated in a stitch so far.
-        * stitch_id (int): Stitch identifier indicating which stitch is currently performed
-        """
-        panel_name_glob = panel_glob.panel_name
-        panel_name_not_glob = panel_not_glob.panel_name
-
-        glob = self.verts_loc_glob[(panel_name_glob, loc_id_glob)]
-        self.verts_loc_glob[(panel_name_not_glob, loc_id_not_glob)] = glob
-        self.verts_glob_loc[glob].append((panel_name_not_glob, loc_id_not_glob))
-        v_2D = panel_not_glob.panel_vertices[loc_id_not_glob]
-        v_3D = panel_not_glob.rot_trans_vertex(v_2D)
-        curr_glob_v = self.vertices[glob]
-        self.vertices[glob] = np.mean([v_3D, curr_glob_v], axis=0)
-        self.stitch_segmentation[glob].append("stitch_" + str(stitch_id))
-
-    def _stitch_none_existent_glob_verts(self, panel1, panel2, loc_id1, loc_id2, glob_idx, stitch_id):
-        """
-        This function stitches two vertices together where both of them have not yet participated in a stitch.
-        To this end, self.verts_loc_glob, self.verts_glob_loc, self.vertices, and
-        self.stitch_segmentation are changed accordingly.
-        Input:
-        * self (BoxMesh object): Instance of BoxMesh class from which the function is called
-        * panel1 (Panel object): Panel object referenced by the first stitch vertex
-        * panel2 (Panel object): Panel object referenced by the second stitch vertex
-        * loc_id1 (int): Local identifier of the first stitch vertex into panel1.panel_vertices
-        * loc_id2 (int): Local identifier of the second stitch vertex into panel2.panel_vertices
-        * stitch_id (int): Stitch identifier indicating which stitch is currently performed
-        """
-        p1_name = panel1.panel_name
-        p2_name = panel2.panel_name
-        self.verts_loc_glob[(p1_name, loc_id1)] = glob_idx
-        self.verts_loc_glob[(p2_name, loc_id2)] = glob_idx
-        self.verts_glob_loc.append([(p1_name, loc_id1), (p2_name, loc_id2)])
-        v1_2D = panel1.panel_vertices[loc_id1]
-        v1_3D = panel1.rot_trans_vertex(v1_2D)
-        v2_2D = panel2.panel_vertices[loc_id2]
-        v2_3D = panel2.rot_trans_vertex(v2_2D)
-        self.vertices.append(np.mean([v1_3D, v2_3D], axis=0))
-        self.stitch_segmentation.append(["stitch_" + str(stitch_id)])
+    @staticmethod
+    def _find_root(parent, node):
+        """Root of the node in the union-find forest (with path halving)"""
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
 
     def _stitch_vertices(self):
         """
@@ -925,58 +875,108 @@ class BoxMesh(wrappers.VisPattern):
             * Stores the 3D stitch vertices into self.vertices
             * Stores the stitch_ids to the self.stitch_segmentation list
 
+        Stitched vertices are collapsed with union-find over the array of all panels' stitch vertices: 
+        every global vertex is a set of local vertices, represented by the node created first. 
+        Global vertex ids follow the order of creation of the sets, 
+        and merged sets keep the earliest position.
+
         Output:
         * same_panel_stitching_dict (dict): Dictionary storying the local vertex indices to which a local vertex
         of the same panel is stitched together, i.e.,
         (panel_name, local_vertex_id) = [local vertex ids of same panel stiched together with local_vertex_id)
         """
-        # Collapse stitch vertices
         same_panel_stitching_dict = {} #Store stichings of same panel (panelname,loc_id) -> loc_id
-        glob_idx = 0
-        self.verts_loc_glob = {}
-        self.verts_glob_loc = []
-        self.vertices = []
-        self.stitch_segmentation = []
-        
-        for stitch_id, stitch in enumerate(self.stitches):
-            panel1, panel2 = self.panels[stitch.panel_1], self.panels[stitch.panel_2]
 
+        # Stitch vertices of all panels in one array
+        loc_offsets = {}
+        n_loc = 0
+        v_3D = []
+        for panel_name in self.panelNames:
+            panel = self.panels[panel_name]
+            loc_offsets[panel_name] = n_loc
+            n_loc += panel.n_stitches
+            v_3D += list(panel.rot_trans_panel(panel.panel_vertices[:panel.n_stitches]))
+
+        # Union-find nodes: ids of the local vertices in order of participation in stitches
+        loc_node = np.full(n_loc, -1, dtype=int)  # local vertex -> node
+        node_loc = []   # node -> (panel_name, local id)
+        parent = []
+        node_vertices = []   # Current 3D vertex of a set (for root nodes)
+        node_segmentation = []   # Stitch labels of a set (for root nodes)
+
+        def new_node(panel_name, loc_id, vertex, label):
+            node = len(parent)
+            loc_node[loc_offsets[panel_name] + loc_id] = node
+            node_loc.append((panel_name, loc_id))
+            parent.append(node)
+            node_vertices.append(vertex)
+            node_segmentation.append([label])
+            return node
+
+        def add_to_node(root, panel_name, loc_id):
+            loc_node[loc_offsets[panel_name] + loc_id] = len(parent)
+            node_loc.append((panel_name, loc_id))
+            parent.append(root)
+            node_vertices.append(None)
+            node_segmentation.append(None)
+
+        for stitch_id, stitch in enumerate(self.stitches):
+            label = "stitch_" + str(stitch_id)
+            p1_name, p2_name = stitch.panel_1, stitch.panel_2
             stitch_range_1, stitch_range_2 = self._swap_stitch_ranges(stitch)
 
             # Record same panel connections
-            if stitch.panel_1 == stitch.panel_2:
+            if p1_name == p2_name:
                 s1, e1 = stitch_range_1[0], stitch_range_1[-1]
                 s2, e2 = stitch_range_2[0], stitch_range_2[-1]
                 s_min, s_max = min(s1, s2), max(s1, s2)
                 e_min, e_max = min(e1, e2), max(e1, e2)
-                same_panel_stitching_dict.setdefault((stitch.panel_1, s_min), []).append(s_max)
-                same_panel_stitching_dict.setdefault((stitch.panel_2, e_min), []).append(e_max)
+                same_panel_stitching_dict.setdefault((p1_name, s_min), []).append(s_max)
+                same_panel_stitching_dict.setdefault((p2_name, e_min), []).append(e_max)
 
             # Perform matching
-            for loc_id1, loc_id2 in zip(stitch_range_1, stitch_range_2):
-                if stitch.panel_1 == stitch.panel_2 and loc_id1 == loc_id2: #same vertex
-                    if (stitch.panel_1, loc_id1) not in self.verts_loc_glob.keys():
-                        self._stitch_same_loc_vertex(panel1, loc_id1, glob_idx, stitch_id)
-                        glob_idx += 1
+            ids_1 = np.asarray(stitch_range_1) + loc_offsets[p1_name]
+            ids_2 = np.asarray(stitch_range_2) + loc_offsets[p2_name]
+            for loc_id1, loc_id2, id1, id2 in zip(stitch_range_1, stitch_range_2, ids_1, ids_2):
+                node1, node2 = loc_node[id1], loc_node[id2]
+                if id1 == id2: #same vertex
+                    if node1 < 0:
+                        new_node(p1_name, loc_id1, v_3D[id1], label)
                     else:
-                        glob_id = self.verts_loc_glob[(stitch.panel_1, loc_id1)]
-                        self.stitch_segmentation[glob_id].append("stitch_" + str(stitch_id))
-                else:
-                    v1_glob_exists = (stitch.panel_1, loc_id1) in self.verts_loc_glob.keys()
-                    v2_glob_exists = (stitch.panel_2, loc_id2) in self.verts_loc_glob.keys()
-                    if v1_glob_exists and v2_glob_exists: #both exist
-                        glob1 = self.verts_loc_glob[(stitch.panel_1, loc_id1)]
-                        glob2 = self.verts_loc_glob[(stitch.panel_2, loc_id2)]
-                        if glob1 != glob2:
-                            self._stitch_two_diff_existent_glob_verts(glob1, glob2, glob_idx, stitch_id)
-                            glob_idx -= 1
-                    elif v1_glob_exists:
-                        self._stitch_one_existent_glob_vert(panel1, panel2, loc_id1, loc_id2, stitch_id)
-                    elif v2_glob_exists:
-                        self._stitch_one_existent_glob_vert(panel2, panel1, loc_id2, loc_id1, stitch_id)
-                    else: #none exist
-                        self._stitch_none_existent_glob_verts(panel1, panel2, loc_id1, loc_id2, glob_idx, stitch_id)
-                        glob_idx += 1
+                        node_segmentation[self._find_root(parent, node1)].append(label)
+                elif node1 >= 0 and node2 >= 0: #both exist
+                    root1, root2 = self._find_root(parent, node1), self._find_root(parent, node2)
+                    if root1 != root2:
+                        # The set created earlier absorbs the other one
+                        root_min, root_max = min(root1, root2), max(root1, root2)
+                        parent[root_max] = root_min
+                        node_vertices[root_min] = np.mean(
+                            [node_vertices[root_min], node_vertices[root_max]], axis=0)
+                        node_segmentation[root_min] += node_segmentation[root_max] + [label]
+                elif node1 >= 0 or node2 >= 0:  # one exists
+                    if node1 >= 0:
+                        node, p_name_new, loc_id_new, id_new = node1, p2_name, loc_id2, id2
+                    else:
+                        node, p_name_new, loc_id_new, id_new = node2, p1_name, loc_id1, id1
+                    root = self._find_root(parent, node)
+                    add_to_node(root, p_name_new, loc_id_new)
+                    node_vertices[root] = np.mean([v_3D[id_new], node_vertices[root]], axis=0)
+                    node_segmentation[root].append(label)
+                else: #none exist
+                    root = new_node(p1_name, loc_id1, np.mean([v_3D[id1], v_3D[id2]], axis=0), label)
+                    add_to_node(root, p2_name, loc_id2)
+
+        # Global vertices in the order of their root nodes
+        roots = np.array([self._find_root(parent, node) for node in range(len(parent))], dtype=int)
+        glob_roots = np.flatnonzero(roots == np.arange(len(roots)))
+        node_glob = np.searchsorted(glob_roots, roots)
+
+        self.vertices = [node_vertices[root] for root in glob_roots]
+        self.stitch_segmentation = [node_segmentation[root] for root in glob_roots]
+        self.verts_loc_glob = dict(zip(node_loc, node_glob.tolist()))
+        self.verts_glob_loc = [[] for _ in glob_roots]
+        for loc, glob in zip(node_loc, node_glob):
+            self.verts_glob_loc[glob].append(loc)
 
         return same_panel_stitching_dict
 
@@ -1208,6 +1208,19 @@ class BoxMesh(wrappers.VisPattern):
 
         return glob_indices
 
+    def _get_glob_ids_array(self, panel, faces):
+        """
+        Vectorized version of _get_glob_ids() for the (N x 3) array of panel faces
+        """
+        n_stitches_panel = panel.n_stitches
+        stitch_glob_ids = np.array(
+            [self.verts_loc_glob[(panel.panel_name, loc_id)] for loc_id in range(n_stitches_panel)], 
+            dtype=int)
+        return np.where(
+            faces < n_stitches_panel,
+            stitch_glob_ids[np.minimum(faces, max(n_stitches_panel - 1, 0))] if n_stitches_panel else 0,
+            faces + panel.glob_offset - n_stitches_panel)
+
     def calc_norm(self, a, b, c):
         """
         This function calculates the norm based on the three points a, b, and c.
@@ -1454,31 +1467,36 @@ class BoxMesh(wrappers.VisPattern):
 
     # !SECTION
     # SECTION -- Serialization routines
-    def eval_vertex_normals(self):
-        vertex_normals = np.zeros((len(self.vertices), 4))
+    def eval_vertex_normals(self, weighting='uniform'):
+        """
+        Vertex normals of the box mesh. Normals of the faces without stitch vertices 
+        are the normals of their (flat) panels
+            * weighting -- weighting of the face normals (see mesh_utils.vertex_normals())
+        """
+        faces, face_norms = [], []
+        vertices = np.asarray(self.vertices)
         for panelname in self.panelNames:
             panel = self.panels[panelname]
             n_stitches_panel = panel.n_stitches
 
-            for face in panel.panel_faces:
-                f_glob_ids = self._get_glob_ids(panel, face)
-                loc_stitch_ids = [loc_id for loc_id in face if loc_id < n_stitches_panel]
-                if loc_stitch_ids:
-                    v0, v1, v2 = np.array(self.vertices)[f_glob_ids]
-                    face_norm = list(self.calc_norm(v0, v1, v2))
-                else:
-                    face_norm = panel.norm
+            loc_faces = np.asarray(panel.panel_faces, dtype=int).reshape(-1, 3)
+            f_glob_ids = self._get_glob_ids_array(panel, loc_faces)
+            panel_face_norms = np.tile(np.asarray(panel.norm, dtype=float), (len(loc_faces), 1))
+            stitch_faces = np.any(loc_faces < n_stitches_panel, axis=1)
+            panel_face_norms[stitch_faces] = mesh_utils.face_normals(vertices, f_glob_ids[stitch_faces])
 
-                temp_update = face_norm + [1]
-                vertex_normals[f_glob_ids] += temp_update
+            faces.append(f_glob_ids)
+            face_norms.append(panel_face_norms)
 
-        vertex_normals = vertex_normals[:, :3] / (vertex_normals[:, 3][:, np.newaxis])
-        return vertex_normals
+        if not faces:  # Empty pattern
+            return np.zeros((0, 3))
 
-    def save_vertex_labels(self):
-        """Save labeled vertices"""
+        return mesh_utils.vertex_normals(
+            vertices, np.concatenate(faces), 
+            weighting=weighting, face_norms=np.concatenate(face_norms))
 
-        # Add labels on stitched vertices using stitch_id_label
+    def _add_stitch_vertex_labels(self):
+        """Add labels on stitched vertices using stitch_id_label"""
         for v_id, seg_labels in enumerate(self.stitch_segmentation):
             if 'stitch' not in seg_labels[0]:  # Processed all stitches
                 break
@@ -1488,6 +1506,11 @@ class BoxMesh(wrappers.VisPattern):
                 if label is not None:   # Found a labeled vertex!
                     self.vertex_labels.setdefault(label, []).append(v_id)
 
+    def save_vertex_labels(self):
+        """Save labeled vertices"""
+
+        self._add_stitch_vertex_labels()
+
         # Save to yaml
         with open(self.paths.g_vert_labels, 'w') as file:
             yaml.dump(self.vertex_labels, file, default_flow_style=False, sort_keys=False)
@@ -1504,37 +1527,74 @@ class BoxMesh(wrappers.VisPattern):
             print(f'{self.__class__.__name__}::{self.name}::WARNING::Pattern is not yet loaded. Nothing saved')
             return
         
+        uvs = self._texture_uvs(in_uv_config, mat_name=mat_name)
+        save_obj(
+            self.paths.g_box_mesh, 
+            self.vertices, 
+            self.faces_with_texture, 
+            uvs, 
+            vert_normals=self.eval_vertex_normals() if with_normals else None,
+            mtl_file_name=self.paths.g_mtl.name,
+            mat_name=mat_name
+        )
+            
+    def save_box_mesh_npz(self, with_normals=False, in_uv_config={}):
+        """
+        This function stores the box mesh together with segmentation, vertex labels and
+        original edge lengths as a single binary .npz file (alternative to .obj and annotation files)
+        Input:
+            * self (BoxMesh object): Instance of BoxMesh class from which the function is called
+        """
+        if not self.loaded:
+            print(f'{self.__class__.__name__}::{self.name}::WARNING::Pattern is not yet loaded. Nothing saved')
+            return
+
+        uvs = self._texture_uvs(in_uv_config, with_mtl=False)
+        self._add_stitch_vertex_labels()
+
+        # Same choice of texture as in mtl file of obj
+        texture_path = (self.paths.g_texture_fabric if in_uv_config.get('fabric_grain_texture_path') 
+                        else self.paths.g_texture)
+        save_npz(
+            self.paths.g_box_mesh_npz,
+            self.vertices, 
+            self.faces_with_texture, 
+            uvs,
+            vert_normals=self.eval_vertex_normals() if with_normals else None,
+            texture_file_name=texture_path.name,
+            segmentation=self.stitch_segmentation,
+            vertex_labels=self.vertex_labels,
+            orig_lens=self.orig_lens
+        )
+
+    def _texture_uvs(self, in_uv_config={}, with_mtl=True, mat_name='panels_texture'):
+        """Create texture images for the box mesh and return the UV coordinates aligned with them"""
         uv_config = {  # Defaults
             'seam_width': 0.5,
             'dpi': 600,
             'fabric_grain_texture_path': None,  
             'fabric_grain_resolution': 1,
+            'backend': 'matplotlib',   # 'matplotlib' or 'raster'
+            'antialiasing': 4,
         }
         # Update with incoming values, if any
         uv_config.update(in_uv_config)
 
-        uvs = texture_mesh_islands(
+        return texture_mesh_islands(
             texture_coords=np.array(self.vertex_texture),
             face_texture_coords=np.array([[tex_id0, tex_id1, tex_id2] for _, tex_id0, _, tex_id1, _, tex_id2, in self.faces_with_texture]), 
             out_texture_image_path=self.paths.g_texture,
             out_fabric_tex_image_path=self.paths.g_texture_fabric,
-            out_mtl_file_path=self.paths.g_mtl,
+            out_mtl_file_path=self.paths.g_mtl if with_mtl else None,
             boundary_width=uv_config['seam_width'], 
             dpi=uv_config['dpi'], 
             background_img_path=uv_config['fabric_grain_texture_path'],
             background_resolution=uv_config['fabric_grain_resolution'],
-            mat_name=mat_name
+            mat_name=mat_name,
+            backend=uv_config['backend'],
+            antialiasing=uv_config['antialiasing']
         )
-        save_obj(
-            self.paths.g_box_mesh, 
-            self.vertices, 
-            self.faces_with_texture, 
-            uvs, 
-            vert_normals=self.eval_vertex_normals() if with_normals else None,
-            mtl_file_name=self.paths.g_mtl.name,
-            mat_name=mat_name
-        )
-            
+
     def save_segmentation(self):
         """
         This function stores the self.stitch_segmentation list as a txt file to save_path.
@@ -1581,7 +1641,8 @@ class BoxMesh(wrappers.VisPattern):
                   empty_ok=False,
                   with_v_norms=False, 
                   store_panels=False,
-                  uv_config={}
+                  uv_config={},
+                  binary=False
         ):
         """
         This function stores (annotated) visualisations (png,svg) of the pattern, the box mesh as an .obj file,
@@ -1594,6 +1655,8 @@ class BoxMesh(wrappers.VisPattern):
             * with_3d (bool): if True, stores the pattern in 3d
             * annotated (bool): if True, stores visualisations without annotations
             * not_annotated (bool): if True, stores visualisations with annotations
+            * binary (bool): if True, stores the box mesh with all the annotations in a single .npz file 
+                instead of .obj, .txt, .pickle and .yaml files
         """
         if not self.loaded:
             print(f'{self.__class__.__name__}::{self.name}::WARNING::Pattern is not yet loaded. Nothing saved')
@@ -1611,10 +1674,13 @@ class BoxMesh(wrappers.VisPattern):
             print(f"Stored panels to {folder_path}...")
 
 
-        self.save_box_mesh_obj(with_normals=with_v_norms, in_uv_config=uv_config)
-        self.save_segmentation()
-        self.save_orig_lens()
-        self.save_vertex_labels()
+        if binary:
+            self.save_box_mesh_npz(with_normals=with_v_norms, in_uv_config=uv_config)
+        else:
+            self.save_box_mesh_obj(with_normals=with_v_norms, in_uv_config=uv_config)
+            self.save_segmentation()
+            self.save_orig_lens()
+            self.save_vertex_labels()
 
         # Copy yaml files
         if self.paths.in_design_params.exists():
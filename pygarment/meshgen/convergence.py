@@ -0,0 +1,292 @@
+"""Convergence (early termination) criteria of the drape simulation
+
+    The simulation is stopped when the convergence scheduler reports that the
+    garment has settled. The scheduler evaluates a set of criteria
+    (see CONVERGENCE_CRITERIA) every check_interval frames, optionally adapting
+    the interval to how far the garment is from convergence.
+
+    New criteria can be added by subclassing ConvergenceCriterion and registering
+    the class in CONVERGENCE_CRITERIA
+"""
+
+from collections import deque
+
+import numpy as np
+
+
+class ConvergenceCriterion:
+    """Base class of convergence criteria"""
+    name = None
+
+    def __init__(self) -> None:
+        self.metrics = {}   # Values evaluated on the last check
+
+    @classmethod
+    def from_config(cls, config):
+        """Create criterion from the simulation config (SimConfig)"""
+        return cls()
+
+    def check(self, garment) -> bool:
+        """Whether the garment (Cloth object) has converged at the current frame"""
+        raise NotImplementedError
+
+    def distance(self):
+        """How far the garment is from convergence:
+            <= 1 -- converged, > 1 -- not converged (larger means further away).
+            None if unknown
+        """
+        return None
+
+
+def _vertex_speeds(garment):
+    """Speed of the cloth vertices between the last two frames"""
+    if garment.last_verts is None:
+        return None
+    displacement = np.asarray(garment.current_verts) - np.asarray(garment.last_verts)
+    return np.linalg.norm(displacement, axis=1) * garment.sim_fps
+
+
+class StaticCriterion(ConvergenceCriterion):
+    """Default check: the number of vertices that moved further than
+        static_threshold (L1) since the last frame is below non_static_percent
+        (see Cloth.is_static())
+    """
+    name = 'static'
+
+    def __init__(self, non_static_percent=1.5) -> None:
+        super().__init__()
+        self.non_static_percent = non_static_percent
+        self._distance = None
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config.non_static_percent)
+
+    def check(self, garment) -> bool:
+        static, non_static_len = garment.is_static()
+        allowed = len(garment.current_verts) * 0.01 * self.non_static_percent
+        self.metrics = {'non_static_vertices': int(non_static_len)}
+        self._distance = non_static_len / allowed if allowed else float(non_static_len > 0)
+        return static
+
+    def distance(self):
+        return self._distance
+
+
+class VelocityCriterion(ConvergenceCriterion):
+    """Speed of (almost) all vertices is below the threshold"""
+    name = 'velocity'
+
+    def __init__(self, threshold=1.0, percent=1.5) -> None:
+        """
+            * threshold -- max vertex speed (cm/s)
+            * percent -- percent of the vertices allowed to move faster
+        """
+        super().__init__()
+        self.threshold = threshold
+        self.percent = percent
+        self._distance = None
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config.velocity_threshold, config.velocity_percent)
+
+    def check(self, garment) -> bool:
+        speeds = _vertex_speeds(garment)
+        if speeds is None:
+            return False
+        n_fast = int(np.count_nonzero(speeds > self.threshold))
+        allowed = len(speeds) * 0.01 * self.percent
+        self.metrics = {
+            'fast_vertices': n_fast,
+            'max_speed': float(speeds.max()),
+            'mean_speed': float(speeds.mean())}
+        self._distance = (n_fast + 1) / (allowed + 1)
+        return n_fast < allowed or n_fast == 0
+
+    def distance(self):
+        return self._distance
+
+
+class KineticEnergyCriterion(ConvergenceCriterion):
+    """Kinetic energy of the cloth per unit mass is below the threshold"""
+    name = 'kinetic_energy'
+
+    def __init__(self, threshold=0.5) -> None:
+        """
+            * threshold -- max kinetic energy per unit mass ((cm/s)^2)
+        """
+        super().__init__()
+        self.threshold = threshold
+        self._masses = None
+        self._distance = None
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config.kinetic_energy_threshold)
+
+    def _particle_masses(self, garment, n_verts):
+        if self._masses is None:
+            try:
+                masses = np.asarray(garment.model.particle_mass.numpy(), dtype=float)
+            except AttributeError:
+                masses = None
+            if masses is None or len(masses) != n_verts or masses.sum() <= 0:
+                masses = np.ones(n_verts)
+            self._masses = masses
+        return self._masses
+
+    def check(self, garment) -> bool:
+        speeds = _vertex_speeds(garment)
+        if speeds is None:
+            return False
+        masses = self._particle_masses(garment, len(speeds))
+        energy = float(0.5 * np.sum(masses * speeds ** 2) / masses.sum())
+        self.metrics = {'kinetic_energy': energy}
+        self._distance = energy / self.threshold if self.threshold else float('inf')
+        return energy < self.threshold
+
+    def distance(self):
+        return self._distance
+
+
+class PlateauCriterion(ConvergenceCriterion):
+    """Mean vertex speed stays (relatively) constant over a window of checks.
+        NOTE: Detects steady motion as well as rest -- e.g. garments sliding down
+        the body are stopped early and recognized later by the quality checks
+    """
+    name = 'plateau'
+
+    def __init__(self, window=20, tolerance=0.05, min_speed=1.0) -> None:
+        """
+            * window -- number of the last checks to evaluate
+            * tolerance -- max spread of the mean speed within the window,
+                relative to the mean speed
+            * min_speed -- (cm/s) lower bound of the speed the tolerance is relative to,
+                so that the (almost) resting cloth is not required to keep its tiny speed constant
+        """
+        super().__init__()
+        self.window = window
+        self.tolerance = tolerance
+        self.min_speed = min_speed
+        self.history = deque(maxlen=window)
+        self._distance = None
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config.plateau_window, config.plateau_tolerance, config.velocity_threshold)
+
+    def check(self, garment) -> bool:
+        speeds = _vertex_speeds(garment)
+        if speeds is None:
+            return False
+        self.history.append(float(speeds.mean()))
+        if len(self.history) < self.window:
+            self.metrics = {'mean_speed': self.history[-1]}
+            return False
+
+        spread = max(self.history) - min(self.history)
+        scale = max(np.mean(self.history), self.min_speed, 1e-9)
+        self.metrics = {'mean_speed': self.history[-1], 'relative_spread': spread / scale}
+        self._distance = spread / (self.tolerance * scale) if self.tolerance else float('inf')
+        return spread <= self.tolerance * scale
+
+    def distance(self):
+        return self._distance
+
+
+CONVERGENCE_CRITERIA = {
+    cls.name: cls for cls in [StaticCriterion, VelocityCriterion, KineticEnergyCriterion, PlateauCriterion]
+}
+
+
+class ConvergenceScheduler:
+    """Decides when to check the convergence criteria and whether the simulation can be stopped"""
+    def __init__(self, criteria, mode='any',
+                 start_frame=0, check_interval=1,
+                 adaptive_interval=False, max_check_interval=16) -> None:
+        """
+            * criteria -- list of ConvergenceCriterion objects
+            * mode -- 'any' (stop when any of the criteria is satisfied) or 'all'
+            * start_frame -- first frame to check
+            * check_interval -- (initial) number of frames between the checks
+            * adaptive_interval -- grow the interval (up to max_check_interval)
+                while the garment is far from convergence, and shrink it back when it gets close
+        """
+        if mode not in ['any', 'all']:
+            raise ValueError(f'{self.__class__.__name__}::ERROR::Unknown mode {mode}')
+        if not criteria:
+            raise ValueError(f'{self.__class__.__name__}::ERROR::No convergence criteria given')
+        self.criteria = criteria
+        self.mode = mode
+        self.start_frame = start_frame
+        self.check_interval = max(int(check_interval), 1)
+        self.adaptive_interval = adaptive_interval
+        self.max_check_interval = max(int(max_check_interval), self.check_interval)
+
+        self.interval = self.check_interval
+        self.next_check = start_frame
+        self.checks = 0
+        self.converged_by = None
+        self.converged_frame = None
+
+    @classmethod
+    def from_config(cls, config):
+        """Scheduler defined by the simulation config (SimConfig)"""
+        criteria = []
+        for name in config.convergence_criteria:
+            if name not in CONVERGENCE_CRITERIA:
+                raise ValueError(f'{cls.__name__}::ERROR::Unknown convergence criterion {name}. '
+                                 f'Supported: {list(CONVERGENCE_CRITERIA.keys())}')
+            criteria.append(CONVERGENCE_CRITERIA[name].from_config(config))
+
+        return cls(
+            criteria,
+            mode=config.convergence_mode,
+            start_frame=max(config.zero_gravity_steps, config.min_sim_steps),
+            check_interval=config.convergence_check_interval,
+            adaptive_interval=config.convergence_adaptive_interval,
+            max_check_interval=config.convergence_max_check_interval
+        )
+
+    def should_check(self, frame):
+        return frame >= self.next_check
+
+    def update(self, garment, frame):
+        """Evaluate the criteria at the current frame. Returns True if converged"""
+        self.checks += 1
+        results = [criterion.check(garment) for criterion in self.criteria]
+        converged = any(results) if self.mode == 'any' else all(results)
+        if converged:
+            self.converged_by = [c.name for c, result in zip(self.criteria, results) if result]
+            self.converged_frame = frame
+
+        if self.adaptive_interval:
+            self._adapt_interval()
+        self.next_check = frame + self.interval
+
+        return converged
+
+    def _adapt_interval(self):
+        distances = [c.distance() for c in self.criteria]
+        distances = [d for d in distances if d is not None]
+        if not distances:
+            return
+        # Closest criterion for 'any' mode, furthest one for 'all'
+        distance = min(distances) if self.mode == 'any' else max(distances)
+        if distance > 4:
+            self.interval = min(self.interval * 2, self.max_check_interval)
+        elif distance > 2:
+            pass
+        else:
+            self.interval = self.check_interval
+
+    def diagnostics(self):
+        """Convergence info for the simulation stats"""
+        return {
+            'converged_by': self.converged_by,
+            'frame': self.converged_frame,
+            'checks': self.checks,
+            'check_interval': self.interval,
+            'metrics': {c.name: dict(c.metrics) for c in self.criteria}
+        }
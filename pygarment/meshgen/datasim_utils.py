@@ -2,22 +2,29 @@
 
 # Basic
 import time
+import itertools
 import multiprocessing
+from multiprocessing.connection import wait
 import platform
 import signal
+from collections import deque
+from copy import deepcopy
 from pathlib import Path
 
 # BoxMeshGen
 import pygarment.meshgen.boxmeshgen as bmg
 from pygarment.meshgen.boxmeshgen import BoxMesh
+from pygarment.meshgen.triangulation_cache import TriangulationCache
 from pygarment.meshgen.sim_config import PathCofig
 
 # Warp simulation
 from pygarment.meshgen.simulation import run_sim
+from pygarment.meshgen.garment import SimBodyCache
 
 
 def batch_sim(data_path, output_path, dataset_props,
-              run_default_body=False, num_samples=None, caching=False, force_restart=False):
+              run_default_body=False, num_samples=None, caching=False, force_restart=False,
+              journal=False):
     """
         Performs pattern simulation for each example in the dataset
         given by dataset_props.
@@ -40,6 +47,9 @@ def batch_sim(data_path, output_path, dataset_props,
             * num_samples -- number of (unprocessed) samples from dataset to process with this run. If None, runs over all unprocessed samples
             * caching -- enables caching of every frame of simulation (disabled by default)
             * force_restart -- force restarting the batch processing even if resume conditions are met.
+            * journal -- log the per-sample updates of dataset properties to an append-only journal 
+                instead of re-writing the whole properties file after every sample (see Properties.start_journal()). 
+                The journal is compacted into the properties file when the batch is finished
 
     """
     # ----- Init -----
@@ -52,18 +62,26 @@ def batch_sim(data_path, output_path, dataset_props,
     body_type = 'default_body' if run_default_body else 'random_body'
     data_props_file = output_path / f'dataset_properties_{body_type}.yaml'
     pattern_names = _get_pattern_names(data_path)
+    if journal:
+        _start_props_journal(dataset_props, data_props_file)
+
+    # NOTE: Stats of every sample are collected separately and then added 
+    # to the dataset properties (and the journal)
+    clean_stats = _clean_sample_stats(dataset_props)
+    body_cache = SimBodyCache()
 
     # Simulate every template
     count = 0
     for pattern_name in pattern_names:
         # skip processed cases -- in case of resume. First condition needed to skip checking second one on False =)
-        if resume and pattern_name in dataset_props['sim']['stats']['processed']:
+        if resume and dataset_props.contains(['sim', 'stats', 'processed'], pattern_name):
             print(f'Skipped as already processed {pattern_name}')
             continue
 
-        dataset_props['sim']['stats']['processed'].append(pattern_name)
-        _serialize_props_with_sim_stats(dataset_props,
-                                        data_props_file)  # save info of processed files before potential crash
+        dataset_props.record('append', ['sim', 'stats', 'processed'], pattern_name)
+        if not journal:
+            _serialize_props_with_sim_stats(dataset_props,
+                                            data_props_file)  # save info of processed files before potential crash
 
         try:
             paths = PathCofig(
@@ -79,7 +97,9 @@ def batch_sim(data_path, output_path, dataset_props,
             print("***Pattern loading failed (paths)***")
             dataset_props.add_fail('sim', 'crashes', pattern_name)
         else:
-            template_simulation(paths, dataset_props, caching=caching)
+            sample_props = _sample_props(dataset_props, clean_stats)
+            template_simulation(paths, sample_props, caching=caching, body_cache=body_cache)
+            _merge_sample_stats(dataset_props, _get_sample_stats(sample_props))
 
         count += 1  # count actively processed cases
         if num_samples is not None and count >= num_samples:  # only process requested number of samples
@@ -90,8 +110,8 @@ def batch_sim(data_path, output_path, dataset_props,
     try:
         if len(dataset_props['sim']['stats']['processed']) >= len(pattern_names):
             # processing successfully finished -- no need to resume later
-            del dataset_props['sim']['stats']['processed']
-            dataset_props['frozen'] = True
+            dataset_props.record('delete', ['sim', 'stats', 'processed'])
+            dataset_props.record('set', ['frozen'], True)
             process_finished = True
         else:
             process_finished = False
@@ -102,13 +122,141 @@ def batch_sim(data_path, output_path, dataset_props,
 
     # Logs
     _serialize_props_with_sim_stats(dataset_props, data_props_file)
+    dataset_props.stop_journal()
+
+    return process_finished
+
+
+def pool_batch_sim(data_path, output_path, dataset_props,
+                   run_default_body=False, num_samples=None, caching=False, force_restart=False,
+                   workers=2, max_sample_time=None, max_retries=1, journal=False):
+    """
+        Performs pattern simulation for each example in the dataset in
+        a pool of supervised worker processes. 
+
+        Every worker imports the simulation modules once and then processes 
+        samples one after another. Crashed (e.g. by CUDA errors) or hanging workers are 
+        terminated and restarted by the supervisor (this process), so the failure 
+        only affects the sample being processed. 
+
+        Parameters (in addition to the ones of batch_sim()):
+            * workers -- number of worker processes
+            * max_sample_time -- wall-clock limit (seconds) on processing a single sample 
+                (meshgen + simulation + rendering). If None, derived from the sim config
+            * max_retries -- number of re-tries for the samples that crashed or timed-out 
+                their worker before recording them as failures
+    """
+    # ----- Init -----
+    if 'frozen' in dataset_props and dataset_props['frozen']:
+        # avoid accidential re-runs of data
+        print('Warning: dataset is frozen, processing is skipped')
+        return True
+
+    resume = init_sim_props(dataset_props, batch_run=True, force_restart=force_restart)
+    body_type = 'default_body' if run_default_body else 'random_body'
+    data_props_file = output_path / f'dataset_properties_{body_type}.yaml'
+    pattern_names = _get_pattern_names(data_path)
+    if journal:
+        _start_props_journal(dataset_props, data_props_file)
+
+    sim_config = dataset_props['sim']['config']
+    if max_sample_time is None:
+        max_sample_time = (get_dict_default_value(sim_config, 'max_meshgen_time', 20) 
+                           + get_dict_default_value(sim_config, 'max_sim_time', 1500) 
+                           + 60)  # rendering and saving
+    
+    to_process = deque()
+    for pattern_name in pattern_names:
+        if resume and dataset_props.contains(['sim', 'stats', 'processed'], pattern_name):
+            print(f'Skipped as already processed {pattern_name}')
+            continue
+        to_process.append(pattern_name)
+        if num_samples is not None and len(to_process) >= num_samples:  # only process requested number of samples
+            break
+
+    # ----- Supervised processing -----
+    ctx = multiprocessing.get_context('spawn')   # NOTE: CUDA context cannot be shared with forked processes
+    pool = [_SimWorker(ctx, i, data_path, output_path, dataset_props, run_default_body, caching) 
+            for i in range(min(workers, len(to_process)))]
+    attempts = {}
+    attempt_ids = itertools.count()
+
+    def finish(pattern_name):
+        dataset_props.record('append', ['sim', 'stats', 'processed'], pattern_name)
+        if not journal:
+            _serialize_props_with_sim_stats(dataset_props, data_props_file)
+
+    try:
+        while to_process or any(w.task is not None for w in pool):
+            # Assign tasks
+            for worker in pool:
+                if worker.task is None and to_process:
+                    pattern_name = to_process.popleft()
+                    attempts[pattern_name] = attempts.get(pattern_name, 0) + 1
+                    worker.assign(pattern_name, next(attempt_ids))
+
+            # Collect results
+            busy = {worker.conn: worker for worker in pool if worker.task is not None}
+            ready = wait(list(busy.keys()), timeout=1)
+            for conn in ready:
+                worker = busy[conn]
+                try:
+                    attempt_id, pattern_name, sample_stats = conn.recv()
+                except (EOFError, OSError):   # Worker died -- handled below
+                    continue
+                if attempt_id == worker.attempt_id:  # Otherwise -- the result of an earlier attempt
+                    worker.task = None
+                    _merge_sample_stats(dataset_props, sample_stats)
+                    finish(pattern_name)
+
+            # Supervise
+            for worker in pool:
+                if worker.task is None:
+                    continue
+                if not worker.is_alive():
+                    fail_type = 'crashes'
+                    print(f'\n***Sim worker {worker.id} crashed on {worker.task} '
+                          f'with exit code {worker.process.exitcode}***')
+                elif time.time() - worker.start_time > max_sample_time:
+                    fail_type = 'sample_timeout'
+                    print(f'\n***Sim worker {worker.id} timed out on {worker.task}***')
+                else:
+                    continue
+                
+                pattern_name = worker.task
+                worker.restart()
+                if attempts[pattern_name] <= max_retries:
+                    to_process.appendleft(pattern_name)
+                else:
+                    dataset_props.add_fail('sim', fail_type, pattern_name)
+                    finish(pattern_name)
+
+    finally:
+        for worker in pool:
+            worker.stop()
+
+    # Fin
+    print(f'\nFinished batch of {data_path}')  
+    if len(dataset_props['sim']['stats']['processed']) >= len(pattern_names):
+        # processing successfully finished -- no need to resume later
+        dataset_props.record('delete', ['sim', 'stats', 'processed'])
+        dataset_props.record('set', ['frozen'], True)
+        process_finished = True
+    else:
+        process_finished = False
+
+    # Logs
+    _serialize_props_with_sim_stats(dataset_props, data_props_file)
+    dataset_props.stop_journal()
 
     return process_finished
 
 
 def resim_fails(data_path, output_path, dataset_props,
-              run_default_body=False, caching=False):
-    """Resimulate failure cases -- maybe some of them would get fixed"""
+              run_default_body=False, caching=False, workers=1, journal=False):
+    """Resimulate failure cases -- maybe some of them would get fixed
+        If workers > 1, the samples are processed with pool_batch_sim()
+    """
 
     print('************** RESIMULATING FAILS ****************')
 
@@ -136,16 +284,189 @@ def resim_fails(data_path, output_path, dataset_props,
         sim_stats['processed'].remove(sample)
 
     # Start simulation again
-    finished = batch_sim(
-        data_path, output_path, dataset_props, 
-        run_default_body=run_default_body, 
-        num_samples=len(to_resim)+1, 
-        caching=caching, 
-        force_restart=False
-    )
+    if workers > 1:
+        finished = pool_batch_sim(
+            data_path, output_path, dataset_props, 
+            run_default_body=run_default_body, 
+            num_samples=len(to_resim), 
+            caching=caching, 
+            force_restart=False,
+            workers=workers,
+            journal=journal
+        )
+    else:
+        finished = batch_sim(
+            data_path, output_path, dataset_props, 
+            run_default_body=run_default_body, 
+            num_samples=len(to_resim)+1, 
+            caching=caching, 
+            force_restart=False,
+            journal=journal
+        )
 
     return finished
 
+# ------- Worker pool -------
+class _SimWorker:
+    """Supervisor-side handle of a simulation worker process
+
+        Every worker has its own connection for tasks and results, s.t. killing 
+        the worker does not affect the communication with the other workers
+    """
+
+    def __init__(self, ctx, worker_id, 
+                 data_path, output_path, dataset_props, run_default_body, caching):
+        self.ctx = ctx
+        self.id = worker_id
+        self.args = (data_path, output_path, dataset_props.properties, run_default_body, caching)
+
+        self.task = None
+        self.attempt_id = None
+        self.start_time = None
+        self._start()
+    
+    def _start(self):
+        self.conn, worker_conn = self.ctx.Pipe()
+        self.process = self.ctx.Process(
+            target=_sim_worker_loop, 
+            args=(self.id, worker_conn, *self.args),
+            name=f'SimWorker-{self.id}',
+            daemon=True)
+        self.process.start()
+        worker_conn.close()   # NOTE: Only the worker holds its end, s.t. its death is detected
+
+    def assign(self, pattern_name, attempt_id):
+        self.task = pattern_name
+        self.attempt_id = attempt_id
+        self.start_time = time.time()
+        self.conn.send((attempt_id, pattern_name))
+
+    def is_alive(self):
+        return self.process.is_alive()
+
+    def restart(self):
+        """Kill the worker (if still running) and start a new one 
+            with a new connection"""
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+        self.task = None
+        self.attempt_id = None
+        self._start()
+
+    def stop(self):
+        if self.process.is_alive():
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+def _sim_worker_loop(worker_id, conn, 
+                     data_path, output_path, props_dict, run_default_body, caching):
+    """Main loop of the simulation worker process: 
+        simulates the requested samples and reports the sample stats back 
+        to the supervisor
+    """
+    from pygarment.data_config import Properties
+
+    props = Properties()
+    props.properties = props_dict
+    clean_stats = _clean_sample_stats(props)
+    body_cache = SimBodyCache()   # Body is loaded once per worker, not per sample
+
+    while True:
+        task = conn.recv()
+        if task is None:   # Finish
+            break
+        attempt_id, pattern_name = task
+
+        # Collect stats of this sample only
+        props['sim']['stats'] = deepcopy(clean_stats['sim'])
+        props['render']['stats'] = deepcopy(clean_stats['render'])
+
+        try:
+            paths = PathCofig(
+                in_element_path=data_path / pattern_name,
+                out_path=output_path,
+                in_name=pattern_name,
+                body_name=props['body_default'],
+                samples_name=props['body_samples'],
+                default_body=run_default_body
+            )
+        except BaseException as e: 
+            # Not all files available
+            print("***Pattern loading failed (paths)***")
+            props.add_fail('sim', 'crashes', pattern_name)
+        else:
+            try:
+                template_simulation(paths, props, caching=caching, body_cache=body_cache)
+            except KeyboardInterrupt:
+                raise
+            except BaseException as e:  
+                # Python-level errors do not require restarting the worker
+                print(f'***Sim worker {worker_id} failed on {pattern_name} with {e}***')
+                props.add_fail('sim', 'crashes', pattern_name)
+        
+        conn.send((attempt_id, pattern_name, _get_sample_stats(props)))
+
+
+def _clear_stats(stats):
+    """Empty all the containers in the stats section, keeping the structure"""
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            _clear_stats(value)
+        elif isinstance(value, list):
+            value.clear()
+
+
+def _clean_sample_stats(props):
+    """Empty stats sections to collect the stats of a single sample"""
+    clean_stats = {
+        'sim': deepcopy(props['sim']['stats']), 
+        'render': deepcopy(props['render']['stats'])}
+    for section in clean_stats.values():
+        _clear_stats(section)
+    return clean_stats
+
+
+def _sample_props(props, clean_stats):
+    """Properties sharing the configuration with props, 
+        but collecting the stats of a single sample"""
+    from pygarment.data_config import Properties
+
+    sample_props = Properties()
+    sample_props.properties = dict(props.properties)
+    for section in clean_stats:
+        sample_props[section] = dict(props[section], stats=deepcopy(clean_stats[section]))
+    return sample_props
+
+
+def _get_sample_stats(sample_props):
+    return {'sim': sample_props['sim']['stats'], 'render': sample_props['render']['stats']}
+
+
+def _merge_sample_stats(dataset_props, sample_stats):
+    """Add stats of a single sample reported by the worker to the dataset properties"""
+    for section, stats in sample_stats.items():
+        for key, value in stats.items():
+            if key == 'fails':
+                for fail_type, fails in value.items():
+                    for name in fails:
+                        dataset_props.add_fail(section, fail_type, name)
+            elif isinstance(value, dict):
+                if value:
+                    dataset_props.record('update', [section, 'stats', key], value)
+            elif isinstance(value, list):
+                for el in value:
+                    dataset_props.record('append', [section, 'stats', key], el)
+
+
 # ------- Utils -------
 def init_sim_props(props, batch_run=False, force_restart=False):
     """
@@ -230,6 +551,8 @@ def init_sim_props(props, batch_run=False, force_restart=False):
                 'dpi': 1500,
                 'fabric_grain_texture_path': None,
                 'fabric_grain_resolution': 5,
+                'backend': 'matplotlib',
+                'antialiasing': 4,
             }
         )
 
@@ -265,7 +588,8 @@ def init_sim_props(props, batch_run=False, force_restart=False):
                             fin_frame={}, 
                             face_count={},
                             body_collisions={}, 
-                            self_collisions={})
+                            self_collisions={},
+                            convergence={})
     props['sim']['stats']['fails'] = {
         'crashes': [],
         'cloth_body_intersection': [],
@@ -286,14 +610,23 @@ def init_sim_props(props, batch_run=False, force_restart=False):
     return False
 
 
-def template_simulation(paths: PathCofig, props, caching=False):
+def template_simulation(paths: PathCofig, props, caching=False, body_cache: SimBodyCache = None):
     """
         Simulate given template within given scene & save log files
+        NOTE: 'body_cache' allows to load and preprocess the body model once for 
+        many templates simulated in the same process
     """
     sim_props = props['sim']
     res = sim_props['config']['resolution_scale']
+    meshgen_workers = get_dict_default_value(sim_props['config'], 'meshgen_workers', 1)
+    tri_cache_path = get_dict_default_value(sim_props['config'], 'meshgen_cache', None)
+    tri_cache = None
+    if tri_cache_path:
+        tri_cache = TriangulationCache(
+            tri_cache_path, 
+            max_size_mb=get_dict_default_value(sim_props['config'], 'meshgen_cache_size_mb', 500))
 
-    garment = BoxMesh(paths.in_g_spec, res)
+    garment = BoxMesh(paths.in_g_spec, res, workers=meshgen_workers, tri_cache=tri_cache)
 
     print('\n-----------------------------'
           '\nLoading garment: ', garment.name)
@@ -341,11 +674,13 @@ def template_simulation(paths: PathCofig, props, caching=False):
         
         vertex_normals = get_dict_default_value(sim_props_option,'store_vertex_normals',False)
         store_panels = get_dict_default_value(sim_props_option,'store_panels',False)
+        binary_mesh = get_dict_default_value(sim_props_option,'store_binary_mesh',False)
         garment.serialize(
             paths, 
             with_v_norms=vertex_normals, 
             store_panels=store_panels,
-            uv_config=props['render']['config']['uv_texture']
+            uv_config=props['render']['config']['uv_texture'],
+            binary=binary_mesh
         )
 
         run_sim(
@@ -355,7 +690,8 @@ def template_simulation(paths: PathCofig, props, caching=False):
             save_v_norms=vertex_normals,
             store_usd=caching,  # NOTE: False for fast simulation!, 
             optimize_storage=sim_props['config']['optimize_storage'],
-            verbose=False
+            verbose=False,
+            body_cache=body_cache
         )
 
 def _load_boxmesh_timeout(garment, timeout_after):
@@ -403,6 +739,13 @@ def _serialize_props_with_sim_stats(dataset_props, filename):
     dataset_props.serialize(filename)
 
 
+def _start_props_journal(dataset_props, filename):
+    """Log updates of dataset props to the journal of the props file, 
+        starting from the current state"""
+    dataset_props.start_journal(filename)
+    _serialize_props_with_sim_stats(dataset_props, filename)
+
+
 def _get_pattern_names(data_path: Path):
     names = []
     to_ignore = ['renders']  # special dirs not to include in the pattern list
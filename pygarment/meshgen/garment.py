@@ -14,12 +14,147 @@ from warp.sim.integrator_xpbd import replace_mesh_points
 
 # Custom
 from pygarment.meshgen.sim_config import PathCofig, SimConfig
+from pygarment.meshgen.render.texture_utils import save_npz, load_npz, npz_to_trimesh
+import pygarment.meshgen.mesh_utils as mesh_utils
+from pygarment.meshgen.sim_profiler import SimProfiler, PROFILE_FORMATS
 from pygarment.pattern.core import BasicPattern
 
+
+@wp.func
+def _corner_angle(a: wp.vec3, b: wp.vec3, c: wp.vec3):
+    e1 = b - a
+    e2 = c - a
+    return wp.atan2(wp.length(wp.cross(e1, e2)), wp.dot(e1, e2))
+
+
+@wp.kernel
+def _accumulate_vertex_normals(
+        x: wp.array(dtype=wp.vec3),
+        indices: wp.array(dtype=int),
+        weighting: int,
+        normals: wp.array(dtype=wp.vec3),
+        counts: wp.array(dtype=float)):
+    """Scatter-add of the face normals to the face vertices
+        (weighting follows the order in mesh_utils.NORMALS_WEIGHTING)
+    """
+    tid = wp.tid()
+    i = indices[tid * 3]
+    j = indices[tid * 3 + 1]
+    k = indices[tid * 3 + 2]
+
+    n = wp.cross(x[j] - x[i], x[k] - x[i])
+    w_i = 1.0
+    w_j = 1.0
+    w_k = 1.0
+    if weighting != 1:   # Area weighting uses the non-normalized cross product
+        n = wp.normalize(n)
+    if weighting == 2:
+        w_i = _corner_angle(x[i], x[j], x[k])
+        w_j = _corner_angle(x[j], x[k], x[i])
+        w_k = _corner_angle(x[k], x[i], x[j])
+
+    wp.atomic_add(normals, i, n * w_i)
+    wp.atomic_add(normals, j, n * w_j)
+    wp.atomic_add(normals, k, n * w_k)
+    wp.atomic_add(counts, i, 1.0)
+    wp.atomic_add(counts, j, 1.0)
+    wp.atomic_add(counts, k, 1.0)
+
+
+@wp.kernel
+def _finalize_vertex_normals(
+        counts: wp.array(dtype=float),
+        weighting: int,
+        normals: wp.array(dtype=wp.vec3)):
+    tid = wp.tid()
+    if weighting == 0:
+        normals[tid] = normals[tid] / counts[tid]
+    else:
+        normals[tid] = wp.normalize(normals[tid])
+
+
+class SimBody:
+    """Body model of the simulation scene: loaded and preprocessed once (scaling,
+        segmentation, smoothing sequence, collision filters, measurements),
+        s.t. it can be shared by the simulations of many garments on the same body
+
+        NOTE: Treat as read-only -- Cloth objects copy the data they modify
+    """
+    def __init__(self, paths: PathCofig, config: SimConfig, b_scale=100.0):
+        vertices, indices, faces = Cloth.load_obj(paths.in_body_obj)
+        self.segmentation = Cloth.read_json(paths.body_seg)
+
+        vertices = vertices * b_scale
+        self.shift_y = Cloth.get_shift_param(vertices)
+        if self.shift_y:
+            vertices[:, 1] = vertices[:, 1] + self.shift_y
+
+        self.vertices = vertices
+        self.indices = indices
+        self.faces = faces
+
+        # Starts sim from smoothed-out body and slowly restores original details
+        self.smoothing_vertices_list = None
+        if config.enable_body_smoothing:
+            self.smoothing_vertices_list = implicit_laplacian_smoothing(
+                vertices.copy(), indices.reshape(-1, 3),
+                step_size=config.smoothing_total_smoothing_factor / config.smoothing_num_steps,
+                iters=config.smoothing_num_steps)
+
+        # Collision filters: arms (for skirts) and the internal geometry of the face
+        # NOTE: evaluated on the body shape the simulation starts from
+        init_vertices = self.smoothing_vertices_list[-1] if config.enable_body_smoothing else vertices
+        self.face_filters = []
+        if config.enable_body_collision_filters:
+            self.face_filters = [
+                assign.create_face_filter(
+                    init_vertices, indices, self.segmentation, parts, smpl_body=paths.use_smpl_seg)
+                for parts in [['left_arm', 'right_arm', 'arms'], ['face_internal']]
+            ]
+
+        with open(paths.in_body_mes, 'r') as file:
+            self.measurements = yaml.load(file, Loader=yaml.SafeLoader)['body']
+
+    @staticmethod
+    def cache_key(paths: PathCofig, config: SimConfig):
+        """Identifies the preprocessed body: body files and the preprocessing options"""
+        key = (str(paths.in_body_obj), str(paths.body_seg), str(paths.in_body_mes),
+               config.enable_body_collision_filters, config.enable_body_smoothing)
+        if config.enable_body_smoothing:
+            key += (config.smoothing_total_smoothing_factor, config.smoothing_num_steps)
+        return key
+
+
+class SimBodyCache:
+    """Preprocessed bodies of the recent simulations,
+        e.g. to simulate many garments on the same (default) body in one process
+
+        * max_bodies -- number of the most recently used bodies to keep
+    """
+    def __init__(self, max_bodies=2):
+        self.max_bodies = max_bodies
+        self._bodies = {}
+
+    def get(self, paths: PathCofig, config: SimConfig):
+        """Preprocessed body for the given paths and simulation config.
+            Loaded on the first request
+        """
+        key = SimBody.cache_key(paths, config)
+        body = self._bodies.pop(key, None)
+        if body is None:
+            body = SimBody(paths, config)
+        self._bodies[key] = body   # Most recent goes last
+
+        while len(self._bodies) > self.max_bodies:
+            del self._bodies[next(iter(self._bodies))]
+
+        return body
+
+
 class Cloth:
     def __init__(self, 
                  name, config: SimConfig, paths: PathCofig, 
-                 caching=False):
+                 caching=False, body: SimBody = None):
 
         self.caching = caching   # Saves intermediate frames, extra logs, etc.
         self.paths = paths
@@ -38,13 +173,22 @@ class Cloth:
         self.c_scale = 1.0
         self.b_scale = 100.0
         self.body_path = paths.in_body_obj
+        # Preprocessed body model, if shared between simulations (see SimBodyCache)
+        self.body = body
         
         # collision resolution options
         self.enable_body_smoothing = config.enable_body_smoothing
         self.enable_cloth_reference_drag = config.enable_cloth_reference_drag
 
+        # Frame-level timings of the simulation stages
+        if config.sim_profile is not None and config.sim_profile not in PROFILE_FORMATS:
+            raise ValueError(f'{self.__class__.__name__}::ERROR::Unknown sim_profile format {config.sim_profile}. '
+                             f'Supported: {PROFILE_FORMATS}')
+        self.profiler = SimProfiler(enabled=config.sim_profile is not None, device=self.device)
+
         # Build the stage -- model object, colliders, etc.
-        self.build_stage(config)
+        with self.profiler.section('build_stage', 'init'):
+            self.build_stage(config)
 
         # -------- Final model settings ----------
         # NOTE: global_viscous_damping: (damping_factor, min_vel_damp, max_vel) 
@@ -96,22 +240,28 @@ class Cloth:
 
         builder = wp.sim.ModelBuilder(gravity=0.0)
         # --------------- Load body info -----------------
-        body_vertices, body_indices, body_faces = self.load_obj(self.paths.in_body_obj)
-        body_seg = self.read_json(self.paths.body_seg) 
-
-        body_vertices = body_vertices * self.b_scale
-        self.shift_y = self.get_shift_param(body_vertices)
-
-        if self.shift_y:
-            body_vertices[:, 1] = body_vertices[:, 1] + self.shift_y
+        if self.body is None:
+            self.body = SimBody(self.paths, config, b_scale=self.b_scale)
+        body_vertices = self.body.vertices.copy()
+        body_indices, body_faces = self.body.indices, self.body.faces
+        body_seg = self.body.segmentation
+        self.shift_y = self.body.shift_y
 
         self.v_body = body_vertices
         self.f_body = body_faces
         self.body_indices = body_indices
 
         # -------------- Load cloth ------------
-        cloth_vertices, cloth_indices, cloth_faces = self.load_obj(self.paths.g_box_mesh)
-        cloth_seg_dict = assign.read_segmentation(self.paths.g_mesh_segmentation)
+        if self.paths.g_box_mesh_npz.exists():
+            # Binary box mesh with all the annotations
+            self.box_mesh_npz = load_npz(self.paths.g_box_mesh_npz)
+            cloth_faces = self.box_mesh_npz['faces']
+            cloth_vertices, cloth_indices = self.box_mesh_npz['vertices'], cloth_faces.flatten()
+            cloth_seg_dict = self.segmentation_dict(self.box_mesh_npz['segmentation'])
+        else:
+            self.box_mesh_npz = None
+            cloth_vertices, cloth_indices, cloth_faces = self.load_obj(self.paths.g_box_mesh)
+            cloth_seg_dict = assign.read_segmentation(self.paths.g_mesh_segmentation)
         self.cloth_seg_dict = cloth_seg_dict
         stitching_vertices = cloth_seg_dict["stitch"] if 'stitch' in cloth_seg_dict.keys() else []
 
@@ -122,7 +272,9 @@ class Cloth:
         self.f_cloth = cloth_faces
 
         #Load ground truth stitching lengths
-        if not self.paths.g_orig_edge_len.exists():
+        if self.box_mesh_npz is not None:
+            orig_lens_dict = self.box_mesh_npz['orig_lens']
+        elif not self.paths.g_orig_edge_len.exists():
             orig_lens_dict = None
             print("no original length dict found")
         else:
@@ -159,16 +311,12 @@ class Cloth:
         # ------------ Add a body -----------      
         if self.enable_body_smoothing:
             # Starts sim from smoothed-out body and slowly restores original details
-            smoothing_total_smoothing_factor = config.smoothing_total_smoothing_factor
             smoothing_num_steps = config.smoothing_num_steps
             smoothing_recover_start_frame = config.smoothing_recover_start_frame
             smoothing_frame_gap_between_steps = config.smoothing_frame_gap_between_steps
-            smoothing_step_size = smoothing_total_smoothing_factor / smoothing_num_steps
             self.body_smoothing_frames = [smoothing_recover_start_frame + smoothing_frame_gap_between_steps*i for i in range(smoothing_num_steps + 1)]
-            self.body_smoothing_vertices_list = []
-            self.body_smoothing_vertices_list = implicit_laplacian_smoothing(body_vertices, body_indices.reshape(-1, 3), 
-                                                                             step_size=smoothing_step_size, 
-                                                                             iters=smoothing_num_steps)
+            # NOTE: the sequence is consumed during simulation
+            self.body_smoothing_vertices_list = list(self.body.smoothing_vertices_list)
             body_vertices = self.body_smoothing_vertices_list.pop()
             self.body_smoothing_frames.pop()
             self.body_indices = body_indices
@@ -196,8 +344,7 @@ class Cloth:
         if config.enable_body_collision_filters:
             v_connectivity = self._build_vert_connectivity(cloth_vertices, cloth_indices)
             # Arm filter for the skirts
-            face_filters.append(assign.create_face_filter(
-                body_vertices, body_indices, body_seg, ['left_arm', 'right_arm', 'arms'], smpl_body=self.paths.use_smpl_seg))
+            face_filters.append(self.body.face_filters[0])
             particle_filter = assign.assign_face_filter_points(
                 cloth_reference_labels, 
                 ['left_leg', 'right_leg', 'legs'],
@@ -206,8 +353,7 @@ class Cloth:
             )
 
             # Overall filter that ignored internal geometry
-            face_filters.append(assign.create_face_filter(
-                body_vertices, body_indices, body_seg, ['face_internal'], smpl_body=self.paths.use_smpl_seg))
+            face_filters.append(self.body.face_filters[1])
             particle_filter = assign.assign_face_filter_points(
                 cloth_reference_labels, 
                 ['body'],
@@ -264,10 +410,12 @@ class Cloth:
         self.model: wp.sim.Model = builder.finalize(device = self.device) #data is transferred to warp tensors, object used in simulation
 
     def _add_attachment_labels(self, builder, config):
-        with open(self.paths.in_body_mes, 'r') as file:
-            body_dict = yaml.load(file, Loader=yaml.SafeLoader)['body']
-        with open(self.paths.g_vert_labels, 'r') as f:
-            vertex_labels = yaml.load(f, Loader=yaml.SafeLoader)
+        body_dict = self.body.measurements
+        if self.box_mesh_npz is not None:
+            vertex_labels = self.box_mesh_npz['vertex_labels']
+        else:
+            with open(self.paths.g_vert_labels, 'r') as f:
+                vertex_labels = yaml.load(f, Loader=yaml.SafeLoader)
         
         lables_present = False
         for i, attach_label in enumerate(config.attachment_labels):     
@@ -347,57 +495,66 @@ class Cloth:
     def _sim_frame_with_substeps(self):
         """Basic scheme for simulating a frame update"""
         
-        wp.sim.collide(self.model, self.state_0, self.sim_dt * self.sim_substeps)  # Generates contact points for the particles and rigid bodies
-        # in the model, to be used in the contact dynamics kernel of the integrator
-        # launches kernels
+        with self.profiler.section('collide', 'collision'):
+            wp.sim.collide(self.model, self.state_0, self.sim_dt * self.sim_substeps)  # Generates contact points for the particles and rigid bodies
+            # in the model, to be used in the contact dynamics kernel of the integrator
+            # launches kernels
 
         for s in range(self.sim_substeps):
-            self.state_0.clear_forces()  # set particle and body forces to 0s
-            self.integrator.simulate(self.model, self.state_0, self.state_1,
-                                     self.sim_dt)  # calculate semi-implicit Euler step
-            # launches kernels and calculates new particle (and body) positions and velocities
-            # swap states
-            (self.state_0, self.state_1) = (self.state_1, self.state_0)  # swap prev, new state
+            with self.profiler.section('substep', 'integrator', substep=s):
+                self.state_0.clear_forces()  # set particle and body forces to 0s
+                self.integrator.simulate(self.model, self.state_0, self.state_1,
+                                         self.sim_dt)  # calculate semi-implicit Euler step
+                # launches kernels and calculates new particle (and body) positions and velocities
+                # swap states
+                (self.state_0, self.state_1) = (self.state_1, self.state_0)  # swap prev, new state
 
     def create_graph(self):
         # create update graph
-        wp.capture_begin()  # Captures all subsequent kernel launches and memory operations on CUDA devices.
-        
-        self._sim_frame_with_substeps()
+        # NOTE: The stages inside the graph cannot be timed separately
+        with self.profiler.section('graph_capture', 'integrator'), self.profiler.suspended():
+            wp.capture_begin()  # Captures all subsequent kernel launches and memory operations on CUDA devices.
+            
+            self._sim_frame_with_substeps()
 
-        self.graph = wp.capture_end()  # returns a handle to a CUDA graph object that can be launched with :func:`~warp.capture_launch()`
-        # do not capture kernel launches anymore
+            self.graph = wp.capture_end()  # returns a handle to a CUDA graph object that can be launched with :func:`~warp.capture_launch()`
+            # do not capture kernel launches anymore
 
     def update(self, frame):
         with wp.ScopedTimer("simulate", print=False, active=True):
             if self.model.enable_particle_particle_collisions:
                 # FIXME: Produces cuda errors when activated together with "enable_cloth_reference_drag"
                 # Reason is unknown. Or not?
-                self.model.particle_grid.build(self.state_0.particle_q, self.model.particle_max_radius * 2.0)
+                with self.profiler.section('particle_grid', 'collision'):
+                    self.model.particle_grid.build(self.state_0.particle_q, self.model.particle_max_radius * 2.0)
             if frame == self.zero_gravity_steps:
                 self.model.gravity = np.array((0.0, -9.81, 0.0))
                 if self.sim_use_graph:
                     self.create_graph()
             if self.enable_body_smoothing and frame in self.body_smoothing_frames:
-                self.update_smooth_body_shape()
+                with self.profiler.section('body_smoothing', 'collision'):
+                    self.update_smooth_body_shape()
                 if self.sim_use_graph:
                     self.create_graph()
             if (self.model.attachment_constraint 
                     and frame >= self.config.attachment_frames):  
-                self.model.attachment_constraint = False
-                if self.sim_use_graph:
-                    self.create_graph()
+                with self.profiler.section('attachment_update', 'attachment'):
+                    self.model.attachment_constraint = False
+                    if self.sim_use_graph:
+                        self.create_graph()
             
             if self.sim_use_graph: #GPU
-                wp.capture_launch(self.graph)
+                with self.profiler.section('graph_launch', 'integrator'):
+                    wp.capture_launch(self.graph)
 
             else: #CPU: launch kernels without graph
                 self._sim_frame_with_substeps()
 
             # Update vertices of last frame
-            self.last_verts = self.current_verts
-            # NOTE Makes a copy if particle_q device is not CPU
-            self.current_verts = wp.array.numpy(self.state_0.particle_q)  
+            with self.profiler.section('readback', 'io'):
+                self.last_verts = self.current_verts
+                # NOTE Makes a copy if particle_q device is not CPU
+                self.current_verts = wp.array.numpy(self.state_0.particle_q)  
             
     def update_smooth_body_shape(self):
         body_vertices = self.body_smoothing_vertices_list.pop()
@@ -437,22 +594,39 @@ class Cloth:
             self.renderer.save()
 
     def run_frame(self):
+        self.profiler.frame = self.frame
         self.update(self.frame)
 
         # NOTE: USD Render
         if self.caching:
-            self.render_usd_frame()
+            with self.profiler.section('usd_render', 'io'):
+                self.render_usd_frame()
     
-    def read_json(self, path):
+    @staticmethod
+    def read_json(path):
         with open(path, 'r') as f:
             data = json.load(f)
             return data
     
-    def load_obj(self, path):
+    @staticmethod
+    def load_obj(path):
         v, f = igl.read_triangle_mesh(str(path))
         return v, f.flatten(), f
 
-    def get_shift_param(self,body_vertices):
+    @staticmethod
+    def segmentation_dict(segmentation):
+        """Vertex ids per segmentation label from the rows of box mesh segmentation 
+            (one row per vertex -- panel name or the list of stitches). 
+            All the stitch vertices are collected under the 'stitch' label
+        """
+        seg_dict = {}
+        for v_id, row in enumerate(segmentation):
+            label = 'stitch' if 'stitch' in row else row
+            seg_dict.setdefault(label, []).append(v_id)
+        return seg_dict
+
+    @staticmethod
+    def get_shift_param(body_vertices):
         v_body_arr = np.array(body_vertices)
         min_y = (min(v_body_arr[:, 1]))
         if min_y < 0:
@@ -480,16 +654,48 @@ class Cloth:
 
         return n_normalized
 
-    def calc_vertex_norms(self):
-        vertex_normals = np.zeros((len(self.v_cloth_init), 4))
-        for face in self.f_cloth:
-            v0, v1, v2 = np.array(self.current_verts)[face]
-            face_norm = list(self.calc_norm(v0, v1, v2))
-            temp_update = face_norm + [1]
-            vertex_normals[face] += temp_update
-
-        vertex_normals = vertex_normals[:, :3] / (vertex_normals[:, 3][:, np.newaxis])
-        return vertex_normals
+    def calc_vertex_norms(self, weighting=None, on_device=None):
+        """Vertex normals of the current cloth state
+            * weighting -- weighting of the face normals (see mesh_utils.vertex_normals()).
+                Defaults to the sim config value
+            * on_device -- evaluate normals with warp kernels on the simulation device
+                instead of numpy. Defaults to the sim config value.
+                NOTE: float32 precision, the result might slightly vary between the runs
+        """
+        weighting = self.config.vertex_normals_weighting if weighting is None else weighting
+        on_device = self.config.vertex_normals_on_device if on_device is None else on_device
+        if on_device:
+            return self._calc_vertex_norms_device(weighting)
+        return mesh_utils.vertex_normals(self.current_verts, self.f_cloth, weighting=weighting)
+
+    def _calc_vertex_norms_device(self, weighting):
+        if weighting not in mesh_utils.NORMALS_WEIGHTING:
+            raise ValueError(f'{self.__class__.__name__}::ERROR::Unknown normals weighting {weighting}. '
+                             f'Supported: {mesh_utils.NORMALS_WEIGHTING}')
+        model = self.model
+        if getattr(self, '_f_cloth_device', None) is None:
+            self._f_cloth_device = wp.array(
+                np.asarray(self.f_cloth, dtype=np.int32).flatten(), dtype=int, device=model.device)
+        n_verts = len(self.current_verts)
+        mode = mesh_utils.NORMALS_WEIGHTING.index(weighting)
+
+        normals = wp.zeros(n_verts, dtype=wp.vec3, device=model.device)
+        counts = wp.zeros(n_verts, dtype=float, device=model.device)
+        wp.launch(
+            kernel=_accumulate_vertex_normals,
+            dim=len(self.f_cloth),
+            inputs=[self.state_0.particle_q, self._f_cloth_device, mode],
+            outputs=[normals, counts],
+            device=model.device
+        )
+        wp.launch(
+            kernel=_finalize_vertex_normals,
+            dim=n_verts,
+            inputs=[counts, mode],
+            outputs=[normals],
+            device=model.device
+        )
+        return wp.array.numpy(normals).astype(float)
 
     def save_frame(self, save_v_norms=False): 
         """Save current garment state as an obj file, 
@@ -505,6 +711,18 @@ class Cloth:
             vertex_normals = self.calc_vertex_norms()
 
         v_cloth_sim = self.current_verts
+        if self.box_mesh_npz is not None:
+            # Binary storage: only vertices (and normals) are updated 
+            save_npz(
+                self.paths.g_sim_npz, 
+                v_cloth_sim, 
+                np.stack((self.box_mesh_npz['faces'], self.box_mesh_npz['face_uvs']), axis=-1).reshape(-1, 6),
+                self.box_mesh_npz['uvs'],
+                vert_normals=vertex_normals if save_v_norms else None,
+                texture_file_name=self.box_mesh_npz.get('texture')
+            )
+            return
+
         # Store simulated cloth mesh
         # Read the boxmesh file
         with open(self.paths.g_box_mesh, 'r') as obj_file:
@@ -527,6 +745,15 @@ class Cloth:
                 else:
                     obj_file.write(line)
 
+    def textured_mesh(self):
+        """Current state of the garment as textured trimesh object for rendering. 
+            Only available for garments loaded from binary box mesh (None otherwise)
+        """
+        if self.box_mesh_npz is None:
+            return None
+        mesh = dict(self.box_mesh_npz, vertices=self.current_verts)
+        return npz_to_trimesh(mesh, self.paths.out_el / mesh['texture'])
+
     def is_static(self):
         """
             Checks whether garment is in the static equilibrium
@@ -0,0 +1,85 @@
+"""Helper functions for the triangle meshes"""
+
+import numpy as np
+
+NORMALS_WEIGHTING = ['uniform', 'area', 'angle']
+
+
+def face_normals(vertices, faces):
+    """
+    This function calculates unit normals of the mesh faces.
+    Input:
+        * vertices (ndarray): (N x 3) vertex positions
+        * faces (ndarray): (F x 3) vertex indices of the faces
+    Output:
+        * normals (ndarray): (F x 3) unit normals of the faces
+    """
+    normals = _face_cross(np.asarray(vertices), faces)
+    return normals / np.linalg.norm(normals, axis=1)[:, np.newaxis]
+
+
+def vertex_normals(vertices, faces, weighting='uniform', face_norms=None):
+    """
+    This function calculates vertex normals as the weighted sum of normals of the adjacent faces.
+    Input:
+        * vertices (ndarray): (N x 3) vertex positions
+        * faces (ndarray): (F x 3) vertex indices of the faces
+        * weighting (str): weights of the face normals:
+            * 'uniform' -- average of the unit face normals (NOTE: the result is not re-normalized)
+            * 'area' -- face normals weighted by face areas, normalized
+            * 'angle' -- face normals weighted by the face angles at the vertex, normalized
+        * face_norms (ndarray): (F x 3) unit face normals to use instead of the ones evaluated from
+            the vertex positions ('uniform' and 'angle' weighting only)
+    Output:
+        * normals (ndarray): (N x 3) vertex normals
+    """
+    if weighting not in NORMALS_WEIGHTING:
+        raise ValueError(f'mesh_utils::ERROR::Unknown normals weighting {weighting}. '
+                         f'Supported: {NORMALS_WEIGHTING}')
+    vertices = np.asarray(vertices)
+    faces = np.asarray(faces, dtype=int).reshape(-1, 3)
+
+    if weighting == 'area':
+        # Length of the cross product is twice the face area
+        corner_normals = np.repeat(_face_cross(vertices, faces)[:, np.newaxis], 3, axis=1)
+    else:
+        if face_norms is None:
+            face_norms = face_normals(vertices, faces)
+        corner_normals = np.repeat(np.asarray(face_norms, dtype=float)[:, np.newaxis], 3, axis=1)
+        if weighting == 'angle':
+            corner_normals = corner_normals * face_angles(vertices, faces)[:, :, np.newaxis]
+
+    # Scatter-add of the face normals to the vertices, in the order of faces
+    normals = np.zeros((len(vertices), 4))
+    np.add.at(normals, faces.flatten(), np.concatenate(
+        [corner_normals.reshape(-1, 3), np.ones((faces.size, 1))], axis=1))
+
+    if weighting == 'uniform':
+        return normals[:, :3] / normals[:, 3][:, np.newaxis]
+    return normals[:, :3] / np.linalg.norm(normals[:, :3], axis=1)[:, np.newaxis]
+
+
+def face_angles(vertices, faces):
+    """
+    This function calculates the angles of the faces at their vertices.
+    Input:
+        * vertices (ndarray): (N x 3) vertex positions
+        * faces (ndarray): (F x 3) vertex indices of the faces
+    Output:
+        * angles (ndarray): (F x 3) angles (radians) at the face vertices, in the order of vertices in the faces
+    """
+    tri = np.asarray(vertices)[faces]
+    angles = np.empty(faces.shape)
+    for i in range(3):
+        e1 = tri[:, (i + 1) % 3] - tri[:, i]
+        e2 = tri[:, (i + 2) % 3] - tri[:, i]
+        angles[:, i] = np.arctan2(
+            np.linalg.norm(np.cross(e1, e2), axis=1),
+            np.einsum('ij,ij->i', e1, e2))
+    return angles
+
+
+def _face_cross(vertices, faces):
+    """Cross products of the face edges (non-normalized face normals)"""
+    tri = vertices[faces]
+    return np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
@@ -8,6 +8,7 @@ import pyrender
 from PIL import Image
 
 from pygarment.meshgen.sim_config import PathCofig
+from pygarment.meshgen.render.texture_utils import load_npz, npz_to_trimesh
 
 
 def rotate_matrix_y(matrix, angle_deg):
@@ -59,13 +60,8 @@ def get_bounding_box_edges(mesh):
 
     return corners
 
-def create_camera(pyrender, pyrender_body_mesh, scene, side, camera_location=None):
-
-    # Create a camera
-    y_fov = np.pi / 6. 
-    camera = pyrender.PerspectiveCamera(yfov=y_fov)
-    
-
+def camera_pose(pyrender_body_mesh, side, camera_location=None):
+    """Pose of the camera for the given side of the body"""
     if camera_location is None:
         # Evaluate w.r.t. body
 
@@ -96,8 +92,7 @@ def create_camera(pyrender, pyrender_body_mesh, scene, side, camera_location=Non
     if side == 'back':
         camera_pose = rotate_matrix_y(camera_pose, 180)
 
-    # Set camera's pose in the scene
-    scene.add(camera, pose=camera_pose)
+    return camera_pose
 
 def create_lights(scene, intensity=30.0):
     light_positions = [
@@ -122,43 +117,7 @@ def create_lights(scene, intensity=30.0):
         light_pose[:3, 3] = light_positions[i]
         scene.add(light, pose=light_pose)
 
-def render(
-        pyrender_garm_mesh, pyrender_body_mesh, 
-        side, 
-        paths: PathCofig, 
-        render_props=None
-    ):
-    if render_props and 'resolution' in render_props:
-        view_width, view_height = render_props['resolution']
-    else:
-        view_width, view_height = 1080, 1080
-    # Create a pyrender scene
-    scene = pyrender.Scene(bg_color=(1., 1., 1., 0.))  # Transparent!
-    
-    # Create a pyrender mesh object from the trimesh object
-    # Add the mesh to the scene
-    scene.add(pyrender_garm_mesh)
-    scene.add(pyrender_body_mesh)
-
-    camera_location=render_props['front_camera_location'] if 'front_camera_location' in render_props else None
-    create_camera(
-        pyrender, pyrender_body_mesh, scene, side,
-        camera_location=camera_location
-    )
-
-    create_lights(scene, intensity=80.)
-
-    # Create a renderer
-    renderer = pyrender.OffscreenRenderer(viewport_width=view_width, viewport_height=view_height)
-
-    # Render the scene
-    color, _ = renderer.render(scene, flags=pyrender.RenderFlags.RGBA)
-
-    image = Image.fromarray(color)
-    image.save(paths.render_path(side), "PNG")
-
-def load_meshes(paths:PathCofig, body_v, body_f):
-    # Load body mesh
+def body_pyrender_mesh(body_v, body_f):
     body_mesh = trimesh.Trimesh(body_v, body_f)
     body_mesh.vertices = body_mesh.vertices / 100
     # Color body mesh
@@ -167,11 +126,18 @@ def load_meshes(paths:PathCofig, body_v, body_f):
         metallicFactor=0.658,  # Range: [0.0, 1.0]
         roughnessFactor=0.5  # Range: [0.0, 1.0]
     )
-    pyrender_body_mesh = pyrender.Mesh.from_trimesh(body_mesh, material=body_material)
-
-
-    #Load garment mesh
-    garm_mesh = trimesh.load_mesh(str(paths.g_sim))  # NOTE: Includes the texture
+    return pyrender.Mesh.from_trimesh(body_mesh, material=body_material)
+
+def load_garment(paths: PathCofig):
+    """Load simulated garment mesh (with texture)"""
+    if paths.g_sim_npz.exists():
+        garm_npz = load_npz(paths.g_sim_npz)
+        return npz_to_trimesh(garm_npz, paths.out_el / garm_npz['texture'])
+    return trimesh.load_mesh(str(paths.g_sim))  # NOTE: Includes the texture
+
+def garment_pyrender_mesh(garm_mesh):
+    """Pyrender mesh from the textured garment trimesh object"""
+    garm_mesh = garm_mesh.copy()
     garm_mesh.vertices = garm_mesh.vertices / 100   # scale to m
 
     # Material adjustments
@@ -185,15 +151,90 @@ def load_meshes(paths:PathCofig, body_v, body_f):
 
     garm_mesh.visual.material = material
 
-    pyrender_garm_mesh = pyrender.Mesh.from_trimesh(garm_mesh, smooth=True) 
-    
-    return pyrender_garm_mesh, pyrender_body_mesh
-
-def render_images(paths: PathCofig, body_v, body_f, render_props):
-
-    pyrender_garm_mesh, pyrender_body_mesh = load_meshes(paths, body_v, body_f)
-
-    for side in render_props['sides']:
-        render(pyrender_garm_mesh, pyrender_body_mesh, side, paths, render_props)
-
+    return pyrender.Mesh.from_trimesh(garm_mesh, smooth=True) 
+
+class Renderer:
+    """Long-lived offscreen renderer of garments on the body
+
+        Keeps the GL context, the scene with lights and camera and the body mesh 
+        between renders, s.t. rendering of multiple views and multiple samples 
+        only requires updating the garment (and the body, when it changes)
+    """
+    def __init__(self, resolution=(1080, 1080), light_intensity=80.):
+        self.resolution = tuple(resolution)
+        self.renderer = pyrender.OffscreenRenderer(
+            viewport_width=self.resolution[0], viewport_height=self.resolution[1])
+
+        self.scene = pyrender.Scene(bg_color=(1., 1., 1., 0.))  # Transparent!
+        create_lights(self.scene, intensity=light_intensity)
+        self.camera_node = self.scene.add(pyrender.PerspectiveCamera(yfov=np.pi / 6.))
+
+        self.body_node = None
+        self._body_vf = None
+
+    def set_body(self, body_v, body_f):
+        """Set the body mesh for rendering, re-using the current one if the same body is requested"""
+        if (self._body_vf is not None 
+                and np.array_equal(self._body_vf[0], body_v) and np.array_equal(self._body_vf[1], body_f)):
+            return
+        
+        if self.body_node is not None:
+            self.scene.remove_node(self.body_node)
+        self.body_node = self.scene.add(body_pyrender_mesh(body_v, body_f))
+        self._body_vf = (np.array(body_v), np.array(body_f))
+
+    def render(self, garm_mesh, sides=('front', 'back'), camera_location=None):
+        """Render the garment (trimesh object in cm, with texture) on the current body
+            from all the requested sides
+
+            Returns dict of side -> RGBA image (numpy array)
+        """
+        garm_node = self.scene.add(garment_pyrender_mesh(garm_mesh))
+        images = {}
+        try:
+            for side in sides:
+                self.scene.set_pose(
+                    self.camera_node, 
+                    camera_pose(self.body_node.mesh, side, camera_location))
+                images[side], _ = self.renderer.render(self.scene, flags=pyrender.RenderFlags.RGBA)
+        finally:
+            self.scene.remove_node(garm_node)
+
+        return images
+
+    def delete(self):
+        """Release the GL context"""
+        self.renderer.delete()
+
+
+_renderer = None   # Renderer shared between the render_images() calls
+
+def get_renderer(resolution=(1080, 1080)):
+    """Persistent renderer of the requested resolution"""
+    global _renderer
+    if _renderer is None or _renderer.resolution != tuple(resolution):
+        if _renderer is not None:
+            _renderer.delete()
+        _renderer = Renderer(resolution)
+    return _renderer
+
+def render_images(paths: PathCofig, body_v, body_f, render_props, garm_mesh=None):
+    """Render all the requested sides of the simulated garment on the body 
+
+        * garm_mesh -- trimesh object of the simulated garment with texture. 
+            If not given, it's loaded from the simulation results in paths
+    """
+    if garm_mesh is None:
+        garm_mesh = load_garment(paths)
+
+    resolution = render_props['resolution'] if render_props and 'resolution' in render_props else (1080, 1080)
+    renderer = get_renderer(resolution)
+    renderer.set_body(body_v, body_f)
+    images = renderer.render(
+        garm_mesh, 
+        sides=render_props['sides'], 
+        camera_location=render_props['front_camera_location'] if 'front_camera_location' in render_props else None
+    )
 
+    for side, color in images.items():
+        Image.fromarray(color).save(paths.render_path(side), "PNG")
@@ -1,6 +1,8 @@
 """Routines for processing UV coordinated for garments and generating texture maps"""
 import numpy as np
 import igl
+import trimesh
+from PIL import Image, ImageDraw
 import matplotlib.pyplot as plt
 import matplotlib
 from pathlib import Path
@@ -16,7 +18,9 @@ def texture_mesh_islands(
         background_img_path=None,
         background_resolution=1.,
         uv_padding=3, 
-        mat_name='islands_texture'
+        mat_name='islands_texture',
+        backend='matplotlib',
+        antialiasing=4
 ):
     """
         Returns updated uv coordinates (properly normalized and aligned with the created texture)
@@ -31,7 +35,9 @@ def texture_mesh_islands(
         texture_image_path=out_texture_image_path,
         boundary_width=boundary_width,
         dpi=dpi,
-        preserve_alpha=True
+        preserve_alpha=True,
+        backend=backend,
+        antialiasing=antialiasing
     )
 
     # Create image with fabric background
@@ -43,7 +49,9 @@ def texture_mesh_islands(
             dpi=dpi,
             background_img_path=background_img_path, 
             background_resolution=background_resolution,
-            preserve_alpha=False  
+            preserve_alpha=False,
+            backend=backend,
+            antialiasing=antialiasing
         )
     else:
         out_fabric_tex_image_path = None
@@ -109,16 +117,15 @@ def unwarp_UV(texture_coords, face_texture_coords, padding=3):
         # Update shift
         column_x_shift = max(bbox_len_X, column_x_shift)
 
-        # translate boundary positions
-        verts_translated_bound = [(x + translate_X, y + translate_Y) for x, y in bound_vert_pos]
-        boundary_uv_to_draw.append(verts_translated_bound)
-        
-        # translate all positions
-        verts_translated = [(x + translate_X, y + translate_Y) for x, y in all_vert_pos]
-        all_uvs.extend(verts_translated)
+        # translate positions of the component
+        shift = np.array([translate_X, translate_Y])
+        boundary_uv_to_draw.append(bound_vert_pos + shift)
+        all_uvs.append(all_vert_pos + shift)
         
         translate_Y = translate_Y + bbox_len_Y + padding
 
+    all_uvs = np.concatenate(all_uvs, axis=0) if all_uvs else np.empty((0, 2))
+
     return all_uvs, boundary_uv_to_draw  
 
 def normalize_UVs(all_uvs, axis_padding=3):
@@ -145,7 +152,9 @@ def create_UV_island_texture(
         background_alpha=0.8,
         background_img_path=None,
         background_resolution=5,
-        preserve_alpha=True
+        preserve_alpha=True,
+        backend='matplotlib',
+        antialiasing=4
     ):
     """Create texture image from the set of UV boundary loops (e.g. sewing pattern panels). 
         It renders the border of the loops and fills them in with color 
@@ -156,18 +165,188 @@ def create_UV_island_texture(
             * texture_image_path -- filepath to same a texture image to
             * boundary_width -- width of the boundary outline 
             * dpi -- resolution of the output image
+            * backend -- 'matplotlib' (plotting-based, default) or 'raster' (numpy/PIL scanline fill)
+            * antialiasing -- supersampling factor per image axis used by the 'raster' backend (1 = no antialiasing)
     """
-    n_components = len(boundary_uv_to_draw)
+    colors = _island_colors(len(boundary_uv_to_draw), color_alpha)
 
-    # Figure size
-    fig, ax = plt.subplots()
-    fig.set_size_inches(width / 100, height / 100)  # width & height are usually given in cm
+    if backend == 'raster':
+        _raster_UV_island_texture(
+            boundary_uv_to_draw, colors, width, height, texture_image_path, 
+            boundary_width=boundary_width, 
+            boundary_color=boundary_color, 
+            dpi=dpi,
+            background_alpha=background_alpha,
+            background_img_path=background_img_path,
+            background_resolution=background_resolution,
+            preserve_alpha=preserve_alpha,
+            antialiasing=antialiasing
+        )
+    elif backend == 'matplotlib':
+        _plot_UV_island_texture(
+            boundary_uv_to_draw, colors, width, height, texture_image_path, 
+            boundary_width=boundary_width, 
+            boundary_color=boundary_color, 
+            dpi=dpi,
+            background_alpha=background_alpha,
+            background_img_path=background_img_path,
+            background_resolution=background_resolution,
+            preserve_alpha=preserve_alpha
+        )
+    else:
+        raise ValueError(f'create_UV_island_texture::ERROR::Unknown texture backend {backend}')
 
-    # Colors
+def _island_colors(n_components, color_alpha):
+    """Fill colors (RGBA) of the UV islands"""
     shift = 0.17
     divisor = max(5, n_components)
     cmap = matplotlib.colormaps['twilight']   # copper cool  spring winter twilight  # Using smooth Matplotlib colormaps
-    color_sample = [cmap((1 - shift) * id / divisor) for id in range(divisor)]
+    colors = []
+    for id in range(divisor):
+        color = list(cmap((1 - shift) * id / divisor))
+        color[-1] = color_alpha   # Alpha - transparency for blending with backround
+        colors.append(color)
+    return colors
+
+def _raster_UV_island_texture(
+        boundary_uv_to_draw, colors, 
+        width, height, 
+        texture_image_path, 
+        boundary_width=0.3, 
+        boundary_color='black',
+        dpi=1200,
+        background_alpha=0.8,
+        background_img_path=None,
+        background_resolution=5,
+        preserve_alpha=True,
+        antialiasing=4
+    ):
+    """Scanline rasterization of the UV islands with numpy & PIL 
+
+        Produces the same image layout as the matplotlib backend: the UV map spans the whole image, 
+        and the pixel size matches the axes box of the width / 100 x height / 100 inch figure 
+        saved at given dpi with a tight bounding box.
+        Each island is rasterized in its own bounding box at supersampled resolution, 
+        and the coverage is box-filtered down to the output resolution (antialiasing)
+    """
+    # NOTE: Matching the axes area of the default matplotlib subplot with equal aspect ratio.
+    # The image size is truncated to whole pixels as by savefig(bbox_inches='tight', pad_inches=0), 
+    # and the UV map is anchored at the bottom-left corner of the image 
+    rc = matplotlib.rcParams
+    axes_fraction = min(
+        rc['figure.subplot.right'] - rc['figure.subplot.left'], 
+        rc['figure.subplot.top'] - rc['figure.subplot.bottom'])
+    px_per_unit = axes_fraction * dpi / 100
+    res_x, res_y = max(1, int(width * px_per_unit)), max(1, int(height * px_per_unit))
+    ss = max(1, int(antialiasing))
+
+    # Premultiplied RGBA canvas
+    image = np.zeros((res_y, res_x, 4), dtype=np.float32)
+    if not preserve_alpha:
+        image[:] = 1.   # White opaque background
+
+    # Background -- garment style
+    if background_img_path is not None:
+        back_img = Image.open(background_img_path).convert('RGBA')
+        back_img = back_img.crop((
+            0, 0, 
+            min(int(height * background_resolution), back_img.width), 
+            min(int(width * background_resolution), back_img.height)))
+        back_img = back_img.resize(
+            (int(np.ceil(width * px_per_unit)), int(np.ceil(height * px_per_unit))), 
+            resample=Image.BILINEAR)
+        back = np.asarray(back_img, dtype=np.float32)[-res_y:, :res_x] / 255.
+        back[:, :, 3] *= background_alpha
+        back[:, :, :3] *= back[:, :, 3:]
+        image = _alpha_over(back, image)
+
+    # Boundary line width in (supersampled) pixels -- in points, as in matplotlib backend
+    line_width = max(1, round(boundary_width / 2 * dpi / 72 * ss))
+    pad = int(np.ceil(line_width / ss)) + 1
+    edge_color = np.array(matplotlib.colors.to_rgba(boundary_color), dtype=np.float32)
+    edge_color[:3] *= edge_color[3]
+
+    for i, loop in enumerate(boundary_uv_to_draw):
+        # Image coordinates (y axis points down)
+        loop = np.asarray(loop, dtype=float)
+        pix = np.empty_like(loop)
+        pix[:, 0] = loop[:, 0] * px_per_unit
+        pix[:, 1] = res_y - loop[:, 1] * px_per_unit
+        pix = _snap_rectilinear(pix, boundary_width / 2 * dpi / 72)
+
+        # Island region in the output image
+        x_min, y_min = np.maximum(np.floor(pix.min(axis=0)).astype(int) - pad, 0)
+        x_max, y_max = np.minimum(np.ceil(pix.max(axis=0)).astype(int) + pad, [res_x, res_y])
+        if x_max <= x_min or y_max <= y_min:
+            continue
+        region_size = ((x_max - x_min) * ss, (y_max - y_min) * ss)
+
+        # Supersampled coordinates of the loop in the region (sample at pixel centers)
+        pts = (pix - [x_min, y_min]) * ss - 0.5
+        pts = [tuple(p) for p in pts]
+
+        fill_mask = Image.new('L', region_size, 0)
+        ImageDraw.Draw(fill_mask).polygon(pts, fill=255)
+        edge_mask = Image.new('L', region_size, 0)
+        ImageDraw.Draw(edge_mask).line(pts + [pts[0]], fill=255, width=line_width, joint='curve')
+
+        # Box-filtered coverage
+        fill_cover = np.asarray(fill_mask.reduce(ss), dtype=np.float32)[:, :, None] / 255.
+        edge_cover = np.asarray(edge_mask.reduce(ss), dtype=np.float32)[:, :, None] / 255.
+
+        fill_color = np.array(colors[i], dtype=np.float32)
+        fill_color[:3] *= fill_color[3]
+
+        region = image[y_min:y_max, x_min:x_max]
+        region = _alpha_over(fill_cover * fill_color, region)
+        region = _alpha_over(edge_cover * edge_color, region)
+        image[y_min:y_max, x_min:x_max] = region
+
+    # Back to straight alpha. NOTE: Fully transparent pixels are white, as in matplotlib output
+    alpha = image[:, :, 3:]
+    np.divide(image[:, :, :3], alpha, out=image[:, :, :3], where=alpha > 0)
+    image[:, :, :3][alpha[:, :, 0] == 0] = 1.
+    image *= 255
+    image += 0.5
+    np.clip(image, 0, 255, out=image)
+    image = image.astype(np.uint8)
+
+    Image.fromarray(image, mode='RGBA').save(texture_image_path)
+
+def _snap_rectilinear(pix, stroke_width):
+    """Pixel snapping of the loops made of horizontal & vertical segments only,
+        as done by matplotlib (Agg) in the 'auto' snapping mode
+    """
+    # NOTE: Agg does not snap paths with over 1024 vertices (incl. the closing ones)
+    if len(pix) + 2 > 1024:
+        return pix
+    seg = np.diff(np.vstack([pix, pix[:1]]), axis=0)
+    if np.any((np.abs(seg[:, 0]) >= 1e-4) & (np.abs(seg[:, 1]) >= 1e-4)):
+        return pix
+    snap_value = 0.5 if int(np.floor(stroke_width + 0.5)) % 2 else 0.
+    return np.floor(pix + 0.5) + snap_value
+
+def _alpha_over(src, dst):
+    """Composite premultiplied RGBA src over dst"""
+    return src + dst * (1. - src[..., 3:])
+
+def _plot_UV_island_texture(
+        boundary_uv_to_draw, colors, 
+        width, height, 
+        texture_image_path, 
+        boundary_width=0.3, 
+        boundary_color='black',
+        dpi=1200,
+        background_alpha=0.8,
+        background_img_path=None,
+        background_resolution=5,
+        preserve_alpha=True
+    ):
+    """Draw the UV islands with matplotlib"""
+
+    # Figure size
+    fig, ax = plt.subplots()
+    fig.set_size_inches(width / 100, height / 100)  # width & height are usually given in cm
 
     # Background -- garment style
     if background_img_path is not None:
@@ -181,17 +360,12 @@ def create_UV_island_texture(
         )
 
     # Draw the UV island boundaries and fill them up
-    for i in range(n_components):
-        polygon_x = [vert[0] for vert in boundary_uv_to_draw[i]]
-        polygon_x.append(polygon_x[0])  # Loop
-        polygon_y = [vert[1] for vert in boundary_uv_to_draw[i]]
-        polygon_y.append(polygon_y[0])  # Loop
+    for i, loop in enumerate(boundary_uv_to_draw):
+        loop = np.asarray(loop)
+        loop = np.vstack([loop, loop[:1]])  # Loop
 
-        color = list(color_sample[i])
-        color[-1] = color_alpha   # Alpha - transparency for blending with backround
-
-        plt.fill(polygon_x, polygon_y, 
-                 color=color, 
+        plt.fill(loop[:, 0], loop[:, 1], 
+                 color=colors[i], 
                  edgecolor=boundary_color, linestyle='-', linewidth=boundary_width / 2  # Boundary stylings
         )
         
@@ -306,4 +480,92 @@ def add_texture_to_obj(obj_file_path, output_file_path, uv_list, mtl_file_name,
     with open(output_file_path, 'w') as file:
         file.writelines(updated_lines)
 
-# !SECTION
\ No newline at end of file
+# !SECTION
+# SECTION Binary mesh storage
+def save_npz(
+        output_file_path, 
+        vertices, faces_with_texture, uv_list, 
+        vert_normals=None, texture_file_name=None, 
+        segmentation=None, vertex_labels=None, orig_lens=None):
+    """Save the textured mesh with (optional) simulation annotations 
+        as a single compressed numpy archive -- a binary alternative to save_obj()
+        and separate annotation files
+
+        * segmentation -- list of per-vertex segmentation labels (str or list of str)
+        * vertex_labels -- dict of label -> list of vertex ids
+        * orig_lens -- dict of (vertex id, vertex id) -> original length of the edge
+    """
+    faces_with_texture = np.asarray(faces_with_texture, dtype=np.int64).reshape(-1, 6)
+    arrays = dict(
+        vertices=np.asarray(vertices, dtype=float).reshape(-1, 3),
+        faces=faces_with_texture[:, 0::2],
+        uvs=np.asarray(uv_list, dtype=float).reshape(-1, 2),
+        face_uvs=faces_with_texture[:, 1::2],
+    )
+    if vert_normals is not None:
+        arrays['vertex_normals'] = np.asarray(vert_normals, dtype=float)
+    if texture_file_name is not None:
+        arrays['texture'] = np.array(texture_file_name)
+    if segmentation is not None:
+        arrays['segmentation'] = np.array(
+            [','.join(row) if isinstance(row, list) else row for row in segmentation])
+    if vertex_labels is not None:
+        # Packed lists: ids of label i are label_ids[label_offsets[i]:label_offsets[i + 1]]
+        names = list(vertex_labels.keys())
+        arrays['label_names'] = np.array(names, dtype=str)
+        arrays['label_ids'] = np.array(
+            [v_id for name in names for v_id in vertex_labels[name]], dtype=np.int64)
+        arrays['label_offsets'] = np.cumsum(
+            [0] + [len(vertex_labels[name]) for name in names], dtype=np.int64)
+    if orig_lens is not None:
+        arrays['orig_lens_pairs'] = np.array(list(orig_lens.keys()), dtype=np.int64).reshape(-1, 2)
+        arrays['orig_lens'] = np.array(list(orig_lens.values()), dtype=float)
+
+    np.savez_compressed(output_file_path, **arrays)
+
+def load_npz(file_path):
+    """Load the mesh saved with save_npz()
+
+        Returns a dict with numpy arrays of the mesh & decoded annotations (if present):
+            * 'segmentation' -- list of per-vertex segmentation rows (str)
+            * 'vertex_labels' -- dict of label -> list of vertex ids
+            * 'orig_lens' -- dict of (vertex id, vertex id) -> original edge length
+    """
+    with np.load(file_path) as data:
+        mesh = {key: data[key] for key in data.files}
+
+    if 'texture' in mesh:
+        mesh['texture'] = str(mesh['texture'])
+    if 'segmentation' in mesh:
+        mesh['segmentation'] = mesh['segmentation'].tolist()
+    if 'label_names' in mesh:
+        names, ids, offsets = mesh.pop('label_names'), mesh.pop('label_ids'), mesh.pop('label_offsets')
+        mesh['vertex_labels'] = {
+            str(name): ids[offsets[i]:offsets[i + 1]].tolist() for i, name in enumerate(names)}
+    if 'orig_lens_pairs' in mesh:
+        pairs, lens = mesh.pop('orig_lens_pairs'), mesh['orig_lens']
+        mesh['orig_lens'] = {(int(i), int(j)): l for (i, j), l in zip(pairs, lens.tolist())}
+
+    return mesh
+
+def npz_to_trimesh(mesh, texture_image_path=None):
+    """Create a textured trimesh object from the loaded npz mesh
+
+        NOTE: Like OBJ loaders, splits the vertices at the texture seams 
+        (one mesh vertex per unique (vertex, uv) pair)
+    """
+    corners = np.stack((mesh['faces'], mesh['face_uvs']), axis=-1).reshape(-1, 2)
+    unique_corners, faces = np.unique(corners, axis=0, return_inverse=True)
+
+    visual = None
+    if texture_image_path is not None:
+        visual = trimesh.visual.TextureVisuals(
+            uv=mesh['uvs'][unique_corners[:, 1]], 
+            image=Image.open(texture_image_path))
+    return trimesh.Trimesh(
+        vertices=mesh['vertices'][unique_corners[:, 0]], 
+        faces=faces.reshape(-1, 3), 
+        visual=visual,
+        process=False)
+
+# !SECTION
@@ -72,6 +72,7 @@ class PathCofig:
 
         self.g_box_mesh = self.out_el / f'{self.boxmesh_tag}_boxmesh.obj'
         self.g_box_mesh_compressed = self.out_el / f'{self.boxmesh_tag}_boxmesh.ply'
+        self.g_box_mesh_npz = self.out_el / f'{self.boxmesh_tag}_boxmesh.npz'   # Binary alternative to obj & annotation files
         self.g_mesh_segmentation = self.out_el / f'{self.boxmesh_tag}_sim_segmentation.txt'
         self.g_orig_edge_len = self.out_el / f'{self.boxmesh_tag}_orig_lens.pickle'
         self.g_vert_labels = self.out_el / f'{self.boxmesh_tag}_vertex_labels.yaml'
@@ -89,7 +90,10 @@ class PathCofig:
         self.g_sim = self.out_el / f'{self.sim_tag}_sim.obj'
         self.g_sim_glb = self.out_el / f'{self.sim_tag}_sim.glb'
         self.g_sim_compressed = self.out_el / f'{self.sim_tag}_sim.ply'
+        self.g_sim_npz = self.out_el / f'{self.sim_tag}_sim.npz'
         self.usd = self.out_el / f'{self.sim_tag}_simulation.usd'
+        self.g_sim_profile_trace = self.out_el / f'{self.sim_tag}_sim_profile.json'
+        self.g_sim_profile_csv = self.out_el / f'{self.sim_tag}_sim_profile.csv'
 
 
     def render_path(self, camera_name=''):
@@ -122,6 +126,21 @@ class SimConfig:
             self.max_frame_time = int(self.max_frame_time)
         self.max_sim_time = int(self.get_sim_props_value(sim_props, 'max_sim_time', 25 * 60))
         self.non_static_percent = self.get_sim_props_value(sim_props, 'non_static_percent', 5)
+        # Convergence scheduler (see pygarment/meshgen/convergence.py)
+        self.convergence_criteria = self.get_sim_props_value(sim_props, 'convergence_criteria', ['static'])
+        if isinstance(self.convergence_criteria, str):
+            self.convergence_criteria = [self.convergence_criteria]
+        self.convergence_mode = self.get_sim_props_value(sim_props, 'convergence_mode', 'any')
+        self.convergence_check_interval = self.get_sim_props_value(sim_props, 'convergence_check_interval', 1)
+        self.convergence_adaptive_interval = self.get_sim_props_value(
+            sim_props, 'convergence_adaptive_interval', False)
+        self.convergence_max_check_interval = self.get_sim_props_value(
+            sim_props, 'convergence_max_check_interval', 16)
+        self.velocity_threshold = self.get_sim_props_value(sim_props, 'velocity_threshold', 1.0)  # cm/s
+        self.velocity_percent = self.get_sim_props_value(sim_props, 'velocity_percent', self.non_static_percent)
+        self.kinetic_energy_threshold = self.get_sim_props_value(sim_props, 'kinetic_energy_threshold', 0.5)
+        self.plateau_window = self.get_sim_props_value(sim_props, 'plateau_window', 20)
+        self.plateau_tolerance = self.get_sim_props_value(sim_props, 'plateau_tolerance', 0.05)
         # Quality filter
         self.max_body_collisions = self.get_sim_props_value(sim_props, 'max_body_collisions', 0)
         self.max_self_collisions = self.get_sim_props_value(sim_props, 'max_self_collisions', 0)
@@ -195,6 +214,16 @@ class SimConfig:
         self.cloth_reference_k = self.get_sim_props_value(
             sim_props_option,'cloth_reference_k', 1.0e7)
 
+        # Vertex normals of the saved frames
+        self.vertex_normals_weighting = self.get_sim_props_value(
+            sim_props_option, 'vertex_normals_weighting', 'uniform')
+        self.vertex_normals_on_device = self.get_sim_props_value(
+            sim_props_option, 'vertex_normals_on_device', False)
+
+        # Frame-level profiling: None, 'chrome' (trace file) or 'csv'
+        self.sim_profile = self.get_sim_props_value(
+            sim_props_option, 'sim_profile', None)
+
         # Body smoothing options
         self.enable_body_smoothing = self.get_sim_props_value(
             sim_props_option,'enable_body_smoothing', True)
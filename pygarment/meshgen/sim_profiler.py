@@ -0,0 +1,102 @@
+"""Frame-level timing of the simulation stages
+
+    Records the wall-clock time of the named sections of the simulation
+    (integration substeps, collision detection, attachment updates, static checks,
+    intersection counting, frame saving, etc.) for every frame and exports them
+    as Chrome trace (chrome://tracing, https://ui.perfetto.dev) or CSV table
+"""
+
+from contextlib import contextmanager, nullcontext
+import csv
+import json
+import time
+
+import warp as wp
+
+PROFILE_FORMATS = ['chrome', 'csv']
+
+
+class SimProfiler:
+    """Collects timings of the simulation sections"""
+    def __init__(self, enabled=True, synchronize=True, device=None) -> None:
+        """
+            * enabled -- if False, the sections are not recorded (no overhead)
+            * synchronize -- wait for the device to complete the launched kernels
+                at the end of every section. Otherwise, the time of the asynchronous GPU launches
+                is attributed to the section that reads the results
+            * device -- warp device to synchronize
+        """
+        self.enabled = enabled
+        self.synchronize = synchronize
+        self.device = device
+        self.frame = -1
+        self.events = []   # (name, category, frame, start, duration, args)
+        self._start = time.perf_counter()
+
+    def section(self, name, category='sim', **args):
+        """Context manager timing the section 'name' of the current frame"""
+        if not self.enabled:
+            return nullcontext()
+        return self._section(name, category, args)
+
+    @contextmanager
+    def _section(self, name, category, args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.synchronize and self.device is not None:
+                wp.synchronize_device(self.device)
+            self.events.append((name, category, self.frame, start - self._start, time.perf_counter() - start, args))
+
+    @contextmanager
+    def suspended(self):
+        """No recording inside the context (e.g. during CUDA graph capture)"""
+        enabled, self.enabled = self.enabled, False
+        try:
+            yield
+        finally:
+            self.enabled = enabled
+
+    def summary(self):
+        """Total time (sec) and number of calls of every section"""
+        totals = {}
+        for name, _, _, _, duration, _ in self.events:
+            total = totals.setdefault(name, dict(time=0., count=0))
+            total['time'] += duration
+            total['count'] += 1
+        return totals
+
+    # SECTION -- Export
+    def save(self, path, format='chrome'):
+        """Save the recorded timings in the given format"""
+        if format == 'chrome':
+            self.save_chrome_trace(path)
+        elif format == 'csv':
+            self.save_csv(path)
+        else:
+            raise ValueError(f'{self.__class__.__name__}::ERROR::Unknown profile format {format}. '
+                             f'Supported: {PROFILE_FORMATS}')
+
+    def save_chrome_trace(self, path):
+        """Save as Chrome trace event file (complete events, microseconds)"""
+        trace_events = [
+            {
+                'name': name, 'cat': category, 'ph': 'X',
+                'ts': start * 1e6, 'dur': duration * 1e6,
+                'pid': 0, 'tid': 0,
+                'args': dict(args, frame=frame)
+            }
+            for name, category, frame, start, duration, args in self.events
+        ]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, f)
+
+    def save_csv(self, path):
+        """Save as CSV table with one row per recorded section"""
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['frame', 'section', 'category', 'start_sec', 'duration_sec'])
+            for name, category, frame, start, duration, _ in self.events:
+                writer.writerow([frame, name, category, f'{start:.6f}', f'{duration:.6f}'])
+    # !SECTION
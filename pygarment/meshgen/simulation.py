@@ -26,8 +26,9 @@ import warp as wp
 
 # Custom code
 from pygarment.meshgen.render.pythonrender import render_images
-from pygarment.meshgen.garment import Cloth
+from pygarment.meshgen.garment import Cloth, SimBodyCache
 from pygarment.meshgen.sim_config import SimConfig, PathCofig
+from pygarment.meshgen.convergence import ConvergenceScheduler
 
 wp.init()
 
@@ -115,12 +116,18 @@ def _run_frame_with_timeout(garment, frame_timeout, frame_num):
     except TimeoutError as e:
         raise FrameTimeOutError
 
-def sim_frame_sequence(garment, config, store_usd=False, verbose=False):
+def sim_frame_sequence(garment, config, store_usd=False, verbose=False, scheduler=None):
+    """Simulate frames until the garment converges (see ConvergenceScheduler)
+        or the max number of frames is reached
+    """
+    if scheduler is None:
+        scheduler = ConvergenceScheduler.from_config(config)
 
     # Save initial state
     if store_usd:
         garment.render_usd_frame()
 
+    profiler = garment.profiler
     start_time = time.time()
     for frame in range(0, config.max_sim_steps):
         
@@ -130,28 +137,32 @@ def sim_frame_sequence(garment, config, store_usd=False, verbose=False):
             update_progress(frame, config.max_sim_steps)
 
         garment.frame = frame 
+        profiler.frame = frame
 
-        #Run frame and raise FrameTimeOutError if frame takes too long to simulate
-
-        static = False
-        if config.max_frame_time is None:
-            # No frame time limits
-            garment.run_frame()
-        else:
-            # NOTE: frame timeouts only work in the main thread of the program. 
-            # disable frame timeout by passing 'null' as a max_frame_time parameter in config
-            _run_frame_with_timeout(
-                garment, 
-                frame_timeout=config.max_frame_time if frame > 0 else config.max_frame_time * 2,
-                frame_num=frame
-            )
-
-        if verbose:
-            num_cloth_cloth_contacts = garment.count_self_intersections()
-            print(f'\nSelf-Intersection: {num_cloth_cloth_contacts}')
+        with profiler.section('frame', 'frame'):
+            #Run frame and raise FrameTimeOutError if frame takes too long to simulate
 
-        if frame >= config.zero_gravity_steps and frame >= config.min_sim_steps:
-            static, _ = garment.is_static()
+            static = False
+            if config.max_frame_time is None:
+                # No frame time limits
+                garment.run_frame()
+            else:
+                # NOTE: frame timeouts only work in the main thread of the program. 
+                # disable frame timeout by passing 'null' as a max_frame_time parameter in config
+                _run_frame_with_timeout(
+                    garment, 
+                    frame_timeout=config.max_frame_time if frame > 0 else config.max_frame_time * 2,
+                    frame_num=frame
+                )
+
+            if verbose:
+                with profiler.section('self_intersections', 'checks'):
+                    num_cloth_cloth_contacts = garment.count_self_intersections()
+                print(f'\nSelf-Intersection: {num_cloth_cloth_contacts}')
+
+            if scheduler.should_check(frame):
+                with profiler.section('convergence_check', 'checks'):
+                    static = scheduler.update(garment, frame)
         if static:
             break
 
@@ -164,10 +175,12 @@ def run_sim(
         cloth_name, props, paths: PathCofig, 
         save_v_norms=False, store_usd=False, 
         optimize_storage=False,
-        verbose=False): 
+        verbose=False,
+        body_cache: SimBodyCache = None): 
     """Initialize and run the simulation
     !! Important !! 
         'store_usd' parameter slows down the simulation to CPU rates because of required CPU-GPU copies and file writes. Use only for debugging
+        'body_cache' allows to reuse the preprocessed body model between the simulations in the same process
     """
     sim_props = props['sim']
     render_props = props['render']
@@ -175,11 +188,13 @@ def run_sim(
     start_time = time.time()
 
     config = SimConfig(sim_props['config'])   # Why separate class at all? 
-    garment = Cloth(cloth_name, config, paths, caching=store_usd)
+    body = body_cache.get(paths, config) if body_cache is not None else None
+    garment = Cloth(cloth_name, config, paths, caching=store_usd, body=body)
+    scheduler = ConvergenceScheduler.from_config(config)
 
     try:
         print("Simulation..")
-        sim_frame_sequence(garment, config, store_usd, verbose=verbose)
+        sim_frame_sequence(garment, config, store_usd, verbose=verbose, scheduler=scheduler)
     
     except FrameTimeOutError:
         print(f"FrameTimeOutError at frame {garment.frame}")
@@ -214,9 +229,11 @@ def run_sim(
             props.add_fail('sim', 'fast_finish', cloth_name)
 
         # 3D penetrations
-        num_body_collisions = garment.count_body_intersections()
+        with garment.profiler.section('body_intersections', 'checks'):
+            num_body_collisions = garment.count_body_intersections()
         print("BODY CLOTH INTERSECTIONS: ", num_body_collisions)
-        num_self_collisions = garment.count_self_intersections()
+        with garment.profiler.section('self_intersections', 'checks'):
+            num_self_collisions = garment.count_self_intersections()
 
         sim_props['stats']['body_collisions'][cloth_name] = num_body_collisions
         sim_props['stats']['self_collisions'][cloth_name] = num_self_collisions
@@ -239,16 +256,23 @@ def run_sim(
     sim_props['stats']['sim_time'][cloth_name] = sim_time = time.time() - start_time
     sim_props['stats']['spf'][cloth_name] = sim_time / frame if frame else sim_time
     sim_props['stats']['fin_frame'][cloth_name] = frame
+    sim_props['stats'].setdefault('convergence', {})[cloth_name] = scheduler.diagnostics()
 
-    garment.save_frame(save_v_norms=save_v_norms) #saving after stats
+    with garment.profiler.section('save_frame', 'io'):
+        garment.save_frame(save_v_norms=save_v_norms) #saving after stats
 
     # Render images
     s_time = time.time()
-    render_images(paths, garment.v_body, garment.f_body, render_props['config'])
+    with garment.profiler.section('render', 'io'):
+        render_images(paths, garment.v_body, garment.f_body, render_props['config'], garm_mesh=garment.textured_mesh())
     render_image_time = time.time() - s_time
     render_props['stats']['render_time'][cloth_name] = render_image_time  
     print(f"Rendering {cloth_name} took {render_image_time}s")
 
+    if config.sim_profile is not None:
+        profile_path = paths.g_sim_profile_trace if config.sim_profile == 'chrome' else paths.g_sim_profile_csv
+        garment.profiler.save(profile_path, format=config.sim_profile)
+
     if optimize_storage:
         optimize_garment_storage(paths)
 
@@ -0,0 +1,243 @@
+"""On-disk cache of the panel triangulations
+
+    Triangulations are addressed by the content of the panel outline:
+    boundary vertices quantized in the panel-local frame (up to translation
+    and their order), boundary segments, mesh resolution and mesh refinement criteria.
+    The mirrored outlines (e.g. left and right halves of the garment) are matched as well.
+
+    On a hit, the boundary vertices of the panel are kept as is, and only the vertices
+    inside the panel and the faces are taken from the cache.
+
+    NOTE: The cached triangulation is a valid triangulation of the panel,
+    but it might differ from the one CGAL would produce for the same panel
+    with a different order of boundary vertices
+"""
+
+import hashlib
+import os
+from pathlib import Path
+import zipfile
+
+import numpy as np
+
+import pygarment.meshgen.triangulation_utils as tri_utils
+
+_CACHE_VERSION = 1
+
+
+class _Outline:
+    """Canonical representation of the panel outline"""
+    def __init__(self, points, edge_verts_ids, mesh_resolution, quantization, mirror=False) -> None:
+        self.points = np.asarray(points, dtype=float).reshape(-1, 2)
+        self.sign = np.array([-1., 1.]) if mirror else np.array([1., 1.])
+        local = self.points * self.sign
+        self.offset = local.min(axis=0)
+        local = local - self.offset
+
+        quantized = np.round(local / quantization).astype(np.int64)
+        # Canonical order of boundary vertices
+        self.order = np.lexsort((quantized[:, 1], quantized[:, 0]))
+        self.rank = np.empty_like(self.order)
+        self.rank[self.order] = np.arange(len(self.order))
+        quantized = quantized[self.order]
+        self.valid = len(quantized) > 0 and not np.any(np.all(quantized[1:] == quantized[:-1], axis=1))
+
+        segments = np.sort(self.rank[np.asarray(edge_verts_ids, dtype=int).reshape(-1, 2)], axis=1)
+        segments = segments[np.lexsort((segments[:, 1], segments[:, 0]))]
+
+        content = hashlib.sha256()
+        content.update(repr((
+            _CACHE_VERSION,
+            float(mesh_resolution),
+            tri_utils.MESH_SHAPE_BOUND, tri_utils.MESH_SIZE_FACTOR,
+            float(quantization))).encode())
+        content.update(quantized.tobytes())
+        content.update(segments.astype(np.int64).tobytes())
+        self.key = content.hexdigest()
+
+    def to_canonical(self, vertices, faces):
+        """Panel mesh in the canonical frame"""
+        vertices = np.asarray(vertices, dtype=float).reshape(-1, 2) * self.sign - self.offset
+        faces = np.asarray(faces, dtype=int).reshape(-1, 3)
+        n = len(self.points)
+        faces = np.where(faces < n, self.rank[np.minimum(faces, n - 1)], faces)
+        if self.sign[0] < 0:
+            faces = faces[:, [0, 2, 1]]   # Keep the orientation of the faces
+        return vertices[n:], faces
+
+    def from_canonical(self, interior, faces):
+        """Panel mesh from the canonical frame"""
+        n = len(self.points)
+        interior = (interior + self.offset) * self.sign
+        faces = np.where(faces < n, self.order[np.minimum(faces, n - 1)], faces)
+        if self.sign[0] < 0:
+            faces = faces[:, [0, 2, 1]]
+        vertices = list(self.points) + list(interior)
+        return vertices, faces
+
+
+class TriangulationCache:
+    """Storage of panel triangulations in a folder, limited in size.
+        Least recently used triangulations are evicted first
+
+        The folder can be shared between processes
+    """
+    def __init__(self, path, max_size_mb=500, quantization=1e-4) -> None:
+        """
+            * path -- cache folder
+            * max_size_mb -- size limit of the cache folder
+            * quantization -- (cm) precision of the boundary vertices
+                coordinates when matching the panel outlines
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size_mb * 2**20
+        self.quantization = quantization
+        self.stats = dict(hits=0, misses=0)
+        self._size = None   # Estimate of the cache folder size
+
+    # SECTION -- Triangulation
+    def triangulate_panels(self, args, triangulate):
+        """Panel meshes (vertices, faces) for the list of triangulate_panel() arguments
+            (points, edge_verts_ids, mesh_resolution).
+            * triangulate -- function to triangulate the list of (missing) panels
+
+            Panels with matching outlines are triangulated only once.
+            The results are independent of how the misses are triangulated
+        """
+        results = [None] * len(args)
+        outlines = {}
+        to_compute, duplicates = [], []
+        computed_keys = set()
+        for i, panel_args in enumerate(args):
+            outlines[i] = self._outlines(*panel_args)
+            results[i] = self._lookup(outlines[i])
+            if results[i] is not None:
+                continue
+            if any(outline.key in computed_keys for outline in outlines[i]):
+                duplicates.append(i)
+            else:
+                to_compute.append(i)
+                computed_keys.add(outlines[i][0].key)
+
+        self.stats['hits'] += len(args) - len(to_compute) - len(duplicates)
+        self.stats['misses'] += len(to_compute)
+        for i, mesh in zip(to_compute, triangulate([args[i] for i in to_compute])):
+            results[i] = self._store(outlines[i][0], *mesh)
+
+        for i in duplicates:
+            results[i] = self._lookup(outlines[i])
+            if results[i] is None:   # Not stored
+                self.stats['misses'] += 1
+                results[i] = triangulate([args[i]])[0]
+            else:
+                self.stats['hits'] += 1
+
+        return results
+
+    def triangulate_panel(self, points, edge_verts_ids, mesh_resolution):
+        """Cached version of tri_utils.triangulate_panel()"""
+        return self.triangulate_panels(
+            [(points, edge_verts_ids, mesh_resolution)],
+            lambda args: [tri_utils.triangulate_panel(*panel_args) for panel_args in args]
+        )[0]
+
+    def _outlines(self, points, edge_verts_ids, mesh_resolution):
+        """Outline and its mirrored version"""
+        return [_Outline(points, edge_verts_ids, mesh_resolution, self.quantization, mirror=mirror)
+                for mirror in [False, True]]
+
+    # !SECTION
+    # SECTION -- Storage
+    def _entry_path(self, key):
+        return self.path / f'{key}.npz'
+
+    def _lookup(self, outlines):
+        for outline in outlines:
+            if not outline.valid:
+                return None
+            entry = self._entry_path(outline.key)
+            try:
+                with np.load(entry) as data:
+                    interior, faces = data['interior'], data['faces']
+                os.utime(entry)   # Mark as recently used
+            except (OSError, ValueError, KeyError, zipfile.BadZipFile):   # Missing or broken entry
+                continue
+            return outline.from_canonical(interior, faces)
+        return None
+
+    def _store(self, outline, vertices, faces):
+        """Store the panel mesh. 
+            Returns the mesh in the form it is read from the cache 
+            (differs from the input by the round-off errors) 
+        """
+        n = len(outline.points)
+        faces = np.asarray(faces, dtype=int).reshape(-1, 3)
+        if (not outline.valid or len(vertices) < n
+                or not np.array_equal(np.asarray(vertices[:n], dtype=float), outline.points)):
+            # NOTE: Boundary vertices are expected to come first and unchanged
+            return vertices, faces
+        if (not len(faces) or faces.min() < 0 or faces.max() >= len(vertices)
+                or not tri_utils.is_manifold(faces, np.asarray(vertices, dtype=float))):
+            # Don't reuse broken triangulations
+            return vertices, faces
+        interior, canonical_faces = outline.to_canonical(vertices, faces)
+
+        entry = self._entry_path(outline.key)
+        tmp_path = entry.with_name(f'{entry.name}.{os.getpid()}.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, interior=interior, faces=canonical_faces)
+        entry_size = tmp_path.stat().st_size
+        os.replace(tmp_path, entry)
+
+        if self._size is None:
+            self._size = self.size()
+        else:
+            self._size += entry_size
+        if self._size > self.max_size:
+            self.evict()
+
+        return outline.from_canonical(interior, canonical_faces)
+
+    def size(self):
+        """Total size of the stored triangulations (bytes)"""
+        size = 0
+        for entry in self.path.glob('*.npz'):
+            try:
+                size += entry.stat().st_size
+            except FileNotFoundError:  # Evicted by another process
+                pass
+        return size
+
+    def evict(self, target_fraction=0.8):
+        """Remove the least recently used triangulations until the
+            cache size fits into target_fraction of the limit
+        """
+        entries = []
+        for entry in self.path.glob('*.npz'):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        entries.sort(key=lambda e: e[0])
+
+        size = sum(e[1] for e in entries)
+        for _, entry_size, entry in entries:
+            if size <= self.max_size * target_fraction:
+                break
+            try:
+                entry.unlink()
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+        self._size = size
+
+    def clear(self):
+        for entry in self.path.glob('*.npz'):
+            try:
+                entry.unlink()
+            except FileNotFoundError:
+                pass
+        self._size = 0
+    # !SECTION
@@ -1,5 +1,7 @@
 """Helper functions for the triangulation of the panels"""
 
+from collections import deque
+
 import numpy as np
 import matplotlib.pyplot as plt
 
@@ -11,6 +13,10 @@ from CGAL.CGAL_Mesh_2 import Delaunay_mesh_size_criteria_2
 from CGAL import CGAL_Mesh_2
 from CGAL.CGAL_Triangulation_2 import Constrained_Delaunay_triangulation_2
 
+# Mesh refinement criteria: shape bound (default one) and max edge length relative to mesh resolution
+MESH_SHAPE_BOUND = 0.125
+MESH_SIZE_FACTOR = 1.43 #1.475
+
 
 class FaceInfo2(object):
     """
@@ -28,10 +34,9 @@ def mark_domains(ct, start_face, index, edge_border, face_info):
     """
     if face_info[start_face].nesting_level != -1:
         return
-    queue = [start_face]
-    while queue != []:
-        fh = queue[0]  # queue.front
-        queue = queue[1:]  # queue.pop_front
+    queue = deque([start_face])
+    while queue:
+        fh = queue.popleft()
         if face_info[fh].nesting_level == -1:
             face_info[fh].nesting_level = index
             for i in range(3):
@@ -62,11 +67,10 @@ def mark_domain(cdt):
     for face in cdt.all_faces():
         face_info[face] = FaceInfo2()
     index = 0
-    border = []
+    border = deque()
     mark_domains(cdt, cdt.infinite_face(), index + 1, border, face_info)
-    while border != []:
-        e = border[0]  # border.front
-        border = border[1:]  # border.pop_front
+    while border:
+        e = border.popleft()
         n = e[0].neighbor(e[1])
         if face_info[n].nesting_level == -1:
             lvl = face_info[e[0]].nesting_level + 1
@@ -184,17 +188,11 @@ def get_face_v_ids(cdt, points, new_points, check=False, plot = False):
           as keys. The values of the dict are the indices replacing the indices of the newly inserted points.
         * check (bool): if True checks if coordinates of vertex handle from face vertex equals point coordinates
     Output:
-        * f (list): (N x 3) list of vertex indices describing the faces
+        * f (ndarray): (N x 3) array of vertex indices describing the faces
 
     Note: We first replace the vertex handle's coordinates of all points by their indices into points / cdt_points
     because face_handle stores the vertex coordinates and not their indices into points -> speeds up creation of f
     """
-    face_v_ids = []
-
-    if new_points:
-        sorted_faces = []
-        new_points_ids = new_points.keys()
-
     pts = list(cdt.finite_vertices())
 
     if check:
@@ -216,33 +214,84 @@ def get_face_v_ids(cdt, points, new_points, check=False, plot = False):
 
     # Keep faces that are in the domain
     face_info_new = mark_domain(cdt)
+    f = domain_face_v_ids(cdt, face_info_new)
+
+    if new_points:
+        # Replace the newly inserted points
+        replace_ids = np.arange(max(len(pts), max(new_points) + 1))
+        replace_ids[list(new_points.keys())] = list(new_points.values())
+        f = replace_ids[f]
 
-    for face in cdt.finite_faces():
-        if face_info_new[face].in_domain():
-            v0_id = int(face.vertex(0).point().x())
-            v1_id = int(face.vertex(1).point().x())
-            v2_id = int(face.vertex(2).point().x())
-
-            if new_points:
-                v_ids = [v0_id,v1_id,v2_id]
-                for j, v_id in enumerate(v_ids):
-                    if v_id in new_points_ids:
-                        v_ids[j] = new_points[v_id]
-
-                #check if face now is not an edge/point and not already inserted in faces
-                if not (v_ids[0] == v_ids[1] or v_ids[1] == v_ids[2] or v_ids[0] == v_ids[2]) \
-                        and not (sorted_faces and np.any(np.all(np.array(sorted_faces) == sorted(v_ids), axis=1))):
-                    face_v_ids.append(v_ids)
-                    sorted_faces.append(sorted(v_ids))
-            else:
-                face_v_ids.append([v0_id, v1_id, v2_id])
+        #Remove faces that now are edges/points or were already inserted in faces
+        f = f[(f[:, 0] != f[:, 1]) & (f[:, 1] != f[:, 2]) & (f[:, 0] != f[:, 2])]
+        f = unique_faces(f)
 
     if plot:
         plot_triangulation(cdt, face_info_new)
 
-    f = np.array(face_v_ids)
     return f
 
+def domain_face_v_ids(cdt, face_info):
+    """
+    This function returns the vertex indices of the cdt faces in the domain, when the
+    vertex handle's coordinates are replaced by their indices (as in get_face_v_ids()).
+    Input:
+        * cdt (Mesh_2_Constrained_Delaunay_triangulation_2)
+        * face_info (dict): Domain marks of the faces (see mark_domain())
+    Output:
+        * f (ndarray): (N x 3) array of vertex indices describing the faces
+    """
+    face_v_ids = [
+        (face.vertex(0).point().x(), face.vertex(1).point().x(), face.vertex(2).point().x())
+        for face in cdt.finite_faces() if face_info[face].in_domain()
+    ]
+    return np.array(face_v_ids, dtype=float).reshape(-1, 3).astype(int)
+
+def face_keys(faces, n_vertices=None):
+    """
+    Integer keys of the faces independent of the order of vertices in the faces.
+    Input:
+        * faces (ndarray): (N x 3) vertex indices 
+        * n_vertices (int): Upper bound of the vertex indices (defaults to max index + 1)
+    Output:
+        * keys (ndarray): (N, ) keys
+    """
+    faces = np.sort(np.asarray(faces, dtype=np.int64), axis=1)
+    if n_vertices is None:
+        n_vertices = int(faces.max()) + 1 if len(faces) else 1
+    return (faces[:, 0] * n_vertices + faces[:, 1]) * n_vertices + faces[:, 2]
+
+def unique_faces(faces):
+    """
+    This function removes the repeated faces (with the same vertices in any order), 
+    keeping the first occurence of every face and the order of faces
+    Input:
+        * faces (ndarray): (N x 3) vertex indices
+    Output:
+        * f (ndarray): (M x 3) unique faces
+    """
+    if not len(faces):
+        return faces
+    _, first_ids = np.unique(face_keys(faces), return_index=True)
+    return faces[np.sort(first_ids)]
+
+def boundary_edges(faces):
+    """
+    This function returns the edges that belong to exactly one face (i.e. boundary edges of the mesh)
+    Input:
+        * faces (ndarray): (N x 3) vertex indices
+    Output:
+        * edges (ndarray): (M x 2) sorted vertex indices of boundary edges, in lexicographical order
+    """
+    faces = np.sort(np.asarray(faces, dtype=np.int64), axis=1)
+    if not len(faces):
+        return np.empty((0, 2), dtype=np.int64)
+    n_vertices = int(faces[:, 2].max()) + 1
+    edges = np.concatenate([faces[:, :2], faces[:, 1:], faces[:, ::2]])
+    unique_keys, counts = np.unique(edges[:, 0] * n_vertices + edges[:, 1], return_counts=True)
+    boundary_keys = unique_keys[counts == 1]
+    return np.stack([boundary_keys // n_vertices, boundary_keys % n_vertices], axis=1)
+
 def get_faces_sorted(cdt):
     """
     This function returns the faces of cdt as a list of *sorted* ints instead of vertex handles.
@@ -253,8 +302,6 @@ def get_faces_sorted(cdt):
         * points (list): The vertices of cdt whose coordinates have been converted to floats
     """
 
-    face_v_ids = []
-
     pts = list(cdt.finite_vertices())
     points = []
 
@@ -266,18 +313,8 @@ def get_faces_sorted(cdt):
 
     # Keep faces that are in the domain
     face_info_new = mark_domain(cdt)
+    f = np.sort(domain_face_v_ids(cdt, face_info_new), axis=1)
 
-    for face in cdt.finite_faces():
-        if face_info_new[face].in_domain():
-            v0_id = int(face.vertex(0).point().x())
-            v1_id = int(face.vertex(1).point().x())
-            v2_id = int(face.vertex(2).point().x())
-
-            sorted_ids = sorted([v0_id, v1_id, v2_id])
-
-            face_v_ids.append(sorted_ids)
-
-    f = np.array(face_v_ids)
     return f, points
 
 def get_keep_vertices(cdt, len_b):
@@ -290,10 +327,7 @@ def get_keep_vertices(cdt, len_b):
         * keep_vertices: vertices of cdt without newly inserted boundary points
     """
     faces, points = get_faces_sorted(cdt)
-    edges = np.concatenate([faces[:, :2], faces[:, 1:], faces[:, ::2]])
-    unique_edges, counts = np.unique(np.array(edges), axis=0, return_counts=True)
-    unique_occurring_edges = unique_edges[counts == 1]
-    all_bdry_v_ids = np.unique(unique_occurring_edges.flatten())
+    all_bdry_v_ids = np.unique(boundary_edges(faces))
     new_bdry_v_ids = all_bdry_v_ids[all_bdry_v_ids >= len_b]
 
     #remove new_boundary_vertices
@@ -311,3 +345,47 @@ def is_manifold(face_v_ids: np.ndarray, points: np.ndarray, tol=1e-2):
     side_lengths = np.stack([face_side_1, face_side_2, face_side_3], axis=-1)
 
     return np.all(side_lengths.sum(axis=1) > 2 * side_lengths.max(axis=1) + tol)
+
+def triangulate_panel(points, edge_verts_ids, mesh_resolution, plot=False, check=False):
+    """
+    This function generates the vertices inside the panel from the panel boundary and triangulates it.
+    Output depends only on the inputs, hence the panels can be triangulated independently
+    (e.g. in separate processes)
+    Input:
+        * points (list): Edge vertices of the panel
+        * edge_verts_ids (ndarray): Start and end indices into points of the panel boundary segments
+        * mesh_resolution (float): Target edge length of the mesh
+        * plot (bool): Indicates if triangle mesh should be plotted
+        * check (bool): Indicates if point coordiantes should be compared
+    Output:
+        * keep_pts_f (list): Vertices of the panel mesh (without newly inserted boundary vertices)
+        * f (ndarray): Triangle faces of the panel
+    """
+    len_points = len(points)
+
+    cdt_mesh = Mesh_2_Constrained_Delaunay_triangulation_2()
+    cdt_points_mesh = create_cdt_points(cdt_mesh, points)
+    cdt_insert_constraints(cdt_mesh, cdt_points_mesh, edge_verts_ids)
+
+    #Meshing the triangulation with default shape criterion; i.e. sqrt(1/(4 * 0.125)) = sqrt(2)
+    CGAL_Mesh_2.refine_Delaunay_mesh_2(
+        cdt_mesh, Delaunay_mesh_size_criteria_2(MESH_SHAPE_BOUND, MESH_SIZE_FACTOR * mesh_resolution))
+
+    if plot:
+        # Mark faces that are inside the domain
+        face_info = mark_domain(cdt_mesh)
+        plot_triangulation(cdt_mesh, face_info)
+
+    keep_pts_f = get_keep_vertices(cdt_mesh, len_points)
+
+    # Triangulate mesh without newly inserted boundary points
+    cdt = Constrained_Delaunay_triangulation_2()
+    cdt_points = create_cdt_points(cdt, keep_pts_f)
+    new_points = cdt_insert_constraints(cdt, cdt_points, edge_verts_ids)
+
+    # Faces without accidentially inserted points -- again!
+    # NOTE: point insertion might be a sign of degenerate triangles. 
+    # But instead a separate check was added
+    f = get_face_v_ids(cdt, keep_pts_f, new_points, check=check, plot=plot)
+
+    return keep_pts_f, f
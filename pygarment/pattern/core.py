@@ -13,6 +13,7 @@ import svgpathtools as svgpath
 # My
 from . import rotation as rotation_tools
 from . import utils
+from .curves import svg_curves_intersecting
 
 standard_filenames = [
     'specification',  # e.g. used by dataset generation
@@ -514,23 +515,8 @@ class BasicPattern(object):
             else:
                 edge_curves.append(curve)
 
-        # NOTE: simple pairwise checks of edges
-        for i1 in range(0, len(edge_curves)):
-           for i2 in range(i1 + 1, len(edge_curves)):
-                intersect_t = edge_curves[i1].intersect(edge_curves[i2])
-                
-                # Check exceptions -- intersection at the vertex
-                for i in range(len(intersect_t)): 
-                    t1, t2 = intersect_t[i]
-                    if t2 < t1:
-                        t1, t2 = t2, t1
-                    if utils.close_enough(t1, 0) and utils.close_enough(t2, 1):
-                        intersect_t[i] = None
-                intersect_t = [el for el in intersect_t if el is not None]
-
-                if intersect_t:  # Any other case of intersections
-                    return True      
-        return False 
+        # NOTE: pairwise checks of edges with overlapping bounding boxes
+        return svg_curves_intersecting(edge_curves) 
 
 # NOTE: Deprecated. Preserved for backward compatibility 
 # with the first dataset of 3D garments and sewing patterns
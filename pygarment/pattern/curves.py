@@ -0,0 +1,440 @@
+"""
+    Vectorized evaluation of the curves used in sewing patterns:
+    quadratic / cubic Bezier curves and circular arcs
+
+    Points, derivatives and arc lengths are evaluated for batches of curve
+    parameter values (t) at once, avoiding per-point calls to svgpathtools
+"""
+
+from math import comb
+
+import numpy as np
+import svgpathtools as svgpath
+
+# Gauss-Legendre quadrature nodes on [0, 1] for arc length integration
+_GL_X, _GL_W = np.polynomial.legendre.leggauss(16)
+_GL_X = (_GL_X + 1) / 2
+_GL_W = _GL_W / 2
+
+# Default number of intervals in the arc length table
+ARC_TABLE_SIZE = 32
+
+
+# ---- Bezier curves ----
+def _bernstein(degree, t):
+    """Bernstein basis of a given degree evaluated at t values:
+        shape (len(t), degree + 1)
+    """
+    t = np.asarray(t, dtype=float)[:, None]
+    k = np.arange(degree + 1)
+    binom = np.array([comb(degree, i) for i in k])
+    return binom * t**k * (1 - t)**(degree - k)
+
+
+def bezier_points(nodes, t):
+    """Points of the Bezier curve with control polygon 'nodes'
+        (shape (degree + 1, 2)) at parameter values t.
+
+        Returns an array of shape (len(t), 2)
+    """
+    nodes = np.asarray(nodes, dtype=float)
+    t = np.atleast_1d(t)
+    return _bernstein(len(nodes) - 1, t) @ nodes
+
+
+def bezier_derivative(nodes, t):
+    """First derivative of the Bezier curve at parameter values t"""
+    nodes = np.asarray(nodes, dtype=float)
+    degree = len(nodes) - 1
+    return degree * bezier_points(np.diff(nodes, axis=0), t)
+
+
+def bezier_second_derivative(nodes, t):
+    """Second derivative of the Bezier curve at parameter values t"""
+    nodes = np.asarray(nodes, dtype=float)
+    degree = len(nodes) - 1
+    if degree < 2:
+        return np.zeros((len(np.atleast_1d(t)), 2))
+    return degree * (degree - 1) * bezier_points(np.diff(nodes, n=2, axis=0), t)
+
+
+def _derivative_basis(degree, t):
+    """Matrix D of shape (len(t), degree + 1) such that B'(t) = D @ nodes"""
+    basis = _bernstein(degree - 1, t)
+    mat = np.zeros((len(basis), degree + 1))
+    mat[:, 1:] += basis
+    mat[:, :-1] -= basis
+    return degree * mat
+
+
+def _second_derivative_basis(degree, t):
+    """Matrix D2 of shape (len(t), degree + 1) such that B''(t) = D2 @ nodes"""
+    basis = _bernstein(degree - 2, t)
+    mat = np.zeros((len(basis), degree + 1))
+    mat[:, 2:] += basis
+    mat[:, 1:-1] -= 2 * basis
+    mat[:, :-2] += basis
+    return degree * (degree - 1) * mat
+
+
+def bezier_length_gradient(nodes, n_intervals=8):
+    """Length of the Bezier curve and its gradient w.r.t. the control points
+
+        The length is integrated with composite Gauss-Legendre quadrature 
+        over 'n_intervals' equal intervals.
+        Returns (length, gradient of shape (degree + 1, 2))
+    """
+    nodes = np.asarray(nodes, dtype=float)
+    t = ((np.arange(n_intervals)[:, None] + _GL_X[None, :]) / n_intervals).ravel()
+    weights = np.tile(_GL_W, n_intervals) / n_intervals
+
+    deriv_basis = _derivative_basis(len(nodes) - 1, t)
+    deriv = deriv_basis @ nodes
+    speed = np.linalg.norm(deriv, axis=-1)
+    length = weights @ speed
+
+    # d|B'(t)|/dP_i = D_i(t) * B'(t) / |B'(t)|
+    unit = np.divide(deriv, speed[:, None], out=np.zeros_like(deriv), where=speed[:, None] > 0)
+    grad = deriv_basis.T @ (weights[:, None] * unit)
+
+    return length, grad
+
+
+def bezier_max_sq_curvature_gradient(nodes, t):
+    """Maximum of the squared curvature of the Bezier curve over the 
+        parameter values t, and its gradient w.r.t. the control points
+        (gradient of the squared curvature at the maximizing sample)
+
+        Returns (max squared curvature, gradient of shape (degree + 1, 2))
+    """
+    nodes = np.asarray(nodes, dtype=float)
+    degree = len(nodes) - 1
+    t = np.atleast_1d(t)
+    if degree < 2:
+        return 0., np.zeros_like(nodes)
+
+    deriv_basis = _derivative_basis(degree, t)
+    second_basis = _second_derivative_basis(degree, t)
+    d1 = deriv_basis @ nodes
+    d2 = second_basis @ nodes
+
+    cross = d1[:, 0] * d2[:, 1] - d1[:, 1] * d2[:, 0]
+    sq_speed = (d1**2).sum(axis=-1)
+    valid = sq_speed > 0
+    sq_curvature = np.zeros_like(cross)
+    sq_curvature[valid] = cross[valid]**2 / sq_speed[valid]**3
+
+    i = np.argmax(sq_curvature)
+    if not valid[i]:
+        return 0., np.zeros_like(nodes)
+
+    # Chain rule through the cross product and the squared speed
+    d_cross = 2 * cross[i] / sq_speed[i]**3
+    d_sq_speed = -3 * cross[i]**2 / sq_speed[i]**4
+    grad_cross = (np.outer(deriv_basis[i], [d2[i, 1], -d2[i, 0]]) 
+                  + np.outer(second_basis[i], [-d1[i, 1], d1[i, 0]]))
+    grad_sq_speed = 2 * np.outer(deriv_basis[i], d1[i])
+
+    return sq_curvature[i], d_cross * grad_cross + d_sq_speed * grad_sq_speed
+
+
+def _speed(nodes, t):
+    return np.linalg.norm(bezier_derivative(nodes, t), axis=-1)
+
+
+def _interval_lengths(nodes, t_low, t_high):
+    """Gauss-Legendre estimates of curve lengths over [t_low, t_high] intervals"""
+    h = t_high - t_low
+    t_quad = t_low[:, None] + h[:, None] * _GL_X[None, :]
+    speed = _speed(nodes, t_quad.ravel()).reshape(len(h), -1)
+    return h * (speed @ _GL_W)
+
+
+def bezier_arc_table(nodes, n_intervals=ARC_TABLE_SIZE, tol=1e-10, max_depth=20):
+    """Arc length table of the Bezier curve:
+        cumulative lengths at the grid of t values that starts from 
+        n_intervals uniform intervals, adaptively refined until the per-interval
+        length estimates are within tol (e.g. around cusps)
+
+        Returns (t grid, cumulative lengths)
+    """
+    t_grid = np.linspace(0, 1, n_intervals + 1)
+    seg_lens = _interval_lengths(nodes, t_grid[:-1], t_grid[1:])
+    for _ in range(max_depth):
+        t_mid = (t_grid[:-1] + t_grid[1:]) / 2
+        halfs_1 = _interval_lengths(nodes, t_grid[:-1], t_mid)
+        halfs_2 = _interval_lengths(nodes, t_mid, t_grid[1:])
+        refine = np.abs(halfs_1 + halfs_2 - seg_lens) > tol
+        if not refine.any():
+            break
+        # Split the inaccurate intervals in two
+        t_grid = np.sort(np.concatenate((t_grid, t_mid[refine])))
+        seg_lens = np.stack((halfs_1, halfs_2), axis=-1)
+        seg_lens = np.concatenate([
+            seg_lens[i] if r else seg_lens[i].sum(keepdims=True)
+            for i, r in enumerate(refine)])
+
+    return t_grid, np.concatenate(([0.], np.cumsum(seg_lens)))
+
+
+def bezier_length(nodes, t0=0., t1=1., table=None):
+    """Length of the Bezier curve between t0 and t1"""
+    lens = _table_lengths(nodes, np.asarray([t0, t1], dtype=float), table)
+    return lens[1] - lens[0]
+
+
+def _table_lengths(nodes, t, table=None):
+    """Arc length from the curve start to each of the given t values
+        using the pre-computed arc length table
+    """
+    t_grid, cum_lens = bezier_arc_table(nodes) if table is None else table
+    ids = np.clip(
+        np.searchsorted(t_grid, t, side='right') - 1, 0, len(t_grid) - 2)
+
+    # Integrate the remainder of each interval
+    return cum_lens[ids] + _interval_lengths(nodes, t_grid[ids], t)
+
+
+def bezier_inverse_length(nodes, lengths, tol=1e-10, max_iter=50, table=None):
+    """Evaluate curve parameters (t) corresponding to the given arc lengths
+        measured from the start of the curve (inverse arc length)
+
+        * lengths -- array of arc length values
+        * tol -- tolerance on the arc length of the found solutions
+        * table -- pre-computed arc length table (optional)
+
+        Uses Newton iterations initialized from the arc length table,
+        safeguarded by bisection on the table interval
+    """
+    table = bezier_arc_table(nodes) if table is None else table
+    t_grid, cum_lens = table
+    lengths = np.atleast_1d(np.asarray(lengths, dtype=float))
+    lengths = np.clip(lengths, 0, cum_lens[-1])
+
+    # Brackets from the table
+    ids = np.clip(
+        np.searchsorted(cum_lens, lengths, side='right') - 1,
+        0, len(t_grid) - 2)
+    low, high = t_grid[ids].copy(), t_grid[ids + 1].copy()
+    seg_lens = cum_lens[ids + 1] - cum_lens[ids]
+    frac = np.divide(
+        lengths - cum_lens[ids], seg_lens,
+        out=np.zeros_like(lengths), where=seg_lens > 0)
+    t = low + frac * (high - low)
+
+    for _ in range(max_iter):
+        err = _table_lengths(nodes, t, table) - lengths
+        done = np.abs(err) < tol
+        if done.all():
+            break
+        # Update brackets
+        low = np.where(err < 0, t, low)
+        high = np.where(err > 0, t, high)
+
+        speed = _speed(nodes, t)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t_newton = t - err / speed
+        # Fallback to bisection when Newton step leaves the bracket
+        bad = ~np.isfinite(t_newton) | (t_newton <= low) | (t_newton >= high)
+        t_new = np.where(bad, (low + high) / 2, t_newton)
+        t = np.where(done, t, t_new)
+
+    return t
+
+
+def bezier_y_extremizers(nodes):
+    """Parameter values in (0, 1) where the Y coordinate of the curve
+        reaches its extremes
+    """
+    nodes = np.asarray(nodes, dtype=float)
+    # Power basis coefficients of the derivative of Y
+    dy = np.diff(nodes[:, 1]) * (len(nodes) - 1)
+    if len(dy) == 1:
+        return np.array([])
+    if len(dy) == 2:
+        poly = [dy[1] - dy[0], dy[0]]
+    else:
+        poly = [dy[0] - 2 * dy[1] + dy[2], 2 * (dy[1] - dy[0]), dy[0]]
+    # Strip leading zeros
+    poly = np.trim_zeros(np.asarray(poly), trim='f')
+    if len(poly) < 2:
+        return np.array([])
+    roots = np.roots(poly)
+    roots = roots[np.isreal(roots)].real
+
+    return np.sort(roots[(roots > 0) & (roots < 1)])
+
+
+# ---- Circular arcs ----
+def arc_points(center, radius, theta, delta, t):
+    """Points of the circular arc at parameter values t
+
+        * center -- 2D center of the circle
+        * theta -- angle of the start point (radians)
+        * delta -- angular span of the arc (radians, signed)
+    """
+    angles = theta + delta * np.atleast_1d(np.asarray(t, dtype=float))
+    return np.asarray(center)[None, :] + radius * np.stack(
+        (np.cos(angles), np.sin(angles)), axis=-1)
+
+
+def arc_length(radius, delta):
+    """Length of the circular arc"""
+    return abs(radius * delta)
+
+
+def arc_inverse_length(radius, delta, lengths):
+    """Curve parameters corresponding to given arc lengths:
+        exact for circles since the arc is parametrized by angle"""
+    return np.clip(np.atleast_1d(lengths) / arc_length(radius, delta), 0, 1)
+
+
+# ---- svgpathtools interoperability ----
+def svg_curve_nodes(curve):
+    """Control polygon of svgpathtools Line or Bezier curve as numpy array"""
+    bpoints = curve.bpoints()
+    return np.array([[p.real, p.imag] for p in bpoints])
+
+
+def svg_arc_params(arc: svgpath.Arc):
+    """Circular arc parameters (center, radius, theta, delta) of the
+        svgpathtools Arc (angles in radians)
+
+        NOTE: only circular arcs without rotation are supported
+    """
+    return (np.array([arc.center.real, arc.center.imag]),
+            arc.radius.real,
+            np.radians(arc.theta),
+            np.radians(arc.delta))
+
+
+def svg_curve_points(curve, t):
+    """Points of any supported svgpathtools curve at parameter values t"""
+    if isinstance(curve, svgpath.Arc):
+        return arc_points(*svg_arc_params(curve), t)
+    return bezier_points(svg_curve_nodes(curve), t)
+
+
+def svg_curve_length(curve):
+    """Length of any supported svgpathtools curve"""
+    if isinstance(curve, svgpath.Arc):
+        _, radius, _, delta = svg_arc_params(curve)
+        return arc_length(radius, delta)
+    return bezier_length(svg_curve_nodes(curve))
+
+
+def svg_curve_inverse_length(curve, lengths, tol=1e-10):
+    """Parameter values (t) of svgpathtools curve at given arc lengths"""
+    if isinstance(curve, svgpath.Arc):
+        _, radius, _, delta = svg_arc_params(curve)
+        return arc_inverse_length(radius, delta, lengths)
+    return bezier_inverse_length(svg_curve_nodes(curve), lengths, tol=tol)
+
+
+# ---- Intersections ----
+def svg_curve_bboxes(curves):
+    """Conservative 2D bounding boxes [x_min, y_min, x_max, y_max] of
+        svgpathtools curves
+
+        Bezier curves (and lines) lie in the convex hull of their control
+        polygon, so its bounding box is used without solving for extrema
+    """
+    bboxes = np.empty((len(curves), 4))
+    for i, curve in enumerate(curves):
+        if isinstance(curve, svgpath.Arc):
+            x_min, x_max, y_min, y_max = curve.bbox()
+            bboxes[i] = x_min, y_min, x_max, y_max
+        else:
+            nodes = svg_curve_nodes(curve)
+            bboxes[i, :2] = nodes.min(axis=0)
+            bboxes[i, 2:] = nodes.max(axis=0)
+    return bboxes
+
+
+def bbox_overlap_pairs(bboxes, tol=1e-6):
+    """Index pairs (i < j) of overlapping bounding boxes
+
+        Sweep over boxes sorted by x_min: candidates of each box are the
+        boxes starting before its x_max, then filtered by the y overlap.
+        Pairs are returned in lexicographic order
+    """
+    bboxes = np.asarray(bboxes, dtype=float)
+    order = np.argsort(bboxes[:, 0], kind='stable')
+    sorted_boxes = bboxes[order]
+    ends = np.searchsorted(sorted_boxes[:, 0], sorted_boxes[:, 2] + tol, side='right')
+
+    first, second = [], []
+    for k, end in enumerate(ends):
+        if end > k + 1:
+            first.append(np.full(end - k - 1, k))
+            second.append(np.arange(k + 1, end))
+    if not first:
+        return np.empty((0, 2), dtype=int)
+    first, second = np.concatenate(first), np.concatenate(second)
+
+    # y overlap
+    b1, b2 = sorted_boxes[first], sorted_boxes[second]
+    overlap = (b1[:, 1] <= b2[:, 3] + tol) & (b2[:, 1] <= b1[:, 3] + tol)
+
+    pairs = np.sort(np.stack([order[first[overlap]], order[second[overlap]]], axis=1), axis=1)
+    return pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+
+
+def _vertex_cone(nodes, apex, tol=1e-9):
+    """Angular interval (center, half-width) of the cone from the apex
+        that contains the control polygon of the curve (hence the curve).
+        None if the cone is not narrower than a half-plane
+    """
+    vecs = nodes - apex
+    vecs = vecs[np.linalg.norm(vecs, axis=1) > tol]
+    if not len(vecs):
+        return None
+    angles = np.arctan2(vecs[:, 1], vecs[:, 0])
+    ref = angles[0]
+    offsets = (angles - ref + np.pi) % (2 * np.pi) - np.pi
+    low, high = offsets.min(), offsets.max()
+    if high - low >= np.pi:
+        return None
+    return ref + (low + high) / 2, (high - low) / 2
+
+
+def _touch_only_at_joint(nodes1, nodes2, tol=1e-4, angle_tol=1e-6):
+    """Conservative check that two consecutive Bezier curves
+        (the end of one is the start of the other) have no common points 
+        other than the joint vertex: their control polygons lie in disjoint 
+        cones with the apex at the joint
+    """
+    if np.abs(nodes1[-1] - nodes2[0]).max() < tol:
+        apex = nodes1[-1]
+    elif np.abs(nodes1[0] - nodes2[-1]).max() < tol:
+        apex = nodes1[0]
+    else:
+        return False
+
+    cone1, cone2 = _vertex_cone(nodes1, apex), _vertex_cone(nodes2, apex)
+    if cone1 is None or cone2 is None:
+        return False
+    dist = abs((cone1[0] - cone2[0] + np.pi) % (2 * np.pi) - np.pi)
+    return dist > cone1[1] + cone2[1] + angle_tol
+
+
+def svg_curves_intersecting(curves, tol=1e-4):
+    """Check whether any two of the given svgpathtools curves intersect
+
+        Touching at the shared vertex (end of one curve to the start of
+        the other) is not considered an intersection.
+        Exact curve intersections are only computed for the curves with
+        overlapping bounding boxes, and skipped for consecutive curves 
+        that provably meet only at the shared vertex
+    """
+    nodes = [None if isinstance(c, svgpath.Arc) else svg_curve_nodes(c) for c in curves]
+    for i1, i2 in bbox_overlap_pairs(svg_curve_bboxes(curves)):
+        if (nodes[i1] is not None and nodes[i2] is not None 
+                and _touch_only_at_joint(nodes[i1], nodes[i2], tol=tol)):
+            continue
+        for t1, t2 in curves[i1].intersect(curves[i2]):
+            if t2 < t1:
+                t1, t2 = t2, t1
+            if not (abs(t1) < tol and abs(t2 - 1) < tol):
+                return True   # Any case except intersection at the vertex
+    return False
@@ -2,6 +2,7 @@
     To be used in Python 3.6+ due to dependencies
 """
 from copy import copy
+import json
 import random
 import string
 import os
@@ -147,6 +148,19 @@ class VisPattern(core.ParametrizedPattern):
 
         return path, attributes, panel['translation'][-1] >= 0
 
+    def _draw_a_panel_cached(self, panel_name, panel_cache, apply_transform=True, fill=True):
+        """Same as _draw_a_panel(), but re-uses the drawing from the panel_cache
+            if the panel specification did not change since it was drawn
+        """
+        key = (json.dumps(self.pattern['panels'][panel_name], sort_keys=True, default=str),
+               apply_transform, fill)
+        if panel_name in panel_cache and panel_cache[panel_name][0] == key:
+            return panel_cache[panel_name][1]
+
+        drawing = self._draw_a_panel(panel_name, apply_transform=apply_transform, fill=fill)
+        panel_cache[panel_name] = (key, drawing)
+        return drawing
+
     def _add_panel_annotations(
             self, drawing, panel_name, path:svgpath.Path, with_text=True, view_ids=True):
         """ Adds a annotations for requested panel to the svg drawing with given offset and scaling
@@ -190,8 +204,13 @@ class VisPattern(core.ParametrizedPattern):
     def get_svg(self, svg_filename,
             with_text=True, view_ids=True, 
             flat=False, fill_panels=True,
-            margin=2) -> sw.Drawing:
-        """Convert pattern to writable svg representation"""
+            margin=2, panel_cache=None) -> sw.Drawing:
+        """Convert pattern to writable svg representation
+
+            * panel_cache -- (optional) dictionary to keep the panel drawings between the calls:
+                only the panels that changed since the previous call are re-drawn
+                (e.g. for interactive editing)
+        """
 
         if len(self.panel_order()) == 0:  # If we are still here, but pattern is empty, don't generate an image
             raise core.EmptyPatternError()
@@ -208,13 +227,25 @@ class VisPattern(core.ParametrizedPattern):
         attributes_f, attributes_b = [], []
         names_f, names_b = [], []
         shift_x_front, shift_x_back = margin, margin
+        if panel_cache is not None:
+            # Drop the panels that are no longer in the pattern
+            for panel in list(panel_cache):
+                if panel not in self.pattern['panels']:
+                    del panel_cache[panel]
         for panel in z_sorted_panels:
             if panel is not None:
-                path, attr, front = self._draw_a_panel(
-                    panel, 
-                    apply_transform=not flat, 
-                    fill=fill_panels
-                )
+                if panel_cache is not None:
+                    path, attr, front = self._draw_a_panel_cached(
+                        panel, panel_cache,
+                        apply_transform=not flat, 
+                        fill=fill_panels
+                    )
+                else:
+                    path, attr, front = self._draw_a_panel(
+                        panel, 
+                        apply_transform=not flat, 
+                        fill=fill_panels
+                    )
                 if flat:
                     path = path.translated(list_to_c([
                         shift_x_front if front else shift_x_back, 
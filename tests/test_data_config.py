@@ -0,0 +1,63 @@
+"""Recovery of the journaled properties after interrupted serialization"""
+import pytest
+
+import pygarment.data_config as data_config
+from pygarment.data_config import Properties
+
+
+class _Crash(BaseException):
+    """Process termination (not handled by Properties.serialize())"""
+
+
+def _crash(*args, **kwargs):
+    raise _Crash()
+
+
+def _crash_on_marker(original):
+    def write_record(self, journal_file, record):
+        if record['op'] == 'compacted':
+            raise _Crash()
+        original(self, journal_file, record)
+    return write_record
+
+
+def _run(filename, value, monkeypatch, crash_point):
+    """Resume from the file, record a value and serialize, crashing at the given point"""
+    props = Properties(filename)
+    props.start_journal(filename)
+    props.record('append', ['a'], value)
+    with monkeypatch.context() as m:
+        if crash_point == 'before_marker':
+            m.setattr(Properties, '_write_journal_record', 
+                      _crash_on_marker(Properties._write_journal_record))
+        elif crash_point == 'before_replace':
+            m.setattr(data_config.os, 'replace', _crash)
+        elif crash_point == 'before_clear':
+            m.setattr(Properties, '_clear_journal', _crash)
+        with pytest.raises(_Crash):
+            props.serialize(filename)
+    props._journal.close()   # Process is gone
+
+
+@pytest.mark.parametrize('first', ['before_marker', 'before_replace', 'before_clear'])
+@pytest.mark.parametrize('second', ['before_marker', 'before_replace', 'before_clear'])
+def test_journal_double_crash(tmp_path, monkeypatch, first, second):
+    filename = tmp_path / 'props.json'
+    props = Properties()
+    props.properties = {'a': []}
+    props.serialize(filename)
+
+    _run(filename, 1, monkeypatch, first)
+    assert Properties(filename)['a'] == [1]
+
+    _run(filename, 2, monkeypatch, second)
+    assert Properties(filename)['a'] == [1, 2]
+
+    # Resumes normally afterwards
+    props = Properties(filename)
+    props.start_journal(filename)
+    props.record('append', ['a'], 3)
+    props.serialize(filename)
+    props.stop_journal()
+    assert Properties(filename)['a'] == [1, 2, 3]
+    assert not Properties.journal_path(filename).exists()
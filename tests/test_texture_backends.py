@@ -0,0 +1,51 @@
+"""Agreement of the raster and matplotlib backends of the UV islands texture"""
+import numpy as np
+import pytest
+from PIL import Image
+
+from pygarment.meshgen.render.texture_utils import texture_mesh_islands
+
+
+def _sample_mesh():
+    """Two UV islands: a rectangular panel and a (convex) polygonal one, UVs in cm"""
+    rect = np.array([[0., 0.], [30., 0.], [30., 45.], [0., 45.]])
+    angles = np.linspace(0, 2 * np.pi, 13)[:-1]
+    poly = np.stack([20 * np.cos(angles), 12 * np.sin(angles)], axis=1)
+    poly = np.vstack([[0., 0.], poly])
+
+    texture_coords = np.vstack([rect, poly])
+    faces = [[0, 1, 2], [0, 2, 3]]
+    faces += [[4, 5 + i, 5 + (i + 1) % 12] for i in range(12)]
+
+    return texture_coords, np.array(faces)
+
+
+@pytest.mark.parametrize('dpi', [300, 600])
+def test_raster_matches_matplotlib(tmp_path, dpi):
+    texture_coords, faces = _sample_mesh()
+
+    images = {}
+    for backend in ['matplotlib', 'raster']:
+        path = tmp_path / f'{backend}.png'
+        texture_mesh_islands(
+            texture_coords, faces, path, dpi=dpi, backend=backend)
+        images[backend] = np.asarray(Image.open(path).convert('RGBA'), dtype=float)
+
+    mpl_img, raster_img = images['matplotlib'], images['raster']
+    assert raster_img.shape == mpl_img.shape
+
+    # Premultiplied colors, so that the color of transparent pixels does not matter
+    def premultiplied(img):
+        return np.concatenate([img[..., :3] * img[..., 3:] / 255, img[..., 3:]], axis=-1)
+
+    diff = np.abs(premultiplied(raster_img) - premultiplied(mpl_img)).max(axis=-1)
+    # NOTE: Antialiasing of the island boundaries differs slightly
+    assert np.mean(diff) < 1.5
+    assert np.mean(diff > 8) < 0.05
+    assert np.mean(diff > 32) < 0.01
+
+    # Transparent background is white, as in matplotlib output
+    background = (mpl_img[..., 3] == 0) & (raster_img[..., 3] == 0)
+    assert np.mean(background) > 0.2
+    assert np.all(mpl_img[background][:, :3] == 255)
+    assert np.all(raster_img[background][:, :3] == 255)